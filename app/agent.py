@@ -1,148 +1,131 @@
-import os
-import re
+import logging
+
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 
-from app.prompts.system_prompt import system_message
+from app.prompts.system_prompt import build_system_message, system_message
+from app.services.context import build_session_context
+from app.services.llm import model_clients
+from app.services.rag import get_retriever
 from app.services.memory import memory
 from app.services.intent import detect_intent
 from app.services.controller import handle_intent_action
+from app.services.response_cache import cached_reply
+from app.services.state import session_states, AWAITING_CONFIRMATION, AWAITING_PAYMENT
+from app.services.templates import messages, format_naira
+from app.utils.config import LLM_MODEL, RAG_ENABLED, SYSTEM_MESSAGES_MODE
 
-# -----------------------------
-# Payment / state controls
-# -----------------------------
-ACTIVE_PAYMENTS: set[str] = set()           # sessions currently in checkout mode
-ACTIVE_PAYMENT_URLS: dict[str, str] = {}    # session_id -> payment_url
-SESSION_STATE: dict[str, str] = {}          # session_id -> "COLLECTING" | "AWAITING_CONFIRMATION" | "AWAITING_PAYMENT"
-
+logger = logging.getLogger(__name__)
 
 # -----------------------------
-# Extraction helpers
+# Customer info
 # -----------------------------
-def extract_email_from_text(text: str) -> str | None:
-    """Extract email address from text using regex."""
-    email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-    match = re.search(email_pattern, text or "")
-    return match.group(0) if match else None
-
-
-def extract_phone_from_text(text: str) -> str | None:
-    """Extract phone number from text using regex."""
-    # Nigerian phone patterns: +234, 234, 0 followed by 10 digits
-    phone_patterns = [
-        r"\+?234[789]\d{9}",  # +234 or 234 followed by 10 digits
-        r"0[789]\d{9}",       # 0 followed by 10 digits
-        r"\b\d{11}\b",        # 11 digits
-    ]
-
-    for pattern in phone_patterns:
-        match = re.search(pattern, text or "")
-        if match:
-            return match.group(0)
-
-    return None
-
-
 def extract_customer_info_from_conversation(session_id: str) -> dict:
     """
-    Extract customer information (name, email, phone, address) from conversation history.
+    Customer information (name, email, phone, address) collected in this conversation.
     Returns dict with keys: name, email, phone, address (values can be None)
+    The profile is maintained incrementally by memory.add_message, so this is O(1).
     """
-    messages = memory.get_messages(session_id)
-    info = {"name": None, "email": None, "phone": None, "address": None}
-
-    for msg in messages:
-        content = msg.get("content", "") or ""
-
-        # Email
-        if not info["email"]:
-            email = extract_email_from_text(content)
-            if email:
-                info["email"] = email
-
-        # Phone
-        if not info["phone"]:
-            phone = extract_phone_from_text(content)
-            if phone:
-                info["phone"] = phone
-
-        # Name (basic patterns)
-        if not info["name"]:
-            name_patterns = [
-                r"(?:my name is|i\'?m|i am|call me|name:)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-                r"^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)$",  # standalone name
-            ]
-            for pattern in name_patterns:
-                match = re.search(pattern, content, re.IGNORECASE)
-                if match:
-                    potential_name = (match.group(1) or "").strip()
-                    if 2 <= len(potential_name) <= 50 and not re.search(r"\d", potential_name):
-                        info["name"] = potential_name
-                        break
-
-        # Address (keyword-based extraction)
-        if not info["address"]:
-            address_keywords = ["address", "deliver", "delivery", "location", "live at", "reside"]
-            if any(k in content.lower() for k in address_keywords):
-                address_patterns = [
-                    r"(?:address|deliver to|delivery|location|live at|reside)[:\s]+(.{10,200})",
-                ]
-                for pattern in address_patterns:
-                    match = re.search(pattern, content, re.IGNORECASE)
-                    if match:
-                        potential_address = (match.group(1) or "").strip()
-                        potential_address = re.sub(r"[.,;!?]+$", "", potential_address)
-                        if 10 <= len(potential_address) <= 200:
-                            info["address"] = potential_address
-                            break
-
-    return info
+    return memory.get_profile(session_id).as_dict()
 
 
 def has_all_customer_info(session_id: str) -> bool:
     """Check if all required customer information is collected."""
-    info = extract_customer_info_from_conversation(session_id)
-    return all([info["name"], info["email"], info["phone"], info["address"]])
+    return memory.get_profile(session_id).is_complete()
 
 
 # -----------------------------
 # Agent construction
 # -----------------------------
+class SalesAgent:
+    """
+    Builds a short-lived AssistantAgent per turn whose model context is that
+    session's own (token-budgeted) history, on the shared pooled model client.
+    With RAG enabled the system message carries only the company chunks
+    relevant to this turn instead of the whole catalog.
+    """
+
+    def __init__(self, model_client, system_message: str, use_retrieval: bool = RAG_ENABLED):
+        self.model_client = model_client
+        self.system_message = system_message
+        self.use_retrieval = use_retrieval
+
+    def _system_message_for(self, query: str) -> str:
+        if not self.use_retrieval:
+            return self.system_message
+        return build_system_message(get_retriever().context_for(query))
+
+    def for_session(
+        self, session_id: str, task: str, query: str | None = None, personal: bool = True
+    ) -> AssistantAgent:
+        """
+        personal=False answers from the task and knowledge alone (no session
+        history), so the reply can be shared across sessions.
+        """
+        history = memory.get_messages(session_id) if personal else []
+        if query is None:
+            # The task plus the customer's previous message, so follow-ups like "how much is it?" still match
+            previous = [m.content for m in history if m.role == "user" and m.content != task][-1:]
+            query = " ".join(previous + [task])
+
+        return AssistantAgent(
+            name="SkincareSalesAgent",
+            model_client=self.model_client,
+            system_message=self._system_message_for(query),
+            model_context=build_session_context(history, pending_task=task),
+        )
+
+
 def create_sales_agent():
-    """Create the AutoGen assistant agent with explicit model client."""
-    model_client = OpenAIChatCompletionClient(
-        model="gpt-4o-mini",
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
-    return AssistantAgent(
-        name="SkincareSalesAgent",
-        model_client=model_client,
+    """Create the sales agent on the shared, pooled model client."""
+    return SalesAgent(
+        model_client=model_clients.get_client(LLM_MODEL),
         system_message=system_message,
     )
 
 
+async def run_agent(
+    agent, session_id: str, task: str, query: str | None = None, personal: bool = True
+) -> str:
+    """
+    Run one agent turn inside the model's concurrency limit and return the reply text.
+    query overrides the retrieval query (defaults to the task and previous user message).
+    """
+    session_agent = agent.for_session(session_id, task, query=query, personal=personal)
+    async with model_clients.slot(LLM_MODEL):
+        result = await session_agent.run(task=task)
+    return result.messages[-1].content
+
+
 # -----------------------------
 # Order summary generation (pre-payment only)
 # -----------------------------
 async def generate_order_summary(agent, session_id: str, amount: float) -> str:
     """
     Generate an order summary/confirmation message with customer info and price.
-    NOTE: This is before payment intent, so AI is allowed.
+    Rendered from a template unless SYSTEM_MESSAGES_MODE is "llm".
     """
     info = extract_customer_info_from_conversation(session_id)
 
-    summary_task = (
-        "Write a professional order summary for the customer. Include:\n"
-        f"- Name: {info['name'] or 'Not provided'}\n"
-        f"- Email: {info['email'] or 'Not provided'}\n"
-        f"- Phone: {info['phone'] or 'Not provided'}\n"
-        f"- Delivery Address: {info['address'] or 'Not provided'}\n"
-        f"- Total Amount: ₦{amount:,.0f}\n\n"
-        "End with a single question asking them to confirm if everything is correct."
-    )
+    if SYSTEM_MESSAGES_MODE == "llm":
+        # NOTE: This is before payment intent, so AI is allowed.
+        summary_task = (
+            "Write a professional order summary for the customer. Include:\n"
+            f"- Name: {info['name'] or 'Not provided'}\n"
+            f"- Email: {info['email'] or 'Not provided'}\n"
+            f"- Phone: {info['phone'] or 'Not provided'}\n"
+            f"- Delivery Address: {info['address'] or 'Not provided'}\n"
+            f"- Total Amount: ₦{amount:,.0f}\n\n"
+            "End with a single question asking them to confirm if everything is correct."
+        )
+        summary_message = await run_agent(agent, session_id, summary_task, query="")
+    else:
+        missing = messages.phrase("missing")
+        summary_message = messages.render(
+            "order_summary",
+            amount=format_naira(amount),
+            **{field: info[field] or missing for field in ("name", "email", "phone", "address")},
+        )
 
-    result = await agent.run(task=summary_task)
-    summary_message = result.messages[-1].content
     memory.add_message(session_id, role="assistant", content=summary_message)
     return summary_message
 
@@ -154,36 +137,43 @@ async def generate_order_summary(agent, session_id: str, amount: float) -> str:
 
 async def generate_payment_confirmation(agent, session_id: str, amount: float = None) -> str:
     """
-    Generate a payment confirmation message using the chatbot agent.
+    Generate a payment confirmation message.
     amount is expected in kobo (Paystack sends kobo).
+    Rendered from a template unless SYSTEM_MESSAGES_MODE is "llm".
     """
-    amount_text = ""
+    amount_naira = None
     if amount:
         try:
             amount_naira = amount / 100
-            amount_text = f" of ₦{amount_naira:,.0f}"
         except Exception:
-            amount_text = ""
-
-    confirmation_task = (
-        f"The customer's payment{amount_text} has been successfully confirmed. "
-        "Write a warm, professional confirmation message that: "
-        "1) Confirms payment was successful, "
-        "2) Thanks them, "
-        "3) Says the order is being processed. "
-        "Keep it concise (2-3 sentences max)."
-    )
-
-    result = await agent.run(task=confirmation_task)
-    confirmation_message = result.messages[-1].content
+            amount_naira = None
+
+    if SYSTEM_MESSAGES_MODE == "llm":
+        amount_text = f" of ₦{amount_naira:,.0f}" if amount_naira is not None else ""
+        confirmation_task = (
+            f"The customer's payment{amount_text} has been successfully confirmed. "
+            "Write a warm, professional confirmation message that: "
+            "1) Confirms payment was successful, "
+            "2) Thanks them, "
+            "3) Says the order is being processed. "
+            "Keep it concise (2-3 sentences max)."
+        )
+        confirmation_message = await run_agent(agent, session_id, confirmation_task, query="")
+    elif amount_naira is not None:
+        confirmation_message = messages.render("payment_confirmation", amount=format_naira(amount_naira))
+    else:
+        confirmation_message = messages.render("payment_confirmation_no_amount")
 
     memory.add_message(session_id, role="assistant", content=confirmation_message)
     return confirmation_message
 
 
 
-async def handle_user_message(agent, session_id: str, user_message: str) -> dict:
+async def handle_user_message(agent, session_id: str, user_message: str, stored: bool = False) -> dict:
     """
+    stored=True means the caller already added the message(s) to memory
+    (a debounced burst, one message at a time).
+
     Contract returned:
     {
       "reply": str,
@@ -193,15 +183,14 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
     }
     """
 
-    # Ensure state exists
-    SESSION_STATE.setdefault(session_id, "COLLECTING")
-
     # Always store user message
-    memory.add_message(session_id, role="user", content=user_message)
+    if not stored:
+        memory.add_message(session_id, role="user", content=user_message)
 
     # If we are in payment lock mode, ALWAYS resend payment button (system-driven)
-    if session_id in ACTIVE_PAYMENTS:
-        payment_url = ACTIVE_PAYMENT_URLS.get(session_id)
+    state = session_states.get(session_id)
+    if state.payment_locked:
+        payment_url = state.payment_url
         if payment_url:
             return {
                 "reply": "",
@@ -229,7 +218,7 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
     # -----------------------------
     if intent == "purchase_intent":
         if has_all_customer_info(session_id):
-            SESSION_STATE[session_id] = "AWAITING_CONFIRMATION"
+            session_states.transition(session_id, AWAITING_CONFIRMATION)
             summary = await generate_order_summary(agent, session_id, amount_naira)
             return {
                 "reply": summary,
@@ -239,8 +228,7 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
             }
 
         # Not enough info yet -> let AI collect details
-        result = await agent.run(task=user_message)
-        reply = result.messages[-1].content
+        reply = await run_agent(agent, session_id, user_message)
         memory.add_message(session_id, role="assistant", content=reply)
         return {
             "reply": reply,
@@ -254,8 +242,9 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
     # -----------------------------
     if intent == "order_confirmation":
         # Only accept confirmation if we really are awaiting it
-        if SESSION_STATE.get(session_id) == "AWAITING_CONFIRMATION" and has_all_customer_info(session_id):
-            SESSION_STATE[session_id] = "AWAITING_PAYMENT"
+        if has_all_customer_info(session_id) and session_states.transition(
+            session_id, AWAITING_PAYMENT, from_stage=AWAITING_CONFIRMATION
+        ):
             reply = "✅ Great — when you're ready, type **pay now** to receive your Pay Now button."
             memory.add_message(session_id, role="assistant", content=reply)
             return {
@@ -266,8 +255,7 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
             }
 
         # Otherwise, just continue conversation
-        result = await agent.run(task=user_message)
-        reply = result.messages[-1].content
+        reply = await run_agent(agent, session_id, user_message)
         memory.add_message(session_id, role="assistant", content=reply)
         return {
             "reply": reply,
@@ -281,9 +269,8 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
     # -----------------------------
     if intent == "payment_initiation":
         # Gate by state so "proceed" doesn't trigger payment too early
-        if SESSION_STATE.get(session_id) != "AWAITING_PAYMENT":
-            result = await agent.run(task=user_message)
-            reply = result.messages[-1].content
+        if session_states.get(session_id, fresh=True).stage != AWAITING_PAYMENT:
+            reply = await run_agent(agent, session_id, user_message)
             memory.add_message(session_id, role="assistant", content=reply)
             return {
                 "reply": reply,
@@ -312,17 +299,29 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
             **info,
         }
 
-        # Lock payment mode first (prevents AI chatter during checkout)
-        ACTIVE_PAYMENTS.add(session_id)
+        # Lock payment mode first (prevents AI chatter during checkout).
+        # Compare-and-set: if another worker just locked it, don't create a second link.
+        if not session_states.lock_payment(session_id):
+            return {
+                "reply": "",
+                "intent": "payment_locked",
+                "action": "payment_locked",
+                "data": {},
+            }
 
         # System action: create payment link (NO AI)
-        action_result = handle_intent_action("payment_initiation", user_data)
+        try:
+            action_result = await handle_intent_action("payment_initiation", user_data)
+        except Exception as e:
+            # Paystack still failing after retries: fall through to the unlock below
+            logger.warning(f"Payment initiation failed for session {session_id}: {e}")
+            action_result = {"action": "payment_link_failed", "data": {}}
 
         # If link created, store it so we can resend button reliably
         if action_result.get("action") == "payment_link_created":
             payment_url = (action_result.get("data") or {}).get("payment_url")
             if payment_url:
-                ACTIVE_PAYMENT_URLS[session_id] = payment_url
+                session_states.set_payment_url(session_id, payment_url)
                 return {
                     "reply": "",
                     "intent": intent,
@@ -331,7 +330,7 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
                 }
 
         # If controller failed, unlock and ask user to retry (system message)
-        ACTIVE_PAYMENTS.discard(session_id)
+        session_states.unlock_payment(session_id)
         reply = "Sorry — I couldn’t create the payment link right now. Please try again in a moment."
         memory.add_message(session_id, role="assistant", content=reply)
         return {
@@ -342,10 +341,14 @@ async def handle_user_message(agent, session_id: str, user_message: str) -> dict
         }
 
     # -----------------------------
-    # Default: normal chat
+    # Default: normal chat (FAQ-style answers may come from the response cache)
     # -----------------------------
-    result = await agent.run(task=user_message)
-    reply = result.messages[-1].content
+    reply = await cached_reply(
+        session_id,
+        user_message,
+        intent,
+        lambda personal: run_agent(agent, session_id, user_message, personal=personal),
+    )
     memory.add_message(session_id, role="assistant", content=reply)
     return {
         "reply": reply,
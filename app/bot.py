@@ -0,0 +1,145 @@
+"""
+Telegram update handling shared by every ingestion path
+(inline webhook, queued webhook workers, long polling).
+"""
+
+import logging
+
+from app.agent import handle_user_message, generate_payment_confirmation
+from app.services.intent import quick_intent_override
+from app.services.memory import memory
+from app.services.state import session_states, COLLECTING
+from app.services.telegram_dispatcher import dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+def get_update_chat_id(update: dict) -> int | None:
+    """
+    chat_id of a message update, or None for updates we don't handle.
+    """
+    message = update.get("message")
+    if not isinstance(message, dict):
+        return None
+    chat = message.get("chat")
+    if not isinstance(chat, dict) or "id" not in chat:
+        return None
+    return chat["id"]
+
+
+def is_urgent_update(update: dict) -> bool:
+    """
+    Updates that must not wait in (or be merged into) a debounced burst:
+    payment commands, non-text messages, and anything from a chat that is
+    past the COLLECTING stage of checkout.
+    """
+    chat_id = get_update_chat_id(update)
+    text = update["message"].get("text") if chat_id is not None else None
+    if not text:
+        return True
+    if quick_intent_override(text):
+        return True
+    state = session_states.get(str(chat_id))
+    return state.payment_locked or state.stage != COLLECTING
+
+
+def merge_updates(updates: list[dict]) -> dict:
+    """
+    Fold a burst of text updates from one chat into one update (texts joined by newlines).
+    """
+    if len(updates) == 1:
+        return updates[0]
+    last = updates[-1]
+    text = "\n".join(u["message"]["text"] for u in updates)
+    return {**last, "message": {**last["message"], "text": text}}
+
+
+async def process_telegram_updates(agent, updates: list[dict]) -> dict:
+    """
+    Handle a debounced burst from one chat as a single agent turn.
+    Each message is stored on its own (so contact details are extracted per
+    message, e.g. a name sent alone); only the agent turn sees the merged text.
+    """
+    if len(updates) == 1:
+        return await process_telegram_update(agent, updates[0])
+    session_id = str(get_update_chat_id(updates[-1]))
+    for update in updates:
+        memory.add_message(session_id, role="user", content=update["message"]["text"])
+    return await process_telegram_update(agent, merge_updates(updates), stored=True)
+
+
+async def process_telegram_update(agent, update: dict, stored: bool = False) -> dict:
+    """
+    Run one Telegram update through the agent and queue the replies.
+    stored=True: its text is already in memory (see process_telegram_updates).
+    """
+    # Ignore non-message updates
+    chat_id = get_update_chat_id(update)
+    if chat_id is None:
+        return {"status": "ignored"}
+
+    text = update["message"].get("text")
+
+    # Ignore non-text messages
+    if not text:
+        dispatcher.enqueue_message(chat_id, "Please send a text message.")
+        return {"status": "ok"}
+
+    session_id = str(chat_id)
+
+    # Run agent logic
+    result = await handle_user_message(
+        agent=agent,
+        session_id=session_id,
+        user_message=text,
+        stored=stored,
+    )
+
+    action = result.get("action", "continue_chat")
+    reply = result.get("reply", "")
+    data_payload = result.get("data") or {}
+
+    # ✅ Payment button flow (guarded)
+    if action == "payment_link_created":
+        payment_url = data_payload.get("payment_url")
+        if payment_url:
+            dispatcher.enqueue_payment_button(chat_id=chat_id, payment_url=payment_url)
+        else:
+            # No URL => don't crash; guide user
+            dispatcher.enqueue_message(
+                chat_id=chat_id,
+                text="⚠️ I couldn't fetch your payment link yet. Please type **pay now** again.",
+            )
+        return {"status": "ok"}
+
+    # ✅ Normal message flow (never send empty text)
+    if reply:
+        dispatcher.enqueue_message(chat_id=chat_id, text=reply)
+
+    return {"status": "ok"}
+
+
+async def deliver_payment_confirmation(agent, session_id: str, amount):
+    """
+    After charge.success: write and send the confirmation message, raising if it
+    couldn't be sent. The Paystack webhook has already unlocked the session.
+    """
+    # Generate confirmation text (allowed: this is after payment success)
+    confirmation_message = await generate_payment_confirmation(
+        agent=agent,
+        session_id=session_id,
+        amount=amount,
+    )
+
+    # Send to Telegram if session_id is a chat_id
+    try:
+        chat_id = int(session_id)
+    except (ValueError, TypeError):
+        logger.info(
+            f"Session {session_id} is not a Telegram chat_id; confirmation saved in memory."
+        )
+        return
+
+    # Wait for the send itself: a failure raises so the confirmation job retries
+    await dispatcher.send_message(chat_id, confirmation_message)
+    logger.info(f"Sent confirmation message to Telegram chat {chat_id}")
@@ -1,54 +1,103 @@
+import os
 import sqlite3
-from pathlib import Path
-
-DB_PATH = Path(__file__).resolve().parent.parent.parent / "app.db"
-
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
-
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT,
-        name TEXT,
-        email TEXT,
-        phone TEXT,
-        address TEXT
-    )
-    """)
-    
-    # Add address column if it doesn't exist (for existing databases)
-    try:
-        cursor.execute("ALTER TABLE customers ADD COLUMN address TEXT")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS orders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id INTEGER,
-        amount INTEGER,
-        status TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS payments (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        order_id INTEGER,
-        reference TEXT,
-        status TEXT,
-        amount INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-    conn.commit()
-    conn.close()
+import threading
+from contextlib import contextmanager
+
+from app.db.migrations import migrate
+from app.utils.config import APP_DB_PATH, DB_BUSY_TIMEOUT_MS, DB_CACHED_STATEMENTS
+
+DB_PATH = APP_DB_PATH
+
+
+class ConnectionManager:
+    """
+    One long-lived SQLite connection per thread (and per process), opened in
+    WAL mode with tuned pragmas, instead of a connect/close on every query.
+    WAL lets readers run while a writer commits; synchronous=NORMAL is safe
+    with WAL and skips an fsync per commit.
+    """
+
+    def __init__(
+        self,
+        path=DB_PATH,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        cached_statements: int = DB_CACHED_STATEMENTS,
+    ):
+        self.path = str(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "closed": 0, "transactions": 0}
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            # Each thread only uses its own connection; this lets close_all() run from any thread
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._lock:
+            self._connections.append(conn)
+            self._stats["opened"] += 1
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """
+        This thread's connection, opened on first use (and again after a fork).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._open()
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Commit on success, roll back on error.
+        """
+        conn = self.get()
+        with conn:
+            yield conn
+        self._stats["transactions"] += 1
+
+    def close_all(self):
+        """
+        Close every connection (at shutdown); threads reopen lazily if used again.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+            self._stats["closed"] += 1
+        self._local = threading.local()
+
+    def stats(self) -> dict:
+        return {**self._stats, "open": len(self._connections), "path": self.path}
+
+
+db = ConnectionManager()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    The calling thread's shared connection. Don't close it; use db.transaction() for writes.
+    """
+    return db.get()
+
+
+def init_db() -> int:
+    """
+    Apply pending schema migrations (see app/db/migrations.py); returns the schema version.
+    """
+    return migrate(db.get())
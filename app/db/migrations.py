@@ -0,0 +1,161 @@
+"""
+Versioned schema migrations for the orders database.
+
+The schema version is stored in SQLite's PRAGMA user_version. At startup
+migrate() applies every migration newer than that version, in order, each in
+its own BEGIN IMMEDIATE transaction together with the version bump, so
+concurrent workers starting at once apply each migration exactly once.
+"""
+
+import logging
+import sqlite3
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _create_base_schema(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS customers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        name TEXT,
+        email TEXT,
+        phone TEXT,
+        address TEXT
+    )
+    """)
+
+    # Databases created before address was collected
+    if "address" not in _columns(conn, "customers"):
+        conn.execute("ALTER TABLE customers ADD COLUMN address TEXT")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        amount INTEGER,
+        status TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS payments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER,
+        reference TEXT,
+        status TEXT,
+        amount INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _add_lookup_indexes(conn: sqlite3.Connection):
+    # One row per Paystack reference: keep the successful one, else the newest.
+    # The others are moved (not deleted) to payments_duplicates for an operator to review.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS payments_duplicates (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER,
+        reference TEXT,
+        status TEXT,
+        amount INTEGER,
+        created_at TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("""
+    CREATE TEMP TABLE duplicate_payment_ids AS
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY reference
+            ORDER BY (status = 'success') DESC, id DESC
+        ) AS rank
+        FROM payments
+        WHERE reference IS NOT NULL
+    )
+    WHERE rank > 1
+    """)
+    conn.execute("""
+    INSERT INTO payments_duplicates (id, order_id, reference, status, amount, created_at)
+    SELECT id, order_id, reference, status, amount, created_at
+    FROM payments WHERE id IN (SELECT id FROM duplicate_payment_ids)
+    """)
+    moved = conn.execute("DELETE FROM payments WHERE id IN (SELECT id FROM duplicate_payment_ids)").rowcount
+    conn.execute("DROP TABLE duplicate_payment_ids")
+    if moved:
+        logger.warning(
+            f"Moved {moved} duplicate payment rows to payments_duplicates before adding UNIQUE(reference)"
+        )
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_payments_reference ON payments (reference)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payments_order_id ON payments (order_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_orders_customer_id ON orders (customer_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_customers_session_id ON customers (session_id)")
+    conn.execute("ANALYZE")
+
+
+def _create_background_jobs(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS background_jobs (
+        name TEXT NOT NULL,
+        reference TEXT NOT NULL,
+        key TEXT,
+        payload TEXT,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (name, reference)
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_background_jobs_status ON background_jobs (name, status)")
+
+
+def _add_background_job_owner(conn: sqlite3.Connection):
+    if "owner" not in _columns(conn, "background_jobs"):
+        # NULL = no live runner holds it (rows from before this migration included)
+        conn.execute("ALTER TABLE background_jobs ADD COLUMN owner TEXT")
+
+
+# (version, description, apply) in order; never edit a released migration, add a new one
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "customers, orders and payments tables", _create_base_schema),
+    (2, "lookup indexes and UNIQUE payments.reference", _add_lookup_indexes),
+    (3, "background_jobs outcomes", _create_background_jobs),
+    (4, "background_jobs.owner", _add_background_job_owner),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = LATEST_VERSION) -> int:
+    """
+    Bring the database up to target; returns the resulting version.
+    """
+    for version, description, apply in MIGRATIONS:
+        if version > target or version <= schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if schema_version(conn) < version:
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                logger.info(f"Applied migration {version}: {description}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return schema_version(conn)
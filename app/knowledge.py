@@ -1,8 +1,11 @@
+import hashlib
 from pathlib import Path
 
+COMPANY_DATA_DIR = Path(__file__).resolve().parent / "company_data"
+
+
 def load_documents():
-    base_dir = Path(__file__).resolve().parent
-    company_data_dir = base_dir / "company_data"
+    company_data_dir = COMPANY_DATA_DIR
 
     documents = []
 
@@ -12,3 +15,21 @@ def load_documents():
                 documents.append(f.read())
 
     return "\n".join(documents)
+
+
+# (file signature, content hash) of the last computed version
+_version = (None, None)
+
+
+def knowledge_version() -> str:
+    """
+    Content hash of load_documents(). Files are only re-read when a name,
+    size or mtime in company_data changes, so this is cheap to call per turn.
+    """
+    global _version
+    stats = ((p.name, p.stat()) for p in COMPANY_DATA_DIR.iterdir() if p.is_file())
+    signature = tuple(sorted((name, st.st_size, st.st_mtime_ns) for name, st in stats))
+    if signature != _version[0]:
+        digest = hashlib.sha256(load_documents().encode("utf-8")).hexdigest()[:16]
+        _version = (signature, digest)
+    return _version[1]
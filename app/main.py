@@ -4,24 +4,37 @@ import logging
 from fastapi import FastAPI, Request, Response
 from pydantic import BaseModel
 
-from app.db.database import init_db
+from app.db.database import db, init_db
 
 from app.agent import (
     create_sales_agent,
     handle_user_message,
-    generate_payment_confirmation,
-    ACTIVE_PAYMENTS,
-    ACTIVE_PAYMENT_URLS,
-    SESSION_STATE,
+)
+from app.bot import (
+    deliver_payment_confirmation,
+    get_update_chat_id,
+    is_urgent_update,
+    process_telegram_update,
+    process_telegram_updates,
 )
 
-from app.services.payment import initialize_payment, verify_payment
-from app.services.telegram import send_telegram_message, send_telegram_payment_button
+from app.services.context import context_report
+from app.services.dedup import update_dedup
+from app.services.ingestion import UpdateIngestor
+from app.services.intent import get_classifier, intent_stats
+from app.services.jobs import JobRunner
+from app.services.llm import model_clients
+from app.services.memory import memory
+from app.services.rag import get_retriever
+from app.services.response_cache import response_cache
+from app.services.sharding import ShardedExecutor
+from app.services.state import session_states
+from app.services.payment import paystack, initialize_payment, verify_payment
+from app.services.telegram import telegram
+from app.services.telegram_dispatcher import dispatcher
+from app.services.templates import messages
 from app.services.webhook import verify_paystack_signature, handle_paystack_event
-from app.services.storage import (
-    get_session_id_by_payment_reference,
-    get_session_id_by_order_id,
-)
+from app.utils.config import TELEGRAM_INGESTION_MODE
 
 # -----------------------------
 # App init
@@ -40,6 +53,61 @@ logging.basicConfig(level=logging.INFO)
 # Create once (no lazy-load confusion)
 sales_agent = create_sales_agent()
 
+# Background processing of queued Telegram updates
+ingestor = UpdateIngestor(
+    process=lambda updates: process_telegram_updates(sales_agent, updates),
+    get_key=get_update_chat_id,
+    is_urgent=is_urgent_update,
+    dedup=update_dedup,
+)
+
+# Sharded mode: this process only routes updates to per-chat worker processes
+shards = ShardedExecutor() if TELEGRAM_INGESTION_MODE == "sharded" else None
+
+
+async def confirm_payment(session_id: str, amount):
+    if shards is not None:
+        # The worker that owns this chat confirms; its failure is raised here so the job retries
+        await shards.confirm_payment(session_id, amount)
+    else:
+        await deliver_payment_confirmation(sales_agent, session_id, amount)
+
+
+# Payment confirmations run after the Paystack webhook has been answered
+confirmations = JobRunner("payment-confirmation", confirm_payment)
+
+
+# -----------------------------
+# Lifecycle
+# -----------------------------
+@app.on_event("startup")
+async def on_startup():
+    await model_clients.startup()
+    get_classifier()
+    get_retriever()
+    memory.start()
+    dispatcher.start()
+    ingestor.start()
+    confirmations.start()
+    if shards is not None:
+        shards.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await confirmations.stop()
+    if shards is not None:
+        await shards.stop()
+    await ingestor.stop()
+    await dispatcher.stop()
+    await model_clients.shutdown()
+    await telegram.close()
+    await paystack.close()
+    memory.stop()
+    update_dedup.close()
+    session_states.close()
+    db.close_all()
+
 
 # -----------------------------
 # Schemas
@@ -82,9 +150,9 @@ async def chat(request: ChatRequest):
 
 
 @app.post("/payment/initiate")
-def initiate_payment(request: PaymentInitRequest):
+async def initiate_payment(request: PaymentInitRequest):
     amount_in_kobo = request.amount * 100
-    payment_data = initialize_payment(email=request.email, amount=amount_in_kobo)
+    payment_data = await initialize_payment(email=request.email, amount=amount_in_kobo)
     return {
         "payment_url": payment_data["authorization_url"],
         "reference": payment_data["reference"],
@@ -92,8 +160,8 @@ def initiate_payment(request: PaymentInitRequest):
 
 
 @app.post("/payment/verify")
-def verify_payment_endpoint(request: PaymentVerifyRequest):
-    payment_status = verify_payment(request.reference)
+async def verify_payment_endpoint(request: PaymentVerifyRequest):
+    payment_status = await verify_payment(request.reference)
     return {
         "status": payment_status["status"],
         "amount": payment_status["amount"],
@@ -101,6 +169,14 @@ def verify_payment_endpoint(request: PaymentVerifyRequest):
     }
 
 
+@app.get("/payment/{reference}/confirmation")
+def payment_confirmation_status(reference: str):
+    outcome = confirmations.outcome(reference)
+    if outcome is None:
+        return Response(status_code=404)
+    return outcome
+
+
 # -----------------------------
 # Paystack webhook (payment truth source)
 # -----------------------------
@@ -128,43 +204,23 @@ async def paystack_webhook(request: Request):
                 f"Processing successful payment: reference={reference}, amount={amount}, status={status}"
             )
 
-            # Save to DB etc (your existing logic)
-            order_id = handle_paystack_event(event)
-
-            # Resolve session_id (Telegram chat_id stored as session_id string)
-            session_id = get_session_id_by_payment_reference(reference)
-
-            if not session_id and order_id:
-                logger.info(f"Reference lookup failed, trying order_id: {order_id}")
-                session_id = get_session_id_by_order_id(order_id)
+            # Save payment, mark order paid and resolve the session in one transaction
+            charge = handle_paystack_event(event)
 
+            # Telegram chat_id stored as session_id string
+            session_id = charge.session_id if charge else None
             if not session_id:
-                logger.warning(
-                    f"Could not find session_id for reference={reference} (order_id={order_id})"
-                )
+                logger.warning(f"Could not find session_id for reference={reference}")
                 return {"status": "ok"}
 
-            # ✅ Unlock + cleanup state (prevents being stuck)
-            ACTIVE_PAYMENTS.discard(session_id)
-            ACTIVE_PAYMENT_URLS.pop(session_id, None)
-            SESSION_STATE.pop(session_id, None)
-
-            # Generate confirmation text (allowed: this is after payment success)
-            confirmation_message = await generate_payment_confirmation(
-                agent=sales_agent,
-                session_id=session_id,
-                amount=amount,
-            )
+            # Unlock checkout before answering Paystack (it won't redeliver after a 200)
+            session_states.reset(session_id)
+            if shards is not None:
+                # The owning worker holds the chat's state unless STATE_BACKEND is shared
+                shards.reset_session(session_id)
 
-            # Send to Telegram if session_id is a chat_id
-            try:
-                chat_id = int(session_id)
-                send_telegram_message(chat_id, confirmation_message)
-                logger.info(f"Sent confirmation message to Telegram chat {chat_id}")
-            except (ValueError, TypeError):
-                logger.info(
-                    f"Session {session_id} is not a Telegram chat_id; confirmation saved in memory."
-                )
+            # Generate and send the confirmation in the background; answer Paystack now
+            confirmations.submit(reference, session_id, session_id, amount)
 
         return {"status": "ok"}
 
@@ -183,53 +239,54 @@ async def paystack_webhook(request: Request):
 async def telegram_webhook(request: Request):
     data = await request.json()
 
-    # Ignore non-message updates
-    if "message" not in data:
-        return {"status": "ignored"}
-
-    message = data["message"]
-    chat_id = message["chat"]["id"]
-    text = message.get("text")
-
-    # Ignore non-text messages
-    if not text:
-        send_telegram_message(chat_id, "Please send a text message.")
-        return {"status": "ok"}
-
-    session_id = str(chat_id)
-
-    # Run agent logic
-    result = await handle_user_message(
-        agent=sales_agent,
-        session_id=session_id,
-        user_message=text,
-    )
-
-    action = result.get("action", "continue_chat")
-    reply = result.get("reply", "")
-    data_payload = result.get("data") or {}
-
-    # ✅ Payment button flow (guarded)
-    if action == "payment_link_created":
-        payment_url = data_payload.get("payment_url")
-        if payment_url:
-            send_telegram_payment_button(chat_id=chat_id, payment_url=payment_url)
-        else:
-            # No URL => don't crash; guide user
-            send_telegram_message(
-                chat_id=chat_id,
-                text="⚠️ I couldn't fetch your payment link yet. Please type **pay now** again.",
-            )
-        return {"status": "ok"}
+    # Drop Telegram redeliveries before doing any work
+    if update_dedup.is_duplicate(data.get("update_id")):
+        return {"status": "duplicate"}
+
+    # Sharded mode: route to the chat's worker process, acknowledge immediately
+    if shards is not None:
+        # Handed off: Telegram won't redeliver after this 200 anyway
+        update_dedup.done(data.get("update_id"))
+        if not shards.submit(data):
+            return {"status": "ignored"}
+        return {"status": "queued"}
+
+    # Queue mode: validate + enqueue, acknowledge Telegram immediately (the ingestor finishes the claim)
+    if TELEGRAM_INGESTION_MODE == "queue":
+        if not ingestor.submit(data):
+            return {"status": "ignored"}
+        return {"status": "queued"}
+
+    # Inline: a failure answers 500, so release the claim and let Telegram redeliver
+    try:
+        result = await process_telegram_update(sales_agent, data)
+    except BaseException:
+        update_dedup.release(data.get("update_id"))
+        raise
+    update_dedup.done(data.get("update_id"))
+    return result
 
-    # ✅ Normal message flow (never send empty text)
-    if reply:
-        send_telegram_message(chat_id=chat_id, text=reply)
 
+@app.get("/health")
+def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "llm": model_clients.stats(),
+        "context": context_report(),
+        "intent": intent_stats(),
+        "response_cache": response_cache.stats(),
+        "memory": memory.stats(),
+        "session_state": session_states.stats(),
+        "system_messages": messages.stats(),
+        "database": db.stats(),
+        "telegram_dispatch": dispatcher.stats(),
+        "telegram_ingest": ingestor.stats(),
+        "payment_confirmations": confirmations.stats(),
+        "shards": shards.stats() if shards is not None else None,
+        "telegram_dedup": update_dedup.stats(),
+    }
 
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
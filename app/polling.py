@@ -0,0 +1,170 @@
+"""
+Telegram long-polling runner, for staging or deployments without a public webhook.
+
+Updates are fetched with getUpdates in batches, de-duplicated, and handed to
+an UpdateIngestor (concurrent across chats, serialized per chat) that runs the
+same process_telegram_update path as the webhook. A batch's offset is only
+confirmed to Telegram (by the next getUpdates call) once every update in it
+has been processed, so a crash re-delivers unfinished work.
+
+Run from the repo root:
+    python -m app.polling
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Awaitable, Callable
+
+from app.bot import get_update_chat_id, is_urgent_update, process_telegram_updates
+from app.services.dedup import update_dedup
+from app.services.ingestion import UpdateIngestor
+from app.services.telegram import telegram
+from app.utils.config import TELEGRAM_POLL_TIMEOUT, TELEGRAM_POLL_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramPoller:
+    def __init__(
+        self,
+        process: Callable[[list[dict]], Awaitable],
+        client=telegram,
+        dedup=update_dedup,
+        poll_timeout: int = TELEGRAM_POLL_TIMEOUT,
+        limit: int = TELEGRAM_POLL_LIMIT,
+        is_urgent: Callable[[dict], bool] = is_urgent_update,
+    ):
+        """
+        process(updates) handles a burst of updates from one chat.
+        """
+        self.client = client
+        self.dedup = dedup
+        self.poll_timeout = poll_timeout
+        self.limit = limit
+        # A batch already groups a chat's burst, so no debounce delay on top
+        self.ingestor = UpdateIngestor(
+            process=process,
+            get_key=get_update_chat_id,
+            is_urgent=is_urgent,
+            debounce_ms=0,
+            dedup=dedup,
+        )
+        self.offset: int | None = None
+        self._stopping = asyncio.Event()
+        self._stats = {
+            "polls": 0,
+            "empty_polls": 0,
+            "errors": 0,
+            "updates": 0,
+            "duplicates": 0,
+            "ignored": 0,
+            "batch_seconds": 0.0,
+            "max_batch_size": 0,
+        }
+
+    async def _fetch(self) -> list[dict]:
+        payload = {"timeout": self.poll_timeout, "limit": self.limit, "allowed_updates": ["message"]}
+        if self.offset is not None:
+            payload["offset"] = self.offset
+        # HTTP timeout must outlast the long poll itself
+        return await self.client.call("getUpdates", payload, timeout=self.poll_timeout + 10) or []
+
+    async def _process_batch(self, updates: list[dict]):
+        started = time.perf_counter()
+        for update in updates:
+            if self.dedup.is_duplicate(update.get("update_id")):
+                self._stats["duplicates"] += 1
+            elif not self.ingestor.submit(update):
+                self._stats["ignored"] += 1
+        await self.ingestor.join()
+
+        self._stats["updates"] += len(updates)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(updates))
+        self._stats["batch_seconds"] += time.perf_counter() - started
+
+    async def run(self):
+        # Claims a previous poller left unfinished must not hide the redelivered updates
+        released = self.dedup.release_unfinished()
+        if released:
+            logger.info(f"Released {released} unfinished update claims")
+        self.ingestor.start()
+        backoff = 1.0
+        try:
+            while not self._stopping.is_set():
+                fetch = asyncio.ensure_future(self._fetch())
+                stop = asyncio.ensure_future(self._stopping.wait())
+                await asyncio.wait({fetch, stop}, return_when=asyncio.FIRST_COMPLETED)
+                if not fetch.done():
+                    fetch.cancel()
+                    break
+                stop.cancel()
+
+                try:
+                    updates = fetch.result()
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    logger.warning(f"getUpdates failed ({e}); retrying in {backoff:.0f}s")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    continue
+                backoff = 1.0
+
+                self._stats["polls"] += 1
+                if not updates:
+                    self._stats["empty_polls"] += 1
+                    continue
+
+                await self._process_batch(updates)
+                # Confirmed with Telegram on the next getUpdates call
+                self.offset = max(u["update_id"] for u in updates) + 1
+        finally:
+            await self.ingestor.stop()
+            await self._commit_offset()
+
+    async def _commit_offset(self):
+        if self.offset is None:
+            return
+        try:
+            await self.client.call("getUpdates", {"offset": self.offset, "limit": 1, "timeout": 0})
+        except Exception as e:
+            logger.warning(f"Could not confirm offset {self.offset} with Telegram: {e}")
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        batches = self._stats["polls"] - self._stats["empty_polls"]
+        return {
+            **self._stats,
+            "offset": self.offset,
+            "avg_batch_seconds": (self._stats["batch_seconds"] / batches) if batches else 0.0,
+            "ingest": self.ingestor.stats(),
+        }
+
+
+async def main():
+    # Same agent, services and lifecycle as the web app
+    from app.main import sales_agent, on_startup, on_shutdown
+
+    await on_startup()
+    # getUpdates is rejected while a webhook is registered
+    await telegram.call("deleteWebhook", {"drop_pending_updates": False})
+
+    poller = TelegramPoller(process=lambda updates: process_telegram_updates(sales_agent, updates))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, poller.stop)
+
+    logger.info("Polling Telegram for updates")
+    try:
+        await poller.run()
+    finally:
+        logger.info(f"Polling stopped: {poller.stats()}")
+        await on_shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Fixed-shape system messages (order summary, payment confirmation).
+
+Rendered by app/services/templates.py without an LLM call. Each message has a
+few phrasings per locale and renders rotate through them. Fields use
+str.format syntax; values are HTML-escaped before substitution.
+
+Every order_summary variant must end by asking whether the details are
+correct, so the natural reply is "yes". Phrases like "go ahead" are payment
+triggers (intent.quick_intent_override) and would skip the confirmation.
+"""
+
+MESSAGE_TEMPLATES = {
+    "en": {
+        "missing": "Not provided",
+        "order_summary": [
+            "Here's a summary of your order:\n\n"
+            "Name: {name}\n"
+            "Email: {email}\n"
+            "Phone: {phone}\n"
+            "Delivery address: {address}\n"
+            "Total: {amount}\n\n"
+            "Is everything correct?",
+
+            "Thanks, {name}! Please check your order details:\n\n"
+            "• Email: {email}\n"
+            "• Phone: {phone}\n"
+            "• Deliver to: {address}\n"
+            "• Amount: {amount}\n\n"
+            "Are these details correct?",
+
+            "Almost done! This is what I have for your order:\n\n"
+            "👤 {name}\n"
+            "📧 {email}\n"
+            "📞 {phone}\n"
+            "📍 {address}\n"
+            "💰 {amount}\n\n"
+            "Can you confirm these details are correct?",
+        ],
+        "payment_confirmation": [
+            "✅ Payment of {amount} received — thank you! Your order is now being processed "
+            "and we'll be in touch about delivery.",
+
+            "Thank you! 🎉 We've confirmed your payment of {amount}. "
+            "Your order is being prepared and we'll update you on delivery soon.",
+
+            "All set — your payment of {amount} was successful. Thanks for shopping with us! "
+            "We're processing your order now.",
+        ],
+        "payment_confirmation_no_amount": [
+            "✅ Payment received — thank you! Your order is now being processed "
+            "and we'll be in touch about delivery.",
+
+            "Thank you! 🎉 We've confirmed your payment. "
+            "Your order is being prepared and we'll update you on delivery soon.",
+        ],
+    },
+    "pcm": {
+        "missing": "No dey",
+        "order_summary": [
+            "See your order summary:\n\n"
+            "Name: {name}\n"
+            "Email: {email}\n"
+            "Phone: {phone}\n"
+            "Delivery address: {address}\n"
+            "Total: {amount}\n\n"
+            "Everything correct?",
+
+            "Thank you, {name}! Abeg check your order well:\n\n"
+            "• Email: {email}\n"
+            "• Phone: {phone}\n"
+            "• Where we go deliver: {address}\n"
+            "• Amount: {amount}\n\n"
+            "Abeg, everything correct?",
+        ],
+        "payment_confirmation": [
+            "✅ We don receive your payment of {amount} — thank you! "
+            "We don start to process your order, we go update you about delivery.",
+
+            "Thank you well well! 🎉 Your payment of {amount} don land. "
+            "We dey prepare your order now.",
+        ],
+        "payment_confirmation_no_amount": [
+            "✅ We don receive your payment — thank you! "
+            "We don start to process your order, we go update you about delivery.",
+        ],
+    },
+}
@@ -1,9 +1,6 @@
 from app.knowledge import load_documents
 
 
-
-company_info = load_documents()
-
 """
 System prompt for the AI Skincare Sales & Payment Agent.
 
@@ -11,7 +8,7 @@ This file defines the behavior, rules, tone, and boundaries of the agent.
 It should NOT contain any business logic or API calls.
 """
 
-system_message = f"""
+SYSTEM_PROMPT_TEMPLATE = """
 You are a professional AI Sales Representative for a skincare store,
 responsible for guiding customers through product selection AND secure checkout.
 
@@ -202,4 +199,16 @@ SILENCE IS THE CORRECT RESPONSE DURING PAYMENT.
 CLOSING STYLE:
 Your closing style should be supportive, reassuring, and confidence-building.
 Always aim to leave the customer feeling safe, informed, and satisfied.
-"""
\ No newline at end of file
+"""
+
+
+def build_system_message(company_info: str) -> str:
+    """
+    Fill the template with company information (full documents or retrieved chunks).
+    """
+    return SYSTEM_PROMPT_TEMPLATE.replace("{company_info}", company_info)
+
+
+company_info = load_documents()
+
+system_message = build_system_message(company_info)
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Small in-process caches.
+
+TTLCache is a bounded LRU with per-entry expiry. It can be backed by a
+SqliteCacheTier so entries survive restarts: L1 misses fall through to
+SQLite and hits are promoted back into memory.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class SqliteCacheTier:
+    def __init__(self, path: Path | str, namespace: str):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str):
+        """
+        Return (value, expires_at) or None if missing/expired.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if not row:
+            return None
+        value, expires_at = row
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(value), expires_at
+
+    def set(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO cache_entries (namespace, key, value, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE
+                SET value = excluded.value, expires_at = excluded.expires_at
+                """,
+                (self.namespace, key, json.dumps(value), expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time()),
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, persistent: SqliteCacheTier | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persistent = persistent
+        # key -> (value, expires_at), oldest first
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "persistent_hits": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self._stats["expirations"] += 1
+
+        if self.persistent is not None:
+            stored = self.persistent.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                self._store(key, value, expires_at)
+                self._stats["hits"] += 1
+                self._stats["persistent_hits"] += 1
+                return value
+
+        self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value):
+        expires_at = time.time() + self.ttl
+        self._store(key, value, expires_at)
+        if self.persistent is not None:
+            self.persistent.set(key, value, expires_at)
+
+    def _store(self, key: str, value, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def clear(self, persistent: bool = True):
+        self._entries.clear()
+        if persistent and self.persistent is not None:
+            self.persistent.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": (self._stats["hits"] / lookups) if lookups else 0.0,
+        }
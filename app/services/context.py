@@ -0,0 +1,166 @@
+"""
+Per-session model context with a token budget.
+
+Each agent turn gets a model context built from that session's memory
+history instead of one shared AssistantAgent context that accumulates every
+customer's turns. When the history exceeds the budget, the oldest turns are
+dropped and folded into a short running summary so the model still knows
+what was discussed.
+"""
+
+import logging
+from typing import List
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import AssistantMessage, LLMMessage, SystemMessage, UserMessage
+
+from app.utils.config import LLM_MODEL, CONTEXT_TOKEN_BUDGET, CONTEXT_SUMMARY_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead OpenAI adds for role/formatting
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+
+            try:
+                _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable ({e}); estimating tokens from length")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text or "") // 4 + 1
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+
+def message_tokens(message: LLMMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + _MESSAGE_OVERHEAD_TOKENS
+
+
+# Prompt tokens per call, before (full history) and after trimming
+CONTEXT_STATS = {
+    "calls": 0,
+    "tokens_before": 0,
+    "tokens_after": 0,
+    "dropped_messages": 0,
+    "last_tokens_before": 0,
+    "last_tokens_after": 0,
+}
+
+
+def context_report() -> dict:
+    calls = CONTEXT_STATS["calls"]
+    return {
+        **CONTEXT_STATS,
+        "budget": CONTEXT_TOKEN_BUDGET,
+        "avg_tokens_before": (CONTEXT_STATS["tokens_before"] / calls) if calls else 0.0,
+        "avg_tokens_after": (CONTEXT_STATS["tokens_after"] / calls) if calls else 0.0,
+    }
+
+
+def _summarize(dropped: List[LLMMessage], max_tokens: int) -> str | None:
+    """
+    Cheap extractive summary of dropped turns: the customer's earlier messages,
+    most recent first, until the summary budget is used.
+    """
+    lines = []
+    used = count_tokens("Earlier in this conversation the customer said:")
+    for message in reversed(dropped):
+        if not isinstance(message, UserMessage) or not isinstance(message.content, str):
+            continue
+        line = f'- "{message.content.strip()[:200]}"'
+        cost = count_tokens(line)
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    return "Earlier in this conversation the customer said:\n" + "\n".join(reversed(lines))
+
+
+class TokenBudgetChatCompletionContext(ChatCompletionContext):
+    """
+    Returns the most recent messages that fit in token_budget, with older
+    turns folded into a summary system message. The newest message is always kept.
+    """
+
+    def __init__(
+        self,
+        initial_messages: List[LLMMessage] | None = None,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        summary_tokens: int = CONTEXT_SUMMARY_TOKENS,
+    ):
+        super().__init__(initial_messages)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+
+    async def get_messages(self) -> List[LLMMessage]:
+        messages = self._messages
+        costs = [message_tokens(m) for m in messages]
+        total = sum(costs)
+
+        kept_from = len(messages)
+        used = 0
+        for i in range(len(messages) - 1, -1, -1):
+            if used + costs[i] > self.token_budget and kept_from < len(messages):
+                break
+            used += costs[i]
+            kept_from = i
+
+        result = list(messages[kept_from:])
+        dropped = messages[:kept_from]
+        if dropped:
+            summary = _summarize(dropped, self.summary_tokens)
+            if summary:
+                summary_message = SystemMessage(content=summary)
+                result.insert(0, summary_message)
+                used += message_tokens(summary_message)
+
+        CONTEXT_STATS["calls"] += 1
+        CONTEXT_STATS["tokens_before"] += total
+        CONTEXT_STATS["tokens_after"] += used
+        CONTEXT_STATS["dropped_messages"] += len(dropped)
+        CONTEXT_STATS["last_tokens_before"] = total
+        CONTEXT_STATS["last_tokens_after"] = used
+        return result
+
+
+def build_session_context(history, pending_task: str | None = None) -> TokenBudgetChatCompletionContext:
+    """
+    Convert memory Messages into LLM messages. If the last stored user
+    message(s) are the task about to be run (one message, or a debounced
+    burst joined by newlines), they are left out (the agent adds the task itself).
+    """
+    history = list(history)
+    if pending_task is not None:
+        trailing = 0
+        while trailing < len(history) and history[-1 - trailing].role == "user":
+            trailing += 1
+            if "\n".join(m.content for m in history[-trailing:]) == pending_task:
+                history = history[:-trailing]
+                break
+
+    messages: List[LLMMessage] = []
+    for message in history:
+        if message.role == "assistant":
+            messages.append(AssistantMessage(content=message.content, source="assistant"))
+        else:
+            messages.append(UserMessage(content=message.content, source="user"))
+    return TokenBudgetChatCompletionContext(messages)
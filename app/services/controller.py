@@ -7,7 +7,7 @@ from app.services.storage import (
 )
 
 
-def handle_intent_action(
+async def handle_intent_action(
     intent: str,
     user_data: dict | None = None
 ) -> dict:
@@ -58,7 +58,7 @@ def handle_intent_action(
 
         order_id = create_order(customer_id, amount)
 
-        payment_data = initialize_payment(
+        payment_data = await initialize_payment(
             email=email,
             amount=amount * 100,  # convert to kobo
             order_id=str(order_id)
@@ -90,7 +90,7 @@ def handle_intent_action(
         if not reference or not order_id:
             return result
 
-        payment_status = verify_payment(reference)
+        payment_status = await verify_payment(reference)
 
         create_payment(
             order_id=order_id,
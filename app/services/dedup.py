@@ -0,0 +1,170 @@
+"""
+De-duplication of Telegram updates by update_id.
+
+Telegram redelivers an update when our webhook is slow to answer. Seen ids
+are kept in a bounded, time-windowed in-memory set; optionally they are also
+recorded in SQLite (INSERT OR IGNORE on a primary key) so duplicates are
+caught across restarts and across worker processes.
+
+is_duplicate() only claims an id. The caller marks it done() once the update
+has been processed, or release()s it when processing failed so Telegram's
+redelivery is handled. A claim in SQLite that was never finished (the worker
+crashed) expires after claim_timeout.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from app.utils.config import (
+    TELEGRAM_DEDUP_WINDOW,
+    TELEGRAM_DEDUP_MAX_IDS,
+    TELEGRAM_DEDUP_PERSIST,
+    TELEGRAM_DEDUP_CLAIM_TIMEOUT,
+    DEDUP_DB_PATH,
+)
+
+
+class UpdateDeduplicator:
+    def __init__(
+        self,
+        window: float = TELEGRAM_DEDUP_WINDOW,
+        max_ids: int = TELEGRAM_DEDUP_MAX_IDS,
+        db_path: Path | str | None = DEDUP_DB_PATH if TELEGRAM_DEDUP_PERSIST else None,
+        claim_timeout: float = TELEGRAM_DEDUP_CLAIM_TIMEOUT,
+    ):
+        self.window = window
+        self.max_ids = max_ids
+        self.claim_timeout = claim_timeout
+        # update_id -> first seen, oldest first
+        self._seen: OrderedDict[int, float] = OrderedDict()
+        self._stats = {"checked": 0, "duplicates": 0, "evicted": 0, "done": 0, "released": 0}
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._inserts = 0
+        if db_path is not None:
+            self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS telegram_updates_seen (
+                update_id INTEGER PRIMARY KEY,
+                seen_at REAL NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(telegram_updates_seen)")}
+            if "done" not in columns:
+                # Tables created before claims: every recorded id was handled
+                self._conn.execute("ALTER TABLE telegram_updates_seen ADD COLUMN done INTEGER NOT NULL DEFAULT 1")
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        cutoff = now - self.window
+        while self._seen:
+            update_id, seen_at = next(iter(self._seen.items()))
+            if seen_at > cutoff and len(self._seen) < self.max_ids:
+                break
+            del self._seen[update_id]
+            self._stats["evicted"] += 1
+
+    def _claim_persistent(self, update_id: int, now: float) -> bool:
+        """
+        Claim update_id in SQLite; False if it is already done (inside the window)
+        or claimed by a worker within claim_timeout.
+        """
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO telegram_updates_seen (update_id, seen_at, done) VALUES (?, ?, 0)",
+                    (update_id, now),
+                )
+                if cur.rowcount == 0:
+                    cur = self._conn.execute(
+                        """
+                        UPDATE telegram_updates_seen SET seen_at = ?, done = 0
+                        WHERE update_id = ? AND (seen_at <= ? OR (done = 0 AND seen_at <= ?))
+                        """,
+                        (now, update_id, now - self.window, now - self.claim_timeout),
+                    )
+                    if cur.rowcount == 0:
+                        return False
+
+                self._inserts += 1
+                if self._inserts % 1000 == 0:
+                    self._conn.execute(
+                        "DELETE FROM telegram_updates_seen WHERE seen_at <= ?", (now - self.window,)
+                    )
+        return True
+
+    def is_duplicate(self, update_id) -> bool:
+        """
+        True if this update_id was already seen inside the window; otherwise claim it
+        (follow up with done() or release()). Updates without an id are never duplicates.
+        """
+        if update_id is None:
+            return False
+
+        now = time.time()
+        self._stats["checked"] += 1
+        self._evict(now)
+
+        if update_id in self._seen:
+            self._stats["duplicates"] += 1
+            return True
+
+        if self._conn is not None and not self._claim_persistent(update_id, now):
+            # Not remembered locally: another worker's claim may still be released
+            self._stats["duplicates"] += 1
+            return True
+
+        self._seen[update_id] = now
+        return False
+
+    def done(self, update_id):
+        """The claimed update was processed; redeliveries are duplicates from now on."""
+        if update_id is None:
+            return
+        self._stats["done"] += 1
+        if self._conn is not None:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute("UPDATE telegram_updates_seen SET done = 1 WHERE update_id = ?", (update_id,))
+
+    def release(self, update_id):
+        """Processing the claimed update failed; a redelivery will be handled."""
+        if update_id is None:
+            return
+        self._stats["released"] += 1
+        self._seen.pop(update_id, None)
+        if self._conn is not None:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM telegram_updates_seen WHERE update_id = ? AND done = 0", (update_id,)
+                    )
+
+    def release_unfinished(self) -> int:
+        """
+        Drop every unfinished claim (at poller start: it is Telegram's only consumer,
+        so claims left behind belong to a process that died before finishing them).
+        """
+        if self._conn is None:
+            return 0
+        with self._lock:
+            with self._conn:
+                return self._conn.execute("DELETE FROM telegram_updates_seen WHERE done = 0").rowcount
+
+    def stats(self) -> dict:
+        return {**self._stats, "tracked_ids": len(self._seen), "window": self.window}
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+
+update_dedup = UpdateDeduplicator()
@@ -0,0 +1,192 @@
+"""
+Single-pass extraction of customer contact details.
+
+All field patterns (email, Nigerian phone numbers, name, delivery address)
+are compiled once into one alternation, so a message is scanned a single
+time and every field match comes back with its span.
+
+Every value is captured in a lookahead: at most an introducing phrase ("my
+name is", "deliver to") is consumed, so a phone number inside an email or
+address is still found. Messages with an "@" use a variant that captures an
+email and the phone numbers starting at one position in the same match; the
+rest skip the email alternative altogether. The first-character lookaheads
+let the scanner skip most words without trying every case-insensitive keyword.
+
+extract() gives the same result as the earlier one-search-per-pattern code:
+only the first match of each pattern counts, and like those searches the
+phone, name-intro and address patterns aren't anchored to word boundaries
+("x08031234567" is a phone number).
+"""
+
+import re
+from typing import NamedTuple
+
+FIELDS = ("name", "email", "phone", "address")
+
+_NAME_ALONE = r"(?i:\A(?=(?P<name_alone>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)$))"   # standalone name
+_EMAIL = r"(?=(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b))"
+_PHONE_INTL = r"(?=(?P<phone_intl>\+?234[789]\d{9}))"      # +234 or 234 followed by 10 digits
+_PHONE_LOCAL = r"(?=(?P<phone_local>0[789]\d{9}))"         # 0 followed by 10 digits
+_PHONE_DIGITS = r"\b(?=(?P<phone_digits>\d{11})\b)"        # 11 digits
+_NAME_INTRO = r"""
+    (?=[mMiIcCnN])(?i:(?:my\ name\ is|i'?m|i\ am|call\ me|name:)\s+
+        (?=(?P<name_intro>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)))
+"""
+_ADDRESS = r"""
+    (?=[aAdDlLrR])(?i:(?:address|deliver\ to|delivery|location|live\ at|reside)[:\s]+
+        (?=(?P<address>.{10,200})))
+"""
+
+# Texts without "@": one phone number per position is enough, since where two
+# phone patterns start together the higher-priority one always wins
+_PATTERN = re.compile(
+    rf"""
+        {_NAME_ALONE}
+      | (?=[+\d])(?:{_PHONE_INTL}|{_PHONE_LOCAL}|{_PHONE_DIGITS})
+      | {_NAME_INTRO}
+      | {_ADDRESS}
+    """,
+    re.VERBOSE,
+)
+
+# Texts with "@": an email can start where a phone number does ("2348031234567@...")
+# and both count, so every value starting at a position is captured by one match
+_PATTERN_WITH_EMAIL = re.compile(
+    rf"""
+        {_NAME_ALONE}
+      | (?=\b[A-Za-z0-9._%+-]*@|[+\d])
+        (?:\b{_EMAIL})?
+        {_PHONE_INTL}?
+        {_PHONE_LOCAL}?
+        (?:{_PHONE_DIGITS})?
+        (?(email)|(?(phone_intl)|(?(phone_local)|(?(phone_digits)|(?!)))))   # at least one of them
+      | {_NAME_INTRO}
+      | {_ADDRESS}
+    """,
+    re.VERBOSE,
+)
+
+# group name -> (field, priority); lower priority wins
+_GROUPS = {
+    "email": ("email", 0),
+    "phone_intl": ("phone", 0),
+    "phone_local": ("phone", 1),
+    "phone_digits": ("phone", 2),
+    "name_intro": ("name", 0),
+    "name_alone": ("name", 1),
+    "address": ("address", 0),
+}
+
+# Groups of the alternative that captures several values per match
+_CONTACT_GROUPS = ("email", "phone_intl", "phone_local", "phone_digits")
+
+_DIGIT_RE = re.compile(r"\d")
+_TRAILING_PUNCT_RE = re.compile(r"[.,;!?]+$")
+
+
+class FieldMatch(NamedTuple):
+    field: str
+    value: str
+    start: int
+    end: int
+    rule: str
+
+
+def _clean(field: str, value: str) -> str | None:
+    """
+    Apply the per-field validation rules; None means the match is rejected.
+    """
+    value = value.strip()
+    if field == "name":
+        if 2 <= len(value) <= 50 and not _DIGIT_RE.search(value):
+            return value
+        return None
+    if field == "address":
+        value = _TRAILING_PUNCT_RE.sub("", value)
+        if 10 <= len(value) <= 200:
+            return value
+        return None
+    return value
+
+
+class ExtractionEngine:
+    def __init__(self, pattern: re.Pattern = _PATTERN, email_pattern: re.Pattern = _PATTERN_WITH_EMAIL):
+        self.pattern = pattern
+        self.email_pattern = email_pattern
+
+    def _matches(self, text: str):
+        """
+        (rule, cleaned value or None, start) for every pattern match, in order of position.
+        """
+        text = text or ""
+        if "@" not in text:
+            for m in self.pattern.finditer(text):
+                rule = m.lastgroup
+                yield rule, _clean(_GROUPS[rule][0], m.group(rule)), m.start(rule)
+            return
+
+        for m in self.email_pattern.finditer(text):
+            rule = m.lastgroup
+            if rule in _CONTACT_GROUPS:
+                # An email and phone numbers starting at one position come back in a single match
+                for rule in _CONTACT_GROUPS:
+                    value = m.group(rule)
+                    if value is not None:
+                        yield rule, _clean(_GROUPS[rule][0], value), m.start(rule)
+            else:
+                yield rule, _clean(_GROUPS[rule][0], m.group(rule)), m.start(rule)
+
+    def scan(self, text: str) -> list[FieldMatch]:
+        """
+        Return every valid field match in text, in order of position.
+        """
+        return [
+            FieldMatch(_GROUPS[rule][0], value, start, start + len(value), rule)
+            for rule, value, start in self._matches(text)
+            if value
+        ]
+
+    def extract(self, text: str) -> dict:
+        """
+        Best value per field (None when absent), e.g. {"email": ..., "phone": ...}.
+        """
+        best = {}
+        seen = set()
+        for rule, value, _ in self._matches(text):
+            # Only a pattern's first match counts, valid or not
+            if rule in seen:
+                continue
+            seen.add(rule)
+            if not value:
+                continue
+            field, priority = _GROUPS[rule]
+            current = best.get(field)
+            if current is None or priority < current[0]:
+                best[field] = (priority, value)
+        return {field: (best[field][1] if field in best else None) for field in FIELDS}
+
+
+engine = ExtractionEngine()
+
+
+# -----------------------------
+# Single-field helpers
+# -----------------------------
+def extract_email_from_text(text: str) -> str | None:
+    """Extract email address from text."""
+    return engine.extract(text)["email"]
+
+
+def extract_phone_from_text(text: str) -> str | None:
+    """Extract Nigerian phone number from text (+234/234/0 prefixes or 11 digits)."""
+    return engine.extract(text)["phone"]
+
+
+def extract_name_from_text(text: str) -> str | None:
+    """Extract a customer name ("my name is ...", or a message that is just a name)."""
+    return engine.extract(text)["name"]
+
+
+def extract_address_from_text(text: str) -> str | None:
+    """Extract a delivery address (keyword-based)."""
+    return engine.extract(text)["address"]
@@ -0,0 +1,104 @@
+"""
+Queued ingestion of Telegram updates.
+
+The webhook only validates and enqueues an update, then returns 200 right
+away. A pool of async workers processes the queue with strict per-chat
+serialization (one in-flight turn per chat_id) and full parallelism across
+chats.
+
+Customers often send several short messages in a row. Each chat is held
+back for a short debounce window and the burst is handed to process() as
+one batch, so it becomes a single agent turn. Updates flagged urgent
+(payment commands, checkout replies) are never held back or merged.
+"""
+
+from typing import Awaitable, Callable
+
+from app.services.workqueue import KeyedWorkQueue
+from app.utils.config import TELEGRAM_INGEST_WORKERS, TELEGRAM_DEBOUNCE_MS, TELEGRAM_DEBOUNCE_MAX_MS
+
+
+def _take_burst(pending) -> int:
+    """
+    Batch consecutive non-urgent updates from the head of a chat's queue.
+    """
+    count = 0
+    for _, (_, urgent) in pending:
+        if urgent:
+            break
+        count += 1
+    return count or 1
+
+
+class UpdateIngestor:
+    def __init__(
+        self,
+        process: Callable[[list[dict]], Awaitable],
+        get_key: Callable[[dict], object],
+        is_urgent: Callable[[dict], bool] = lambda update: False,
+        workers: int = TELEGRAM_INGEST_WORKERS,
+        debounce_ms: int = TELEGRAM_DEBOUNCE_MS,
+        debounce_max_ms: int = TELEGRAM_DEBOUNCE_MAX_MS,
+        dedup=None,
+    ):
+        """
+        process(updates) handles a burst of updates from one chat as one turn.
+        With dedup, each update's claim is marked done after processing, or
+        released if processing failed.
+        """
+        self.process = process
+        self.dedup = dedup
+        self.get_key = get_key
+        self.is_urgent = is_urgent
+        self.queue = KeyedWorkQueue(
+            "telegram-ingest",
+            self._handle,
+            workers=workers,
+            take=_take_burst,
+            linger=debounce_ms / 1000,
+            max_linger=max(debounce_ms, debounce_max_ms) / 1000,
+        )
+        self._stats = {"accepted": 0, "rejected": 0, "turns": 0, "coalesced": 0}
+
+    def submit(self, update: dict) -> bool:
+        """
+        Validate and enqueue an update. False means it is not something we process.
+        """
+        key = self.get_key(update)
+        if key is None:
+            self._stats["rejected"] += 1
+            if self.dedup is not None:
+                self.dedup.done(update.get("update_id"))
+            return False
+        urgent = self.is_urgent(update)
+        self.queue.put(key, (update, urgent), urgent=urgent)
+        self._stats["accepted"] += 1
+        return True
+
+    async def _handle(self, key, items: list[tuple[dict, bool]]):
+        self._stats["turns"] += 1
+        self._stats["coalesced"] += len(items) - 1
+        updates = [update for update, _ in items]
+        try:
+            await self.process(updates)
+        except BaseException:
+            if self.dedup is not None:
+                for update in updates:
+                    self.dedup.release(update.get("update_id"))
+            raise
+        if self.dedup is not None:
+            for update in updates:
+                self.dedup.done(update.get("update_id"))
+
+    def start(self):
+        self.queue.start()
+
+    async def join(self):
+        """Wait until every submitted update has been processed."""
+        await self.queue.join()
+
+    async def stop(self):
+        await self.queue.stop(drain=True, timeout=30.0)
+
+    def stats(self) -> dict:
+        return {**self._stats, "queue": self.queue.stats()}
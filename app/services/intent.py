@@ -1,6 +1,20 @@
-import os
-from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_core.models import SystemMessage, UserMessage
+
+from app.services.cache import TTLCache, SqliteCacheTier
+from app.services.intent_classifier import build_classifier, CHECKOUT_INTENTS
+from app.services.llm import model_clients
+from app.utils.config import (
+    INTENT_MODEL,
+    INTENT_CLASSIFIER_ENABLED,
+    INTENT_CONFIDENCE_THRESHOLD,
+    INTENT_CHECKOUT_CONFIDENCE_THRESHOLD,
+    INTENT_CACHE_SIZE,
+    INTENT_CACHE_TTL,
+    INTENT_CACHE_MAX_MESSAGE_LENGTH,
+    INTENT_CACHE_PERSIST,
+    CACHE_DB_PATH,
+)
+from app.utils.text import normalize_text
 
 
 INTENT_PROMPT = """
@@ -56,25 +70,81 @@ def quick_intent_override(text: str) -> str | None:
     return None
 
 
+# Counters for how each message was classified
+INTENT_STATS = {
+    "override": 0,
+    "rule": 0,
+    "model": 0,
+    "cache": 0,
+    "llm": 0,
+}
+
+# LLM labels keyed on the normalized message
+intent_cache = TTLCache(
+    maxsize=INTENT_CACHE_SIZE,
+    ttl=INTENT_CACHE_TTL,
+    persistent=SqliteCacheTier(CACHE_DB_PATH, namespace="intent") if INTENT_CACHE_PERSIST else None,
+)
+
+_classifier = None
+
+
+def get_classifier():
+    """Train the local classifier on first use (or at startup via warm-up)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = build_classifier()
+    return _classifier
+
+
+def intent_stats() -> dict:
+    total = sum(INTENT_STATS.values())
+    local = total - INTENT_STATS["llm"]
+    return {
+        **INTENT_STATS,
+        "total": total,
+        "local_hit_rate": (local / total) if total else 0.0,
+        "cache_tier": intent_cache.stats(),
+    }
+
+
 async def detect_intent(user_message: str) -> str:
     # ✅ 1) Try deterministic override first
     override = quick_intent_override(user_message)
     if override:
+        INTENT_STATS["override"] += 1
         return override
 
-    # ✅ 2) Fall back to LLM intent classification
-    model_client = OpenAIChatCompletionClient(
-        model="gpt-4o-mini",
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
-
-    intent_agent = AssistantAgent(
-        name="IntentDetector",
-        model_client=model_client,
-        system_message=INTENT_PROMPT,
-    )
-
-    result = await intent_agent.run(task=user_message)
-    intent = result.messages[-1].content.strip().lower()
+    # ✅ 2) Local classifier (rules + TF-IDF model) when it is confident enough
+    if INTENT_CLASSIFIER_ENABLED:
+        label, confidence, source = get_classifier().predict(user_message)
+        threshold = INTENT_CHECKOUT_CONFIDENCE_THRESHOLD if label in CHECKOUT_INTENTS else INTENT_CONFIDENCE_THRESHOLD
+        if label and confidence >= threshold:
+            INTENT_STATS[source] += 1
+            return label
+
+    # ✅ 3) Previously classified by the LLM?
+    cache_key = normalize_text(user_message)
+    cacheable = 0 < len(cache_key) <= INTENT_CACHE_MAX_MESSAGE_LENGTH
+    if cacheable:
+        cached = intent_cache.get(cache_key)
+        if cached:
+            INTENT_STATS["cache"] += 1
+            return cached
+
+    # ✅ 4) Fall back to LLM intent classification (shared pooled client, no agent state)
+    INTENT_STATS["llm"] += 1
+    model_client = model_clients.get_client(INTENT_MODEL)
+    async with model_clients.slot(INTENT_MODEL):
+        result = await model_client.create(
+            [
+                SystemMessage(content=INTENT_PROMPT),
+                UserMessage(content=user_message, source="user"),
+            ]
+        )
+    intent = str(result.content).strip().lower()
+
+    if cacheable and intent:
+        intent_cache.set(cache_key, intent)
 
     return intent
@@ -0,0 +1,164 @@
+"""
+Local intent classification tier.
+
+Two cheap stages run before the LLM classifier:
+
+1. Keyword/regex rules over the normalized message (very high precision).
+2. A small TF-IDF + multinomial logistic regression model trained at startup
+   from the labelled examples in app/data/intent_examples.jsonl.
+
+A prediction is only used when its confidence clears the configured
+threshold (a stricter one for labels that move checkout forward); otherwise
+detect_intent falls back to the LLM. Bag-of-words can't read negation, so
+negated messages ("I don't want to buy it") always go to the LLM.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+from app.utils.text import normalize_text
+
+EXAMPLES_PATH = Path(__file__).resolve().parent.parent / "data" / "intent_examples.jsonl"
+
+
+# -----------------------------
+# Rules (label, pattern over normalized text, confidence)
+# -----------------------------
+RULES = [
+    ("greeting", r"^(hi|hello|hey|hiya|howdy|yo|good (morning|afternoon|evening|day)|morning)( there)?( how are you( doing)?)?$", 0.98),
+    ("payment_confirmation", r"^(i )?(have |ve |just )?(paid|made (the )?payment|sent the money|transferred)( already)?$", 0.95),
+    ("payment_initiation", r"^(send|give me) (me )?(the )?(payment|pay now) (link|button)( please)?$", 0.97),
+    ("pricing", r"^(how much|price|prices|cost|price list)( is it| please| for (it|this|that))?$", 0.95),
+    ("pricing", r"^(how much (is|does|for|will)|what is the (price|cost)|price of|cost of)\b", 0.9),
+]
+
+
+# Labels that move a session through checkout; a wrong one costs more than an LLM call
+CHECKOUT_INTENTS = {"purchase_intent", "order_confirmation", "payment_initiation", "payment_confirmation"}
+
+# Normalized (apostrophes dropped) negations the model would ignore
+NEGATIONS = {
+    "not", "no", "nope", "never", "dont", "doesnt", "didnt", "havent", "hasnt", "hadnt",
+    "wont", "cant", "cannot", "isnt", "arent", "wasnt", "werent", "shouldnt", "wouldnt",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    words = text.split()
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    def __init__(self, epochs: int = 60, learning_rate: float = 0.5, l2: float = 1e-4):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.rules = [(label, re.compile(pattern), conf) for label, pattern, conf in RULES]
+        self.labels: list[str] = []
+        self.idf: dict[str, float] = {}
+        self.weights: dict[str, dict[str, float]] = {}
+        self.bias: dict[str, float] = {}
+
+    # -----------------------------
+    # Features
+    # -----------------------------
+    def _vectorize(self, normalized: str) -> dict[str, float]:
+        counts = Counter(t for t in _tokens(normalized) if t in self.idf)
+        vector = {t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    # -----------------------------
+    # Training
+    # -----------------------------
+    def fit(self, examples: list[tuple[str, str]]):
+        """
+        Train on (text, label) pairs with plain batch gradient descent.
+        """
+        docs = [(normalize_text(text), label) for text, label in examples]
+        self.labels = sorted({label for _, label in docs})
+
+        doc_freq = Counter()
+        for text, _ in docs:
+            doc_freq.update(set(_tokens(text)))
+        n_docs = len(docs)
+        self.idf = {t: math.log((1 + n_docs) / (1 + df)) + 1 for t, df in doc_freq.items()}
+
+        vectors = [(self._vectorize(text), label) for text, label in docs]
+        self.weights = {label: {} for label in self.labels}
+        self.bias = {label: 0.0 for label in self.labels}
+
+        for _ in range(self.epochs):
+            grad_w = {label: Counter() for label in self.labels}
+            grad_b = Counter()
+            for vector, target in vectors:
+                probs = self._probabilities(vector)
+                for label, p in probs.items():
+                    err = p - (1.0 if label == target else 0.0)
+                    grad_b[label] += err
+                    g = grad_w[label]
+                    for t, v in vector.items():
+                        g[t] += err * v
+            step = self.learning_rate * len(self.labels) / n_docs
+            for label in self.labels:
+                w = self.weights[label]
+                for t, g in grad_w[label].items():
+                    w[t] = w.get(t, 0.0) * (1 - self.l2) - step * g
+                self.bias[label] -= step * grad_b[label]
+        return self
+
+    def _probabilities(self, vector: dict[str, float]) -> dict[str, float]:
+        scores = {}
+        for label in self.labels:
+            w = self.weights[label]
+            scores[label] = self.bias[label] + sum(w.get(t, 0.0) * v for t, v in vector.items())
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        total = sum(exp.values())
+        return {label: e / total for label, e in exp.items()}
+
+    # -----------------------------
+    # Prediction
+    # -----------------------------
+    def predict(self, text: str) -> tuple[str | None, float, str]:
+        """
+        Return (label, confidence, source) where source is "rule" or "model".
+        label is None when nothing in the message is known to the model, or
+        when the message is negated.
+        """
+        normalized = normalize_text(text)
+        if NEGATIONS.intersection(normalized.split()):
+            return None, 0.0, "model"
+
+        for label, pattern, confidence in self.rules:
+            if pattern.search(normalized):
+                return label, confidence, "rule"
+
+        if not self.labels:
+            return None, 0.0, "model"
+
+        vector = self._vectorize(normalized)
+        if not vector:
+            return None, 0.0, "model"
+
+        probs = self._probabilities(vector)
+        label = max(probs, key=probs.get)
+        return label, probs[label], "model"
+
+
+def load_examples(path: Path = EXAMPLES_PATH) -> list[tuple[str, str]]:
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                examples.append((row["text"], row["label"]))
+    return examples
+
+
+def build_classifier() -> IntentClassifier:
+    return IntentClassifier().fit(load_examples())
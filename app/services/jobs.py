@@ -0,0 +1,269 @@
+"""
+Background jobs for work that must not hold up a webhook response.
+
+A job is identified by a reference (e.g. a Paystack payment reference) and
+queued on a KeyedWorkQueue, so jobs for the same key run in order and the
+worker pool is the job runner's own concurrency limit. Failed jobs are
+retried with exponential backoff up to max_attempts.
+
+Every job's outcome is recorded in the background_jobs table of the orders
+database. Submitting a reference that is already queued, running or done is
+a no-op (Paystack redelivers webhooks) and a failed one is queued again.
+
+Each unfinished job is owned by the runner that queued it. A running runner
+renews its jobs every resume_after / 3 seconds, stop() hands them back, and
+every runner periodically takes over jobs nobody owns or whose owner stopped
+renewing them more than resume_after ago (a crashed process).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, NamedTuple
+
+from app.db.database import db
+from app.services.workqueue import KeyedWorkQueue
+from app.utils.config import (
+    PAYMENT_CONFIRM_WORKERS,
+    PAYMENT_CONFIRM_MAX_ATTEMPTS,
+    PAYMENT_CONFIRM_BACKOFF,
+    JOB_RESUME_AFTER,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job(NamedTuple):
+    reference: str
+    key: str
+    args: list
+    attempt: int
+
+
+class JobRunner:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[..., Awaitable],
+        workers: int = PAYMENT_CONFIRM_WORKERS,
+        max_attempts: int = PAYMENT_CONFIRM_MAX_ATTEMPTS,
+        backoff: float = PAYMENT_CONFIRM_BACKOFF,
+        resume_after: float = JOB_RESUME_AFTER,
+        manager=db,
+    ):
+        """
+        handler(*args) runs one job; args must be JSON-serializable so jobs can be resumed.
+        """
+        self.name = name
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.resume_after = resume_after
+        self.db = manager
+        self.queue = KeyedWorkQueue(name, self._handle, workers=workers)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self._retries: set[asyncio.TimerHandle] = set()
+        self._renewer: asyncio.Task | None = None
+        self._stats = {
+            "submitted": 0,
+            "skipped": 0,
+            "resumed": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "failed": 0,
+            "run_seconds": 0.0,
+        }
+
+    # -----------------------------
+    # Outcomes
+    # -----------------------------
+    def _claim(self, reference: str, key: str, args: list) -> bool:
+        """
+        Record reference as queued; False if it is already queued, running or done.
+        """
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute("""
+                INSERT INTO background_jobs
+                    (name, reference, key, payload, status, attempts, created_at, updated_at, owner)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+                ON CONFLICT (name, reference) DO UPDATE SET
+                    key = excluded.key,
+                    payload = excluded.payload,
+                    status = excluded.status,
+                    attempts = 0,
+                    last_error = NULL,
+                    updated_at = excluded.updated_at,
+                    owner = excluded.owner
+                WHERE background_jobs.status = ?
+                RETURNING reference
+            """, (self.name, reference, key, json.dumps(args), QUEUED, now, now, self.owner, FAILED)).fetchone()
+        return row is not None
+
+    def _record(self, job: Job, status: str, error: str | None = None):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE background_jobs
+                SET status = ?, attempts = ?, last_error = ?, updated_at = ?
+                WHERE name = ? AND reference = ?
+            """, (status, job.attempt, error, time.time(), self.name, job.reference))
+
+    def outcome(self, reference: str) -> dict | None:
+        """
+        The recorded status, attempts and last error for reference.
+        """
+        row = self.db.get().execute("""
+            SELECT status, attempts, last_error, created_at, updated_at
+            FROM background_jobs WHERE name = ? AND reference = ?
+        """, (self.name, reference)).fetchone()
+        if row is None:
+            return None
+        status, attempts, last_error, created_at, updated_at = row
+        return {
+            "reference": reference,
+            "status": status,
+            "attempts": attempts,
+            "last_error": last_error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    # -----------------------------
+    # Submit / run
+    # -----------------------------
+    def submit(self, reference: str, key: str, *args) -> bool:
+        """
+        Queue handler(*args) for reference (non-blocking). False if it was already handled.
+        """
+        args = list(args)
+        if not self._claim(reference, key, args):
+            self._stats["skipped"] += 1
+            logger.info(f"{self.name}: {reference} already handled, skipping")
+            return False
+        self._stats["submitted"] += 1
+        self.queue.put(key, Job(reference, key, args, attempt=1))
+        return True
+
+    async def _handle(self, key, jobs: list[Job]):
+        for job in jobs:
+            self._record(job, RUNNING)
+            started = time.perf_counter()
+            try:
+                await self.handler(*job.args)
+            except Exception as e:
+                self._retry_or_fail(job, f"{type(e).__name__}: {e}")
+            else:
+                self._record(job, DONE)
+                self._stats["succeeded"] += 1
+            finally:
+                self._stats["run_seconds"] += time.perf_counter() - started
+
+    def _retry_or_fail(self, job: Job, error: str):
+        if job.attempt >= self.max_attempts:
+            self._record(job, FAILED, error)
+            self._stats["failed"] += 1
+            logger.error(f"{self.name}: {job.reference} failed after {job.attempt} attempts: {error}")
+            return
+
+        self._record(job, QUEUED, error)
+        self._stats["retried"] += 1
+        delay = self.backoff * 2 ** (job.attempt - 1)
+        logger.warning(f"{self.name}: {job.reference} attempt {job.attempt} failed ({error}), retrying in {delay:.1f}s")
+
+        # Wait on a timer rather than in the worker, so retries don't hold a slot
+        retry = job._replace(attempt=job.attempt + 1)
+
+        def requeue():
+            self._retries.discard(timer)
+            self.queue.put(retry.key, retry)
+
+        timer = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(timer)
+
+    def _renew(self):
+        """
+        Mark this runner's unfinished jobs as still owned by a live process.
+        """
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE background_jobs SET updated_at = ?
+                WHERE name = ? AND owner = ? AND status IN (?, ?)
+            """, (time.time(), self.name, self.owner, QUEUED, RUNNING))
+
+    def _resume(self) -> int:
+        """
+        Take over and queue unfinished jobs that no live runner owns.
+        """
+        now = time.time()
+        with self.db.transaction() as conn:
+            rows = conn.execute("""
+                UPDATE background_jobs SET status = ?, owner = ?, updated_at = ?
+                WHERE name = ? AND status IN (?, ?)
+                  AND (owner IS NULL OR (owner != ? AND updated_at < ?))
+                RETURNING reference, key, payload, attempts
+            """, (
+                QUEUED, self.owner, now, self.name, QUEUED, RUNNING, self.owner, now - self.resume_after,
+            )).fetchall()
+        for reference, key, payload, attempts in rows:
+            self.queue.put(key, Job(reference, key, json.loads(payload), attempt=attempts + 1))
+        self._stats["resumed"] += len(rows)
+        if rows:
+            logger.info(f"{self.name}: resumed {len(rows)} unfinished jobs")
+        return len(rows)
+
+    def _release(self):
+        """
+        Hand this runner's unfinished jobs back so the next runner resumes them right away.
+        """
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE background_jobs SET owner = NULL
+                WHERE name = ? AND owner = ? AND status IN (?, ?)
+            """, (self.name, self.owner, QUEUED, RUNNING))
+
+    async def _renew_forever(self):
+        while True:
+            await asyncio.sleep(self.resume_after / 3)
+            try:
+                self._renew()
+                self._resume()
+            except Exception:
+                logger.exception(f"{self.name}: renewing jobs failed")
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        self.queue.start()
+        self._resume()
+        self._renewer = asyncio.get_running_loop().create_task(self._renew_forever())
+
+    async def join(self):
+        """Wait until every queued job has run (pending retries not included)."""
+        await self.queue.join()
+
+    async def stop(self, timeout: float = 10.0):
+        if self._renewer is not None:
+            self._renewer.cancel()
+            self._renewer = None
+        # Jobs waiting to retry stay queued in the table; released, a later start resumes them
+        for timer in self._retries:
+            timer.cancel()
+        self._retries.clear()
+        await self.queue.stop(timeout=timeout)
+        self._release()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "retries_pending": len(self._retries),
+            "queue": self.queue.stats(),
+        }
@@ -0,0 +1,128 @@
+"""
+Process-wide registry of LLM model clients.
+
+Building an OpenAIChatCompletionClient per call means a new HTTP client and a
+fresh TLS handshake on every turn. The registry keeps one client per
+(model, settings) pair, backed by a keep-alive connection pool, and caps the
+number of concurrent calls per model (LLM_MODEL_CONCURRENCY, falling back
+to LLM_MAX_CONCURRENCY).
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from openai import DefaultAsyncHttpxClient
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+from app.utils.config import (
+    OPENAI_API_KEY,
+    LLM_MODEL,
+    LLM_MAX_CONCURRENCY,
+    LLM_MODEL_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_TIMEOUT,
+)
+
+
+class ModelClientRegistry:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, model_concurrency: dict | None = None):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = dict(LLM_MODEL_CONCURRENCY if model_concurrency is None else model_concurrency)
+        self._clients: dict[tuple, OpenAIChatCompletionClient] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, dict] = {}
+
+    @staticmethod
+    def _key(model: str, settings: dict) -> tuple:
+        return (model, tuple(sorted(settings.items())))
+
+    def get_client(self, model: str = LLM_MODEL, **settings) -> OpenAIChatCompletionClient:
+        """
+        Return the shared client for this model and settings, creating it on first use.
+        Extra settings (temperature, base_url, ...) are passed to the client.
+        """
+        key = self._key(model, settings)
+        client = self._clients.get(key)
+        if client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=LLM_TIMEOUT,
+            )
+            client = OpenAIChatCompletionClient(
+                model=model,
+                api_key=settings.pop("api_key", OPENAI_API_KEY),
+                http_client=http_client,
+                **settings,
+            )
+            self._clients[key] = client
+        return client
+
+    def _model_stats(self, model: str) -> dict:
+        return self._stats.setdefault(
+            model,
+            {"calls": 0, "in_flight": 0, "errors": 0, "wait_seconds": 0.0, "call_seconds": 0.0},
+        )
+
+    def concurrency(self, model: str) -> int:
+        return self.model_concurrency.get(model, self.max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self, model: str = LLM_MODEL):
+        """
+        Hold one of the model's concurrency slots for the duration of an LLM call.
+        """
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = self._semaphores[model] = asyncio.Semaphore(self.concurrency(model))
+
+        stats = self._model_stats(model)
+        queued_at = time.perf_counter()
+        async with semaphore:
+            started_at = time.perf_counter()
+            stats["wait_seconds"] += started_at - queued_at
+            stats["in_flight"] += 1
+            try:
+                yield
+            except Exception:
+                stats["errors"] += 1
+                raise
+            finally:
+                stats["in_flight"] -= 1
+                stats["calls"] += 1
+                stats["call_seconds"] += time.perf_counter() - started_at
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "max_concurrency": self.max_concurrency,
+            "models": {
+                model: {**values, "max_concurrency": self.concurrency(model)}
+                for model, values in self._stats.items()
+            },
+        }
+
+    async def startup(self):
+        """
+        Create the default client up front so the first message doesn't pay for it.
+        """
+        self.get_client(LLM_MODEL)
+
+    async def shutdown(self):
+        """
+        Close every client (and its connection pool).
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.close()
+
+
+model_clients = ModelClientRegistry()
@@ -1,35 +1,440 @@
-from typing import List, Dict
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List
+
+from app.services.profile import CustomerProfile
+from app.utils.config import (
+    MEMORY_BACKEND,
+    MEMORY_MAX_SESSIONS,
+    MEMORY_MAX_MESSAGES,
+    MEMORY_IDLE_TTL,
+    MEMORY_DB_PATH,
+    MEMORY_FLUSH_INTERVAL,
+    MEMORY_FLUSH_BATCH,
+    MEMORY_SHARED,
+    STATE_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Message:
+    """
+    One conversation turn. Slots keep this much smaller than a dict per message.
+    """
+    __slots__ = ("role", "content", "created_at")
+
+    def __init__(self, role: str, content: str, created_at: float | None = None):
+        self.role = role
+        self.content = content
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+    def size(self) -> int:
+        """Approximate bytes held by this message."""
+        return sys.getsizeof(self) + sys.getsizeof(self.content)
+
+
+class _Session:
+    __slots__ = ("messages", "profile", "last_seen", "bytes")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Message] = deque(maxlen=max_messages or None)
+        self.profile = CustomerProfile()
+        self.last_seen = time.time()
+        self.bytes = 0
 
 
 class ConversationMemory:
-    def __init__(self):
-        # Stores conversations like:
-        # { "session_id": [ {role, content}, ... ] }
-        self.sessions: Dict[str, List[Dict[str, str]]] = {}
+    def __init__(
+        self,
+        max_sessions: int = MEMORY_MAX_SESSIONS,
+        max_messages: int = MEMORY_MAX_MESSAGES,
+        idle_ttl: float = MEMORY_IDLE_TTL,
+    ):
+        # Limits (0 disables a limit)
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+
+        # session_id -> _Session, least recently used first
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "evicted_sessions": 0,
+            "expired_sessions": 0,
+            "truncated_messages": 0,
+        }
+
+    def _get_session(self, session_id: str) -> _Session | None:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self.idle_ttl and time.time() - session.last_seen > self.idle_ttl:
+            self._drop(session_id)
+            self._stats["expired_sessions"] += 1
+            return None
+        session.last_seen = time.time()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _drop(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.bytes
 
-    def get_messages(self, session_id: str) -> List[Dict[str, str]]:
+    def get_messages(self, session_id: str) -> List[Message]:
         """
         Get conversation history for a session.
         """
-        return self.sessions.get(session_id, [])
+        session = self._get_session(session_id)
+        return list(session.messages) if session else []
 
     def add_message(self, session_id: str, role: str, content: str):
         """
         Add a message to the conversation history.
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        session = self._get_session(session_id)
+        if session is None:
+            self.prune_expired()
+            session = self.sessions[session_id] = _Session(self.max_messages)
+            self._evict_over_limit()
 
-        self.sessions[session_id].append(
-            {"role": role, "content": content}
-        )
+        message = Message(role, content)
+        self._append(session, message)
+        session.profile.update(content)
+        self._persist(session_id, message)
+
+    def _persist(self, session_id: str, message: Message):
+        """
+        Hook for durable backends; the in-memory backend keeps nothing.
+        """
+
+    def _append(self, session: _Session, message: Message):
+        messages = session.messages
+        if messages.maxlen is not None and len(messages) == messages.maxlen:
+            dropped = messages[0].size()
+            session.bytes -= dropped
+            self._bytes -= dropped
+            self._stats["truncated_messages"] += 1
+
+        messages.append(message)
+        size = message.size()
+        session.bytes += size
+        self._bytes += size
+
+    def _evict_over_limit(self):
+        while self.max_sessions and len(self.sessions) > self.max_sessions:
+            session_id = next(iter(self.sessions))
+            self._drop(session_id)
+            self._stats["evicted_sessions"] += 1
+
+    def prune_expired(self) -> int:
+        """
+        Drop sessions idle for longer than idle_ttl (oldest first, stops at the first live one).
+        """
+        if not self.idle_ttl:
+            return 0
+        cutoff = time.time() - self.idle_ttl
+        expired = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            self._drop(session_id)
+            expired += 1
+        self._stats["expired_sessions"] += expired
+        return expired
+
+    def get_profile(self, session_id: str) -> CustomerProfile:
+        """
+        Get the extracted customer profile for a session (O(1), no history scan).
+        """
+        session = self._get_session(session_id)
+        return session.profile if session else CustomerProfile()
 
     def clear_session(self, session_id: str):
         """
         Clear conversation history for a session.
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self._drop(session_id)
+
+    def evict(self, session_id: str):
+        """
+        Drop a session from RAM only (durable backends keep its history).
+        """
+        self._drop(session_id)
+
+    def stats(self) -> dict:
+        """
+        Gauges for sizing workers.
+        """
+        return {
+            **self._stats,
+            "sessions": len(self.sessions),
+            "messages": sum(len(s.messages) for s in self.sessions.values()),
+            "approx_bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_messages": self.max_messages,
+            "idle_ttl": self.idle_ttl,
+        }
+
+    def start(self):
+        """Lifecycle hook (no-op for the in-memory backend)."""
+
+    def stop(self):
+        """Lifecycle hook (no-op for the in-memory backend)."""
+
+
+class SqliteConversationMemory(ConversationMemory):
+    """
+    ConversationMemory that survives restarts.
+
+    The hot set stays in RAM exactly like ConversationMemory. New messages are
+    appended to a write-behind buffer that a background thread flushes to
+    SQLite in one transaction per batch, every flush_interval seconds or as
+    soon as flush_batch messages are waiting. A session that is not in RAM
+    (after a restart, eviction or idle expiry) is loaded from SQLite on first
+    access.
+
+    With shared=True several worker processes use the same database: writes
+    go straight to SQLite, and a cached session is checked against the
+    database (newest row id) at most every revalidate_after seconds and
+    reloaded if another process has added to it.
+    """
+
+    def __init__(
+        self,
+        db_path=MEMORY_DB_PATH,
+        flush_interval: float = MEMORY_FLUSH_INTERVAL,
+        flush_batch: int = MEMORY_FLUSH_BATCH,
+        shared: bool = MEMORY_SHARED,
+        revalidate_after: float = STATE_CACHE_TTL,
+        **limits,
+    ):
+        super().__init__(**limits)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.shared = shared
+        self.revalidate_after = revalidate_after
+        # session_id -> (newest row id we hold, when that was last confirmed)
+        self._synced: dict[str, tuple[int, float]] = {}
+
+        self._db_lock = threading.Lock()
+        # Held while a batch is in flight so a lazy load never misses it
+        self._flush_lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """)
+        self._conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversation_messages_session
+        ON conversation_messages (session_id, id)
+        """)
+        self._conn.commit()
+
+        self._buffer: list[tuple] = []
+        self._buffer_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._stats.update({"loaded_sessions": 0, "flushes": 0, "flushed_messages": 0, "stale_reloads": 0})
+
+    # -----------------------------
+    # Write-behind
+    # -----------------------------
+    def _persist(self, session_id: str, message: Message):
+        if self.shared:
+            self._write_through(session_id, message)
+            return
+        with self._buffer_lock:
+            self._buffer.append((session_id, message.role, message.content, message.created_at))
+            full = len(self._buffer) >= self.flush_batch
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Write every buffered message to SQLite in a single transaction.
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            with self._db_lock:
+                with self._conn:
+                    self._conn.executemany(
+                        """
+                        INSERT INTO conversation_messages (session_id, role, content, created_at)
+                        VALUES (?, ?, ?, ?)
+                        """,
+                        batch,
+                    )
+        self._stats["flushes"] += 1
+        self._stats["flushed_messages"] += len(batch)
+        return len(batch)
+
+    def _write_through(self, session_id: str, message: Message):
+        with self._db_lock:
+            with self._conn:
+                newest = self._newest_row_id(session_id)
+                cursor = self._conn.execute(
+                    """
+                    INSERT INTO conversation_messages (session_id, role, content, created_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (session_id, message.role, message.content, message.created_at),
+                )
+        self._stats["flushed_messages"] += 1
+
+        synced = self._synced.get(session_id)
+        if newest == (synced[0] if synced else None):
+            self._synced[session_id] = (cursor.lastrowid, time.monotonic())
+        else:
+            # Another process wrote to this session too; reload on next read
+            self._synced.pop(session_id, None)
+
+    def _newest_row_id(self, session_id: str) -> int | None:
+        return self._conn.execute(
+            "SELECT MAX(id) FROM conversation_messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+    def _run_flusher(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Conversation memory flush failed")
+
+    def start(self):
+        if self._flusher is None:
+            self._stopping.clear()
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="memory-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def stop(self):
+        if self._flusher is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    # -----------------------------
+    # Lazy load
+    # -----------------------------
+    def _get_session(self, session_id: str) -> _Session | None:
+        session = super()._get_session(session_id)
+        if session is not None and self.shared and not self._is_current(session_id):
+            self._drop(session_id)
+            self._stats["stale_reloads"] += 1
+            session = None
+        if session is None:
+            session = self._load(session_id)
+        return session
+
+    def _is_current(self, session_id: str) -> bool:
+        synced = self._synced.get(session_id)
+        if synced is None:
+            return False
+        now = time.monotonic()
+        if now - synced[1] < self.revalidate_after:
+            return True
+        with self._db_lock:
+            newest = self._newest_row_id(session_id)
+        if newest != synced[0]:
+            return False
+        self._synced[session_id] = (newest, now)
+        return True
+
+    def _drop(self, session_id: str):
+        super()._drop(session_id)
+        self._synced.pop(session_id, None)
+
+    def _load(self, session_id: str) -> _Session | None:
+        limit = self.max_messages or -1
+        with self._flush_lock:
+            # Unflushed messages for this session must be on disk before we read it back
+            with self._buffer_lock:
+                pending = any(row[0] == session_id for row in self._buffer)
+            if pending:
+                self.flush()
+
+            with self._db_lock:
+                rows = self._conn.execute(
+                    """
+                    SELECT id, role, content, created_at FROM conversation_messages
+                    WHERE session_id = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                    """,
+                    (session_id, limit),
+                ).fetchall()
+        if not rows:
+            return None
+
+        session = _Session(self.max_messages)
+        for _, role, content, created_at in reversed(rows):
+            self._append(session, Message(role, content, created_at))
+            session.profile.update(content)
+
+        self.sessions[session_id] = session
+        self._synced[session_id] = (rows[0][0], time.monotonic())
+        self._stats["loaded_sessions"] += 1
+        self._evict_over_limit()
+        return session
+
+    def clear_session(self, session_id: str):
+        super().clear_session(session_id)
+        # A batch already taken by flush() would re-insert rows after the delete
+        with self._flush_lock:
+            with self._buffer_lock:
+                self._buffer = [row for row in self._buffer if row[0] != session_id]
+            with self._db_lock:
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM conversation_messages WHERE session_id = ?", (session_id,)
+                    )
+
+    def evict(self, session_id: str):
+        # Its buffered messages must be on disk for whichever process loads it next
+        self.flush()
+        super().evict(session_id)
+
+    def stats(self) -> dict:
+        with self._buffer_lock:
+            buffered = len(self._buffer)
+        return {**super().stats(), "buffered_messages": buffered}
+
+
+def create_memory() -> ConversationMemory:
+    """
+    Build the configured backend (MEMORY_BACKEND = "memory" | "sqlite").
+    """
+    if MEMORY_BACKEND == "sqlite":
+        return SqliteConversationMemory()
+    if MEMORY_BACKEND != "memory":
+        raise ValueError(f"Unknown MEMORY_BACKEND: {MEMORY_BACKEND!r}")
+    return ConversationMemory()
 
 
-memory = ConversationMemory()
+memory = create_memory()
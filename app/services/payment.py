@@ -1,58 +1,166 @@
-import os
-import requests
+"""
+Async Paystack client.
+
+Calls share one pooled httpx.AsyncClient with timeouts. Failed calls
+(network errors, timeouts, 429, 5xx) are retried a bounded number of times
+with jittered exponential backoff. Initialization retries reuse the same
+reference, so Paystack can never create two transactions for one attempt;
+if an earlier try did reach Paystack, the retry's "Duplicate Transaction
+Reference" is answered by fetching that transaction instead of failing.
+"""
+
+import asyncio
+import logging
+import random
 import uuid
 
-
-PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
-PAYSTACK_BASE_URL = "https://api.paystack.co"
-
-
-def initialize_payment(email: str, amount: int, order_id: str = None) -> dict:
+import httpx
+
+from app.utils.config import (
+    PAYSTACK_SECRET_KEY,
+    PAYSTACK_BASE_URL,
+    PAYSTACK_TIMEOUT,
+    PAYSTACK_MAX_RETRIES,
+    PAYSTACK_MAX_CONNECTIONS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Checkout page for an access_code, when a fetched transaction has no authorization_url
+CHECKOUT_URL = "https://checkout.paystack.com/{access_code}"
+
+
+class PaystackError(Exception):
+    pass
+
+
+class DuplicateReferenceError(PaystackError):
+    """A retried request was rejected because an earlier try already created the reference."""
+
+
+class PaystackClient:
+    def __init__(
+        self,
+        base_url: str = PAYSTACK_BASE_URL,
+        secret_key: str | None = PAYSTACK_SECRET_KEY,
+        timeout: float = PAYSTACK_TIMEOUT,
+        max_retries: int = PAYSTACK_MAX_RETRIES,
+        max_connections: int = PAYSTACK_MAX_CONNECTIONS,
+    ):
+        self.base_url = base_url
+        self.secret_key = secret_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.secret_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _backoff(self, attempt: int):
+        # Full jitter: a random delay up to 0.25s, 0.5s, 1s, ...
+        await asyncio.sleep(random.uniform(0, 0.25 * 2 ** attempt))
+
+    async def request(self, method: str, path: str, **kwargs) -> dict:
+        """
+        Send a request, retrying transient failures, and return the "data" field.
+        Only use for idempotent calls (GETs, or POSTs carrying a fixed reference).
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < self.max_retries:
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+
+            if response.status_code >= 400:
+                try:
+                    message = response.json().get("message")
+                except ValueError:
+                    message = response.text
+                if attempt > 0 and response.status_code == 400 and "duplicate" in str(message).lower():
+                    raise DuplicateReferenceError(f"Paystack {method} {path}: {message}")
+                raise PaystackError(f"Paystack {method} {path} failed ({response.status_code}): {message}")
+
+            return response.json()["data"]
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+paystack = PaystackClient()
+
+
+async def initialize_payment(email: str, amount: int, order_id: str = None, reference: str = None) -> dict:
     """
     Initialize a Paystack payment.
     amount: amount in kobo (₦1000 = 100000)
     order_id: optional order ID to include in metadata
+    reference: optional; generated when omitted and reused on every retry
     """
 
-    reference = str(uuid.uuid4())
-
-    url = f"{PAYSTACK_BASE_URL}/transaction/initialize"
-    headers = {
-        "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
+    reference = reference or str(uuid.uuid4())
 
     payload = {
         "email": email,
         "amount": amount,
         "reference": reference,
     }
-    
+
     if order_id:
         payload["metadata"] = {
             "order_id": order_id
         }
 
-    
+    try:
+        return await paystack.request("POST", "/transaction/initialize", json=payload)
+    except DuplicateReferenceError:
+        # An earlier try succeeded but its response was lost: reuse that transaction
+        logger.warning(f"Paystack already has reference {reference}; recovering the existing transaction")
+        return await _recover_transaction(reference, amount)
 
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
 
-    return response.json()["data"]
+async def _recover_transaction(reference: str, amount: int) -> dict:
+    transaction = await verify_payment(reference)
+    if transaction.get("amount") not in (None, amount):
+        raise PaystackError(f"Existing Paystack transaction {reference} has a different amount")
 
+    authorization_url = transaction.get("authorization_url")
+    access_code = transaction.get("access_code")
+    if not authorization_url and access_code:
+        authorization_url = CHECKOUT_URL.format(access_code=access_code)
+    if not authorization_url:
+        raise PaystackError(f"Could not recover the checkout link for Paystack reference {reference}")
 
-def verify_payment(reference: str) -> dict:
+    return {"authorization_url": authorization_url, "access_code": access_code, "reference": reference}
+
+
+async def verify_payment(reference: str) -> dict:
     """
     Verify a Paystack payment using the transaction reference.
     """
 
-    url = f"{PAYSTACK_BASE_URL}/transaction/verify/{reference}"
-    headers = {
-        "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}",
-    }
-
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-
-    return response.json()["data"]
-
+    return await paystack.request("GET", f"/transaction/verify/{reference}")
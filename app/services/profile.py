@@ -0,0 +1,35 @@
+"""
+Customer details extracted from a conversation.
+
+Each session keeps a CustomerProfile that is updated with every new message
+as it is added to memory, so reading the profile never rescans history.
+A field keeps the first value found for it, same as a full scan would.
+"""
+
+from app.services.extraction import FIELDS as PROFILE_FIELDS, engine
+
+
+class CustomerProfile:
+    __slots__ = PROFILE_FIELDS
+
+    def __init__(self):
+        self.name = None
+        self.email = None
+        self.phone = None
+        self.address = None
+
+    def update(self, content: str):
+        """
+        Fill any still-missing fields from one new message.
+        """
+        if self.is_complete():
+            return
+        for field, value in engine.extract(content).items():
+            if value and getattr(self, field) is None:
+                setattr(self, field, value)
+
+    def is_complete(self) -> bool:
+        return all(getattr(self, field) for field in PROFILE_FIELDS)
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in PROFILE_FIELDS}
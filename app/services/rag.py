@@ -0,0 +1,201 @@
+"""
+Lexical retrieval over app/company_data.
+
+Instead of pasting the whole catalog into every system prompt, the company
+documents are split into small chunks (one per catalog entry, one per
+paragraph elsewhere) and indexed with BM25 at startup. Each turn only the
+top-k chunks relevant to the customer's message are injected into the prompt.
+
+RAG_RETRIEVER selects "bm25", "vector" (app/services/vector_store.py) or
+"hybrid" (reciprocal rank fusion of both).
+"""
+
+import json
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+from app.knowledge import COMPANY_DATA_DIR, knowledge_version
+from app.utils.config import RAG_TOP_K, RAG_PINNED_FILES, RAG_RETRIEVER
+from app.utils.text import normalize_text
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "have", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "so",
+    "that", "the", "this", "to", "what", "which", "with", "you", "your",
+}
+
+
+class Chunk(NamedTuple):
+    id: int
+    source: str
+    text: str
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in normalize_text(text).split() if t not in STOPWORDS]
+
+
+# -----------------------------
+# Chunking
+# -----------------------------
+def _render_catalog_entry(entry: dict) -> str:
+    products = ", ".join(
+        f"{p.get('name')} (₦{p.get('price', 0):,})" for p in entry.get("recommended_products", [])
+    )
+    skin_types = ", ".join(entry.get("skin_types_affected", []))
+    return (
+        f"Skin concern: {entry.get('problem')}\n"
+        f"{entry.get('description', '')}\n"
+        f"Skin types affected: {skin_types}\n"
+        f"Recommended products: {products}"
+    )
+
+
+def _load_catalog(text: str) -> list[dict] | None:
+    """
+    product.txt is JSON with // comment lines; return its entries or None if not JSON.
+    """
+    stripped = "\n".join(line for line in text.splitlines() if not line.strip().startswith("//"))
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get("knowledge_base"), list):
+        return data["knowledge_base"]
+    return None
+
+
+def chunk_document(source: str, text: str, max_chars: int = 600) -> list[str]:
+    catalog = _load_catalog(text)
+    if catalog is not None:
+        return [_render_catalog_entry(entry) for entry in catalog]
+
+    chunks, current = [], ""
+    for paragraph in (p.strip() for p in text.split("\n\n")):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def load_chunks(data_dir: Path = COMPANY_DATA_DIR) -> list[Chunk]:
+    chunks = []
+    for file_path in sorted(data_dir.iterdir()):
+        if file_path.is_file():
+            with open(file_path, "r", encoding="utf-8") as f:
+                for text in chunk_document(file_path.name, f.read()):
+                    chunks.append(Chunk(len(chunks), file_path.name, text))
+    return chunks
+
+
+# -----------------------------
+# BM25 index
+# -----------------------------
+class BM25Index:
+    def __init__(self, chunks: list[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.lengths = []
+
+        for chunk in chunks:
+            terms = Counter(tokenize(chunk.text))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((chunk.id, tf))
+
+        n = len(chunks)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = RAG_TOP_K) -> list[tuple[Chunk, float]]:
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.chunks[doc_id], score) for doc_id, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings: list[list[Chunk]], k: int, c: int = 60) -> list[Chunk]:
+    scores: dict[int, float] = defaultdict(float)
+    by_id = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking):
+            scores[chunk.id] += 1.0 / (c + rank + 1)
+            by_id[chunk.id] = chunk
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [by_id[chunk_id] for chunk_id in ranked]
+
+
+class KnowledgeRetriever:
+    def __init__(self, chunks: list[Chunk], pinned_sources=RAG_PINNED_FILES, mode: str = RAG_RETRIEVER):
+        if mode not in ("bm25", "vector", "hybrid"):
+            raise ValueError(f"Unknown RAG_RETRIEVER: {mode!r}")
+        self.mode = mode
+        self.index = BM25Index(chunks)
+        self.vectors = None
+        if mode != "bm25":
+            from app.services.vector_store import VectorStore
+
+            self.vectors = VectorStore().build(chunks)
+        # Small always-relevant documents (store name, delivery basics)
+        self.pinned = [c for c in chunks if c.source in pinned_sources]
+
+    def _search(self, query: str, k: int) -> list[Chunk]:
+        if self.mode == "bm25":
+            return [chunk for chunk, _ in self.index.search(query, k)]
+        if self.mode == "vector":
+            return [chunk for chunk, _ in self.vectors.search(query, k)]
+        return reciprocal_rank_fusion(
+            [
+                [chunk for chunk, _ in self.index.search(query, k * 2)],
+                [chunk for chunk, _ in self.vectors.search(query, k * 2)],
+            ],
+            k,
+        )
+
+    def retrieve(self, query: str, k: int = RAG_TOP_K) -> list[Chunk]:
+        results = self._search(query, k) if query else []
+        pinned = [c for c in self.pinned if c not in results]
+        return pinned + results
+
+    def context_for(self, query: str, k: int = RAG_TOP_K) -> str:
+        """
+        Text block to inject in place of the full company information.
+        """
+        return "\n\n".join(chunk.text for chunk in self.retrieve(query, k))
+
+
+_retriever = None
+_retriever_version = None
+
+
+def get_retriever() -> KnowledgeRetriever:
+    """
+    Build the index on first use (or at startup via warm-up), and again
+    whenever company_data changes so answers never come from stale knowledge.
+    """
+    global _retriever, _retriever_version
+    version = knowledge_version()
+    if _retriever is None or version != _retriever_version:
+        _retriever = KnowledgeRetriever(load_chunks())
+        _retriever_version = version
+    return _retriever
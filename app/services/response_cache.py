@@ -0,0 +1,182 @@
+"""
+Response cache for FAQ-style answers.
+
+Product, pricing and general questions are answered from company_data
+alone, so the same question gets the same answer for every customer. Replies
+are cached in a TTLCache (optionally backed by SQLite) keyed on the
+normalized question, the intent and knowledge_version(), the content hash of
+company_data. Editing the knowledge base changes the key, so old answers are
+never served again, and the in-memory tier is dropped.
+
+Only turns that don't depend on the customer are eligible: the session is
+not in checkout and hasn't already discussed products (a later question is
+read against that conversation), and the message carries no contact
+details, doesn't talk about the customer ("for my skin", "which is better
+for me") and doesn't refer back to earlier messages ("how much is it?").
+Cached answers are generated without session history
+(run_agent(..., personal=False)).
+"""
+
+import hashlib
+import logging
+import time
+
+from app.knowledge import knowledge_version
+from app.services.cache import TTLCache, SqliteCacheTier
+from app.services.extraction import engine
+from app.services.state import session_states, COLLECTING
+from app.utils.config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_INTENTS,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_MAX_QUESTION_LENGTH,
+    RESPONSE_CACHE_PERSIST,
+    RESPONSE_CACHE_SESSIONS,
+    CACHE_DB_PATH,
+)
+from app.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Words that make a question depend on what was said before
+FOLLOW_UP_WORDS = {
+    "it", "its", "itll", "that", "this", "those", "these", "they", "them", "their",
+    "one", "ones", "same", "above", "previous", "last", "else", "more", "also",
+}
+
+# Words that make a question about the customer ("what do you recommend for my skin")
+PERSONAL_WORDS = {
+    "i", "im", "ive", "id", "ill", "me", "my", "mine", "myself",
+    "we", "us", "our", "ours", "ourselves",
+}
+
+# After one of these turns, later questions in the session depend on the conversation
+DISCUSSION_INTENTS = {"product_inquiry", "pricing"}
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+        intents=RESPONSE_CACHE_INTENTS,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        max_question_length: int = RESPONSE_CACHE_MAX_QUESTION_LENGTH,
+        persistent: SqliteCacheTier | None = None,
+        sessions: TTLCache | None = None,
+    ):
+        self.enabled = enabled
+        self.intents = set(intents)
+        self.max_question_length = max_question_length
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, persistent=persistent)
+        # session_id -> True once it has asked about products
+        self.discussed = sessions if sessions is not None else TTLCache(maxsize=RESPONSE_CACHE_SESSIONS, ttl=ttl)
+        self._version = None
+        self._stats = {
+            "eligible": 0,
+            "ineligible": 0,
+            "invalidations": 0,
+            "generated": 0,
+            "generate_seconds": 0.0,
+            "saved_seconds": 0.0,
+        }
+
+    def eligible(self, session_id: str, message: str, intent: str) -> str | None:
+        """
+        The normalized question if this turn's reply can be shared, else None.
+        """
+        if not self.enabled or intent not in self.intents:
+            return None
+        question = normalize_text(message)
+        words = question.split()
+        state = session_states.get(session_id)
+        if (
+            not 0 < len(question) <= self.max_question_length
+            or state.stage != COLLECTING
+            or state.payment_locked
+            or FOLLOW_UP_WORDS.intersection(words)
+            or PERSONAL_WORDS.intersection(words)
+            or self.discussed.get(session_id)
+            # Any plain question also matches the standalone-name rule; don't count that one
+            or any(match.rule != "name_alone" for match in engine.scan(message))
+        ):
+            self._stats["ineligible"] += 1
+            return None
+        self._stats["eligible"] += 1
+        return question
+
+    def note_turn(self, session_id: str, intent: str):
+        """
+        Record that session_id has discussed products; its later questions aren't shared.
+        """
+        if self.enabled and intent in DISCUSSION_INTENTS:
+            self.discussed.set(session_id, True)
+
+    def _key(self, question: str, intent: str) -> str:
+        version = knowledge_version()
+        if version != self._version:
+            if self._version is not None:
+                # Old keys can't match any more; free the memory they hold (SQLite rows just expire)
+                self.cache.clear(persistent=False)
+                self._stats["invalidations"] += 1
+                logger.info(f"Knowledge changed ({self._version} -> {version}); response cache invalidated")
+            self._version = version
+        digest = hashlib.sha256(question.encode("utf-8")).hexdigest()[:24]
+        return f"{version}:{intent}:{digest}"
+
+    def get(self, question: str, intent: str) -> str | None:
+        reply = self.cache.get(self._key(question, intent))
+        if reply is not None:
+            self._stats["saved_seconds"] += self.average_generate_seconds()
+        return reply
+
+    def set(self, question: str, intent: str, reply: str, generate_seconds: float):
+        self._stats["generated"] += 1
+        self._stats["generate_seconds"] += generate_seconds
+        if reply:
+            self.cache.set(self._key(question, intent), reply)
+
+    def average_generate_seconds(self) -> float:
+        generated = self._stats["generated"]
+        return (self._stats["generate_seconds"] / generated) if generated else 0.0
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "enabled": self.enabled,
+            "knowledge_version": self._version,
+            "avg_generate_seconds": self.average_generate_seconds(),
+            "discussed_sessions": len(self.discussed),
+            "cache": self.cache.stats(),
+        }
+
+
+response_cache = ResponseCache(
+    persistent=SqliteCacheTier(CACHE_DB_PATH, namespace="responses") if RESPONSE_CACHE_PERSIST else None,
+    # Shared with the other workers too, so a session's next turn there isn't served a stock answer
+    sessions=TTLCache(
+        maxsize=RESPONSE_CACHE_SESSIONS,
+        ttl=RESPONSE_CACHE_TTL,
+        persistent=SqliteCacheTier(CACHE_DB_PATH, namespace="response-sessions"),
+    ) if RESPONSE_CACHE_PERSIST else None,
+)
+
+
+async def cached_reply(session_id: str, message: str, intent: str, generate) -> str:
+    """
+    generate(personal) -> reply. Serves eligible turns from the cache.
+    """
+    question = response_cache.eligible(session_id, message, intent)
+    response_cache.note_turn(session_id, intent)
+    if question is None:
+        return await generate(personal=True)
+
+    reply = response_cache.get(question, intent)
+    if reply is not None:
+        return reply
+
+    started = time.perf_counter()
+    reply = await generate(personal=False)
+    response_cache.set(question, intent, reply, time.perf_counter() - started)
+    return reply
@@ -0,0 +1,437 @@
+"""
+Session-affinity sharding of Telegram chats across worker processes.
+
+In TELEGRAM_INGESTION_MODE = "sharded" the web process only routes: each
+update goes to the worker process that owns its chat, picked with a jump
+consistent hash of the chat_id. Every worker runs its own event loop, agent,
+ConversationMemory and outbound dispatcher, so one chat's turns always run in
+one process (per-chat order, hot memory) and CPU-bound work (extraction,
+retrieval, JSON) spreads over cores without cross-process locks.
+
+A worker that dies is respawned in its slot, by a check every
+SHARD_HEALTH_INTERVAL seconds and before anything is routed to it. Messages
+it hadn't read yet are lost (and logged); payment confirmations routed to it
+fail right away, so their job retries instead of timing out.
+
+The app runs SHARD_WORKERS workers for its lifetime. resize(n), used by
+benchmarks/bench_sharding.py, rebalances a running executor: routing pauses,
+every worker drains its queue, flushes and evicts the sessions it no longer
+owns, then workers are added or removed and routing resumes. Jump hashing
+moves only ~1/n of the chats. Moved chats keep their history and checkout
+state only with the SQLite memory and state backends.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import queue
+import time
+from collections import deque
+
+from app.bot import (
+    deliver_payment_confirmation,
+    get_update_chat_id,
+    is_urgent_update,
+    process_telegram_updates,
+)
+from app.services.ingestion import UpdateIngestor
+from app.utils.config import (
+    SHARD_WORKERS,
+    SHARD_HEALTH_INTERVAL,
+    MEMORY_BACKEND,
+    STATE_BACKEND,
+    TELEGRAM_GLOBAL_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Routing
+# -----------------------------
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): bucket in [0, buckets) for a 64-bit key.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(session_id, shards: int) -> int:
+    """
+    Shard owning a chat; chat_id 42 and session_id "42" map to the same shard.
+    """
+    digest = hashlib.blake2b(str(session_id).encode("utf-8"), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), shards)
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+class AgentShardRuntime:
+    """
+    What a shard worker runs: the sales agent and the services it needs.
+    """
+
+    async def start(self, index: int, count: int):
+        from app.agent import create_sales_agent
+        from app.services.intent import get_classifier
+        from app.services.llm import model_clients
+        from app.services.memory import memory
+        from app.services.rag import get_retriever
+        from app.services.telegram_dispatcher import dispatcher
+
+        await model_clients.startup()
+        get_classifier()
+        get_retriever()
+        memory.start()
+        dispatcher.start()
+        self._share_rate_limit(count)
+        self.agent = create_sales_agent()
+
+    def is_urgent(self, update: dict) -> bool:
+        return is_urgent_update(update)
+
+    async def process(self, updates: list[dict]):
+        await process_telegram_updates(self.agent, updates)
+
+    def reset_session(self, session_id: str):
+        from app.services.state import session_states
+
+        session_states.reset(session_id)
+
+    async def confirm_payment(self, session_id: str, amount):
+        await deliver_payment_confirmation(self.agent, session_id, amount)
+
+    def rebalance(self, index: int, count: int) -> int:
+        """
+        Evict sessions this worker no longer owns; returns how many moved.
+        """
+        from app.services.memory import memory
+
+        moved = [sid for sid in list(memory.sessions) if shard_for(sid, count) != index]
+        for session_id in moved:
+            memory.evict(session_id)
+        self._share_rate_limit(count)
+        return len(moved)
+
+    def _share_rate_limit(self, count: int):
+        # Telegram's global limit is per bot, so each worker gets a slice of it
+        from app.services.telegram_dispatcher import dispatcher, TokenBucket
+
+        rate = TELEGRAM_GLOBAL_RATE / count
+        dispatcher.global_bucket = TokenBucket(rate, burst=max(rate, 1.0))
+
+    async def stop(self):
+        from app.services.llm import model_clients
+        from app.services.memory import memory
+        from app.services.payment import paystack
+        from app.services.state import session_states
+        from app.services.telegram import telegram
+        from app.services.telegram_dispatcher import dispatcher
+
+        await dispatcher.stop()
+        await model_clients.shutdown()
+        await telegram.close()
+        await paystack.close()
+        memory.stop()
+        session_states.close()
+
+
+async def _confirm_payment(runtime, outbox, job_id: int, session_id: str, amount):
+    """Run a payment confirmation and report the outcome to the front."""
+    try:
+        await runtime.confirm_payment(session_id, amount)
+    except Exception as e:
+        logger.exception(f"Payment confirmation failed for session {session_id}")
+        outbox.put(("payment_result", job_id, f"{type(e).__name__}: {e}"))
+    else:
+        outbox.put(("payment_result", job_id, None))
+
+
+async def _serve_shard(index: int, count: int, inbox, outbox, runtime):
+    loop = asyncio.get_running_loop()
+    await runtime.start(index, count)
+    ingestor = UpdateIngestor(process=runtime.process, get_key=get_update_chat_id, is_urgent=runtime.is_urgent)
+    ingestor.start()
+    outbox.put(("ready", index))
+    jobs: set[asyncio.Task] = set()
+    try:
+        while True:
+            message = await loop.run_in_executor(None, inbox.get)
+            kind = message[0]
+            if kind == "update":
+                ingestor.submit(message[1])
+            elif kind == "reset":
+                runtime.reset_session(message[1])
+            elif kind == "payment_confirmed":
+                job = asyncio.create_task(_confirm_payment(runtime, outbox, *message[1:]))
+                jobs.add(job)
+                job.add_done_callback(jobs.discard)
+            elif kind == "rebalance":
+                count = message[1]
+                await ingestor.join()
+                await asyncio.gather(*jobs, return_exceptions=True)
+                outbox.put(("rebalanced", index, runtime.rebalance(index, count)))
+            elif kind == "stop":
+                break
+    finally:
+        await ingestor.stop()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        await runtime.stop()
+        outbox.put(("stopped", index, ingestor.stats()))
+
+
+def _shard_main(index: int, count: int, inbox, outbox, runtime_cls):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve_shard(index, count, inbox, outbox, runtime_cls()))
+
+
+# -----------------------------
+# Front (web process) side
+# -----------------------------
+class ShardJobError(Exception):
+    """A job run in a shard worker failed there."""
+
+
+class ShardedExecutor:
+    def __init__(
+        self,
+        workers: int = SHARD_WORKERS,
+        runtime_cls=AgentShardRuntime,
+        health_interval: float = SHARD_HEALTH_INTERVAL,
+    ):
+        self.count = max(1, workers)
+        self.runtime_cls = runtime_cls
+        self.health_interval = health_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._outbox = self._ctx.Queue()
+        self._inboxes: list = []
+        self._processes: list = []
+        # Messages that arrive while a resize is in progress
+        self._held: deque | None = None
+        self._stats = {"routed": 0, "rejected": 0, "resizes": 0, "moved_sessions": 0, "restarts": 0}
+        self._routed_per_shard: list[int] = []
+        # One task reads the shared outbox: job results go to their waiting
+        # future, everything else (ready/rebalanced/stopped acks) to _replies
+        self._reader: asyncio.Task | None = None
+        self._replies: asyncio.Queue | None = None
+        self._results: dict[int, asyncio.Future] = {}
+        self._result_shards: dict[int, int] = {}
+        self._job_ids = itertools.count()
+        self._monitor: asyncio.Task | None = None
+
+    def _spawn(self, index: int):
+        inbox = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_shard_main,
+            args=(index, self.count, inbox, self._outbox, self.runtime_cls),
+            name=f"shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        if index < len(self._processes):
+            self._inboxes[index] = inbox
+            self._processes[index] = process
+        else:
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+            self._routed_per_shard.append(0)
+
+    def start(self):
+        if not self._processes:
+            loop = asyncio.get_running_loop()
+            self._replies = asyncio.Queue()
+            self._reader = loop.create_task(self._read_outbox())
+            for index in range(self.count):
+                self._spawn(index)
+            self._monitor = loop.create_task(self._watch())
+
+    # -----------------------------
+    # Health
+    # -----------------------------
+    def _ensure_alive(self, index: int):
+        """
+        Respawn shard index if its process has died, failing the confirmations
+        routed to it so their jobs retry.
+        """
+        process = self._processes[index]
+        if process.is_alive():
+            return
+        # The dead worker may hold the inbox's read lock, so what it hadn't read is gone
+        try:
+            lost = self._inboxes[index].qsize()
+        except NotImplementedError:
+            lost = "unknown"
+        logger.error(
+            f"Shard {index} died (exit code {process.exitcode}); restarting it. "
+            f"Unread messages lost: {lost}"
+        )
+        self._spawn(index)
+        self._stats["restarts"] += 1
+        for job_id, shard in list(self._result_shards.items()):
+            if shard == index:
+                self._fail_job(job_id, f"shard {index} died")
+
+    def _fail_job(self, job_id: int, error: str):
+        self._result_shards.pop(job_id, None)
+        future = self._results.pop(job_id, None)
+        if future is not None and not future.done():
+            future.set_result(error)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            # A resize stops workers on purpose
+            if self._held is not None:
+                continue
+            for index in range(len(self._processes)):
+                try:
+                    self._ensure_alive(index)
+                except Exception:
+                    logger.exception(f"Restarting shard {index} failed")
+
+    async def _read_outbox(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                reply = await loop.run_in_executor(None, self._outbox.get, True, 1.0)
+            except queue.Empty:
+                continue
+            if reply[0] == "payment_result":
+                _, job_id, error = reply
+                self._result_shards.pop(job_id, None)
+                future = self._results.pop(job_id, None)
+                if future is not None and not future.done():
+                    future.set_result(error)
+            else:
+                self._replies.put_nowait(reply)
+
+    async def wait_ready(self, timeout: float = 120.0):
+        """Wait until every worker has started its services."""
+        await self._collect("ready", len(self._processes), timeout)
+
+    def _route(self, session_id, message: tuple):
+        if self._held is not None:
+            self._held.append((session_id, message))
+            return
+        shard = shard_for(session_id, self.count)
+        self._ensure_alive(shard)
+        self._inboxes[shard].put(message)
+        self._routed_per_shard[shard] += 1
+        self._stats["routed"] += 1
+        if message[0] == "payment_confirmed":
+            self._result_shards[message[1]] = shard
+
+    def submit(self, update: dict) -> bool:
+        """
+        Route an update to its chat's worker. False means it is not something we process.
+        """
+        chat_id = get_update_chat_id(update)
+        if chat_id is None:
+            self._stats["rejected"] += 1
+            return False
+        self._route(chat_id, ("update", update))
+        return True
+
+    def reset_session(self, session_id: str):
+        """Have the session's owner unlock it (charge.success)."""
+        self._route(session_id, ("reset", session_id))
+
+    async def confirm_payment(self, session_id: str, amount, timeout: float = 120.0):
+        """
+        Have the session's owner send the payment confirmation and wait for the
+        outcome; raises ShardJobError if it failed in the worker.
+        """
+        job_id = next(self._job_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._results[job_id] = future
+        try:
+            self._route(session_id, ("payment_confirmed", job_id, session_id, amount))
+            error = await asyncio.wait_for(future, timeout)
+        finally:
+            self._results.pop(job_id, None)
+            self._result_shards.pop(job_id, None)
+        if error is not None:
+            raise ShardJobError(error)
+
+    async def _collect(self, kind: str, expected: int, timeout: float = 60.0) -> list[tuple]:
+        deadline = time.monotonic() + timeout
+        replies = []
+        while len(replies) < expected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"only {len(replies)} of {expected} shards answered {kind!r}")
+            try:
+                reply = await asyncio.wait_for(self._replies.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if reply[0] == kind:
+                replies.append(reply)
+        return replies
+
+    async def resize(self, workers: int):
+        """
+        Change the number of shards, moving only the chats whose owner changes.
+        """
+        workers = max(1, workers)
+        if workers == self.count:
+            return
+        if MEMORY_BACKEND != "sqlite" or STATE_BACKEND != "sqlite":
+            logger.warning("Resizing shards without SQLite memory/state: moved chats lose their history")
+
+        self._held = deque()
+        try:
+            for inbox in self._inboxes:
+                inbox.put(("rebalance", workers))
+            replies = await self._collect("rebalanced", len(self._inboxes))
+            self._stats["moved_sessions"] += sum(moved for _, _, moved in replies)
+
+            while len(self._processes) > workers:
+                self._inboxes[-1].put(("stop",))
+                await self._collect("stopped", 1)
+                self._processes.pop().join(timeout=10)
+                self._inboxes.pop()
+                self._routed_per_shard.pop()
+            self.count = workers
+            while len(self._processes) < workers:
+                self._spawn(len(self._processes))
+            self._stats["resizes"] += 1
+        finally:
+            held, self._held = self._held, None
+            for session_id, message in held:
+                self._route(session_id, message)
+
+    async def stop(self, timeout: float = 30.0):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        try:
+            await self._collect("stopped", len(self._processes), timeout)
+        except TimeoutError as e:
+            logger.warning(f"Shard shutdown: {e}")
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes, self._inboxes, self._routed_per_shard = [], [], []
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "workers": self.count,
+            "alive": sum(p.is_alive() for p in self._processes),
+            "routed_per_shard": list(self._routed_per_shard),
+            "holding": len(self._held) if self._held is not None else 0,
+        }
@@ -0,0 +1,222 @@
+"""
+Per-session checkout state (stage, payment lock, payment URL).
+
+Kept behind a store interface rather than in module-level dicts so it can
+be shared by several worker processes. Every write is an atomic
+compare-and-set, so two workers can never both move a session forward
+(e.g. both create a payment link).
+
+STATE_BACKEND selects "memory" (single process, the default) or "sqlite"
+(WAL database shared by every process on the box). The SQLite store keeps a
+short in-process read cache (STATE_CACHE_TTL); writes always go to the database.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+from app.utils.config import STATE_BACKEND, STATE_DB_PATH, STATE_CACHE_TTL
+
+COLLECTING = "COLLECTING"
+AWAITING_CONFIRMATION = "AWAITING_CONFIRMATION"
+AWAITING_PAYMENT = "AWAITING_PAYMENT"
+
+
+class SessionState(NamedTuple):
+    stage: str = COLLECTING
+    payment_locked: bool = False      # checkout in progress, no AI chatter
+    payment_url: str | None = None
+
+
+DEFAULT_STATE = SessionState()
+
+
+class StateStore(ABC):
+    """
+    Interface; backends implement get(), _compare_and_set() and reset().
+    """
+
+    def __init__(self):
+        self._stats = {"reads": 0, "cache_hits": 0, "writes": 0, "conflicts": 0}
+
+    @abstractmethod
+    def get(self, session_id: str, fresh: bool = False) -> SessionState:
+        """
+        Current state (DEFAULT_STATE for unknown sessions). fresh=True bypasses any read cache.
+        """
+
+    @abstractmethod
+    def _compare_and_set(self, session_id: str, expected: dict, changes: dict) -> bool:
+        """
+        Apply changes only if every field in expected still has that value.
+        """
+
+    @abstractmethod
+    def reset(self, session_id: str):
+        """Forget a session (back to COLLECTING, unlocked)."""
+
+    def _cas(self, session_id: str, expected: dict, changes: dict) -> bool:
+        ok = self._compare_and_set(session_id, expected, changes)
+        self._stats["writes" if ok else "conflicts"] += 1
+        return ok
+
+    # -----------------------------
+    # Transitions
+    # -----------------------------
+    def transition(self, session_id: str, to_stage: str, from_stage: str | None = None) -> bool:
+        """
+        Move to to_stage; with from_stage, only if the session is still in it.
+        """
+        expected = {"stage": from_stage} if from_stage is not None else {}
+        return self._cas(session_id, expected, {"stage": to_stage})
+
+    def lock_payment(self, session_id: str) -> bool:
+        """
+        Enter checkout. False if another turn/worker already holds the lock.
+        """
+        return self._cas(session_id, {"payment_locked": False}, {"payment_locked": True, "payment_url": None})
+
+    def set_payment_url(self, session_id: str, payment_url: str) -> bool:
+        return self._cas(session_id, {"payment_locked": True}, {"payment_url": payment_url})
+
+    def unlock_payment(self, session_id: str) -> bool:
+        return self._cas(session_id, {}, {"payment_locked": False, "payment_url": None})
+
+    def stats(self) -> dict:
+        reads = self._stats["reads"]
+        return {
+            **self._stats,
+            "backend": type(self).__name__,
+            "cache_hit_rate": (self._stats["cache_hits"] / reads) if reads else 0.0,
+        }
+
+    def close(self):
+        """Lifecycle hook (no-op for the in-memory backend)."""
+
+
+class MemoryStateStore(StateStore):
+    """Single-process store: a dict behind a lock."""
+
+    def __init__(self):
+        super().__init__()
+        self._states: dict[str, SessionState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, fresh: bool = False) -> SessionState:
+        self._stats["reads"] += 1
+        return self._states.get(session_id, DEFAULT_STATE)
+
+    def _compare_and_set(self, session_id: str, expected: dict, changes: dict) -> bool:
+        with self._lock:
+            current = self._states.get(session_id, DEFAULT_STATE)
+            if any(getattr(current, field) != value for field, value in expected.items()):
+                return False
+            self._states[session_id] = current._replace(**changes)
+            return True
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+
+class SqliteStateStore(StateStore):
+    """
+    Store shared across processes through one SQLite (WAL) database.
+    Compare-and-set is a single conditional UPDATE, which SQLite serializes.
+    """
+
+    def __init__(self, db_path=STATE_DB_PATH, cache_ttl: float = STATE_CACHE_TTL):
+        super().__init__()
+        self.db_path = str(db_path)
+        self.cache_ttl = cache_ttl
+        self._cache: dict[str, tuple[float, SessionState]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Connect lazily and per process: a connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                stage TEXT NOT NULL DEFAULT 'COLLECTING',
+                payment_locked INTEGER NOT NULL DEFAULT 0,
+                payment_url TEXT,
+                updated_at REAL NOT NULL
+            )
+            """)
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, session_id: str, fresh: bool = False) -> SessionState:
+        self._stats["reads"] += 1
+        now = time.monotonic()
+        if not fresh:
+            cached = self._cache.get(session_id)
+            if cached is not None and cached[0] > now:
+                self._stats["cache_hits"] += 1
+                return cached[1]
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT stage, payment_locked, payment_url FROM session_state WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        state = SessionState(row[0], bool(row[1]), row[2]) if row else DEFAULT_STATE
+
+        if self.cache_ttl > 0:
+            if len(self._cache) > 10000:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            self._cache[session_id] = (now + self.cache_ttl, state)
+        return state
+
+    def _compare_and_set(self, session_id: str, expected: dict, changes: dict) -> bool:
+        assignments = ", ".join(f"{field} = ?" for field in changes)
+        conditions = "".join(f" AND {field} = ?" for field in expected)
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO session_state (session_id, updated_at) VALUES (?, ?)",
+                    (session_id, time.time()),
+                )
+                cursor = self.conn.execute(
+                    f"UPDATE session_state SET {assignments}, updated_at = ? WHERE session_id = ?{conditions}",
+                    (*changes.values(), time.time(), session_id, *expected.values()),
+                )
+        self._cache.pop(session_id, None)
+        return cursor.rowcount == 1
+
+    def reset(self, session_id: str):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+        self._cache.pop(session_id, None)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_state_store() -> StateStore:
+    """
+    Build the configured backend (STATE_BACKEND = "memory" | "sqlite").
+    """
+    if STATE_BACKEND == "sqlite":
+        return SqliteStateStore()
+    if STATE_BACKEND != "memory":
+        raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND!r}")
+    return MemoryStateStore()
+
+
+session_states = create_state_store()
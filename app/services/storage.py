@@ -1,60 +1,53 @@
-from app.db.database import get_connection
+from typing import NamedTuple
 
+from app.db.database import db
 
-def create_customer(session_id, email, name=None, phone=None, address=None):
-    conn = get_connection()
-    cur = conn.cursor()
 
-    cur.execute("""
-        INSERT INTO customers (session_id, email, name, phone, address)
-        VALUES (?, ?, ?, ?, ?)
-    """, (session_id, email, name, phone, address))
+class ChargeResult(NamedTuple):
+    order_id: int
+    session_id: str | None
 
-    conn.commit()
-    customer_id = cur.lastrowid
-    conn.close()
-    return customer_id
 
+def create_customer(session_id, email, name=None, phone=None, address=None):
+    with db.transaction() as conn:
+        cur = conn.execute("""
+            INSERT INTO customers (session_id, email, name, phone, address)
+            VALUES (?, ?, ?, ?, ?)
+        """, (session_id, email, name, phone, address))
 
-def create_order(customer_id, amount):
-    conn = get_connection()
-    cur = conn.cursor()
+    return cur.lastrowid
 
-    cur.execute("""
-        INSERT INTO orders (customer_id, amount, status)
-        VALUES (?, ?, ?)
-    """, (customer_id, amount, "pending"))
 
-    conn.commit()
-    order_id = cur.lastrowid
-    conn.close()
-    return order_id
+def create_order(customer_id, amount):
+    with db.transaction() as conn:
+        cur = conn.execute("""
+            INSERT INTO orders (customer_id, amount, status)
+            VALUES (?, ?, ?)
+        """, (customer_id, amount, "pending"))
 
+    return cur.lastrowid
 
-def mark_order_paid(order_id):
-    conn = get_connection()
-    cur = conn.cursor()
 
-    cur.execute("""
-        UPDATE orders SET status = 'paid'
-        WHERE id = ?
-    """, (order_id,))
-
-    conn.commit()
-    conn.close()
+def mark_order_paid(order_id):
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE orders SET status = 'paid'
+            WHERE id = ?
+        """, (order_id,))
 
 
 def create_payment(order_id, reference, amount, status):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO payments (order_id, reference, status, amount)
-        VALUES (?, ?, ?, ?)
-    """, (order_id, reference, status, amount))
-
-    conn.commit()
-    conn.close()
+    """
+    Record a payment; a reference that already exists (UNIQUE) gets its status/amount updated.
+    """
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO payments (order_id, reference, status, amount)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (reference) DO UPDATE SET
+                status = excluded.status,
+                amount = excluded.amount
+        """, (order_id, reference, status, amount))
 
 
 def get_session_id_by_payment_reference(reference: str) -> str | None:
@@ -62,10 +55,7 @@ def get_session_id_by_payment_reference(reference: str) -> str | None:
     Get session_id from payment reference by joining payments -> orders -> customers.
     Returns None if not found.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
+    cur = db.get().execute("""
         SELECT c.session_id
         FROM payments p
         JOIN orders o ON p.order_id = o.id
@@ -75,8 +65,6 @@ def get_session_id_by_payment_reference(reference: str) -> str | None:
     """, (reference,))
 
     result = cur.fetchone()
-    conn.close()
-
     return result[0] if result else None
 
 
@@ -85,10 +73,7 @@ def get_session_id_by_order_id(order_id: int) -> str | None:
     Get session_id from order_id by joining orders -> customers.
     Returns None if not found.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
+    cur = db.get().execute("""
         SELECT c.session_id
         FROM orders o
         JOIN customers c ON o.customer_id = c.id
@@ -97,8 +82,6 @@ def get_session_id_by_order_id(order_id: int) -> str | None:
     """, (order_id,))
 
     result = cur.fetchone()
-    conn.close()
-
     return result[0] if result else None
 
 
@@ -106,16 +89,11 @@ def payment_exists(reference: str) -> bool:
     """
     Check if a payment with the given reference already exists.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
+    cur = db.get().execute("""
         SELECT COUNT(*) FROM payments WHERE reference = ?
     """, (reference,))
 
     count = cur.fetchone()[0]
-    conn.close()
-
     return count > 0
 
 
@@ -124,16 +102,11 @@ def get_order_id_by_reference(reference: str) -> int | None:
     Get order_id from payment reference.
     Returns None if not found.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
+    cur = db.get().execute("""
         SELECT order_id FROM payments WHERE reference = ? LIMIT 1
     """, (reference,))
 
     result = cur.fetchone()
-    conn.close()
-
     return result[0] if result else None
 
 
@@ -141,12 +114,42 @@ def update_payment_status(reference: str, status: str):
     """
     Update payment status for an existing payment.
     """
-    conn = get_connection()
-    cur = conn.cursor()
+    with db.transaction() as conn:
+        conn.execute("""
+            UPDATE payments SET status = ? WHERE reference = ?
+        """, (status, reference))
 
-    cur.execute("""
-        UPDATE payments SET status = ? WHERE reference = ?
-    """, (status, reference))
 
-    conn.commit()
-    conn.close()
\ No newline at end of file
+def record_charge(reference: str, amount, status: str, order_id: int | None = None) -> ChargeResult | None:
+    """
+    Apply a Paystack charge in one transaction: upsert the payment by reference,
+    mark the order paid on success, and return the order and its session_id.
+    Without order_id the payment must already exist. Returns None if the order is unknown.
+    """
+    with db.transaction() as conn:
+        if order_id is None:
+            row = conn.execute("""
+                UPDATE payments SET status = ?, amount = COALESCE(?, amount)
+                WHERE reference = ?
+                RETURNING order_id
+            """, (status, amount, reference)).fetchone()
+        else:
+            row = conn.execute("""
+                INSERT INTO payments (order_id, reference, status, amount)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    status = excluded.status,
+                    amount = COALESCE(excluded.amount, payments.amount)
+                RETURNING order_id
+            """, (order_id, reference, status, amount)).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        row = conn.execute("""
+            UPDATE orders
+            SET status = CASE WHEN ? = 'success' THEN 'paid' ELSE status END
+            WHERE id = ?
+            RETURNING id, (SELECT c.session_id FROM customers c WHERE c.id = orders.customer_id)
+        """, (status, row[0])).fetchone()
+
+    return ChargeResult(row[0], row[1]) if row else None
@@ -1,31 +1,117 @@
-import requests
-import os
+"""
+Async Telegram Bot API client.
 
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+One pooled httpx.AsyncClient is shared by every send, with timeouts and
+retries on 429 (honoring Telegram's retry_after), 5xx, and errors raised
+before the request was sent. A read timeout or dropped connection after
+sending is not retried: sendMessage is not idempotent, so a retry could
+deliver the message twice.
+"""
 
+import asyncio
 
-def send_telegram_message(chat_id: int, text: str):
+import httpx
+
+from app.utils.config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_API_BASE,
+    TELEGRAM_TIMEOUT,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_MAX_CONNECTIONS,
+)
+
+TELEGRAM_API_URL = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}"
+
+# The request never reached Telegram, so retrying can't duplicate it
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class TelegramClient:
+    def __init__(
+        self,
+        api_url: str = TELEGRAM_API_URL,
+        timeout: float = TELEGRAM_TIMEOUT,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        max_connections: int = TELEGRAM_MAX_CONNECTIONS,
+    ):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def call(self, method: str, payload: dict | None = None, timeout: float | None = None) -> dict:
+        """
+        Call a Bot API method and return its "result".
+        """
+        url = f"{self.api_url}/{method}"
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.post(url, json=payload or {}, timeout=timeout or self.timeout)
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._retry_delay(response, attempt))
+                    attempt += 1
+                    continue
+
+            response.raise_for_status()
+            return response.json().get("result")
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        if response.status_code == 429:
+            try:
+                return float(response.json()["parameters"]["retry_after"])
+            except (ValueError, KeyError, TypeError):
+                pass
+        return 0.5 * 2 ** attempt
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+telegram = TelegramClient()
+
+
+async def send_telegram_message(chat_id: int, text: str):
     """
     Send a message back to a Telegram user.
     """
-    url = f"{TELEGRAM_API_URL}/sendMessage"
-
     payload = {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": "HTML"
     }
 
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
+    return await telegram.call("sendMessage", payload)
+
 
-def send_telegram_payment_button(chat_id: int, payment_url: str):
+async def send_telegram_payment_button(chat_id: int, payment_url: str):
     """
     Send a Pay Now button that opens the Paystack payment link.
     """
-    url = f"{TELEGRAM_API_URL}/sendMessage"
-
     payload = {
         "chat_id": chat_id,
         "text": "💳 Click the button below to complete your payment securely:",
@@ -41,6 +127,4 @@ def send_telegram_payment_button(chat_id: int, payment_url: str):
         }
     }
 
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
-
+    return await telegram.call("sendMessage", payload)
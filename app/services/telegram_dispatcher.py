@@ -0,0 +1,219 @@
+"""
+Rate-aware outbound Telegram dispatcher.
+
+Outgoing messages are queued per chat and sent by background workers that
+respect Telegram's limits with token buckets (one global, one per chat).
+Messages to one chat always go out in the order they were queued; plain
+texts queued back-to-back for the same chat are coalesced into one message.
+
+enqueue() returns a future for the send's outcome: it resolves when the
+message has gone out, or raises the error if it couldn't be sent. Callers
+that need delivery to succeed (payment confirmations) await it; everyone
+else can drop it.
+"""
+
+import asyncio
+import logging
+import time
+
+from app.services.telegram import telegram
+from app.services.workqueue import KeyedWorkQueue
+from app.utils.config import (
+    TELEGRAM_DISPATCH_WORKERS,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_CHAT_BURST,
+)
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects texts longer than this
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available. Returns seconds waited.
+        """
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+def _consume_error(future: asyncio.Future):
+    # The dispatcher already logs failures; don't warn again for callers that dropped the future
+    if not future.cancelled():
+        future.exception()
+
+
+class OutboundMessage:
+    __slots__ = ("method", "payload", "coalesce", "future")
+
+    def __init__(self, method: str, payload: dict, coalesce: bool = False):
+        self.method = method
+        self.payload = payload
+        self.coalesce = coalesce
+        self.future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(_consume_error)
+
+
+class TelegramDispatcher:
+    def __init__(
+        self,
+        client=telegram,
+        workers: int = TELEGRAM_DISPATCH_WORKERS,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+    ):
+        self.client = client
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = TokenBucket(global_rate, burst=global_rate)
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.queue = KeyedWorkQueue("telegram-dispatch", self._send, workers=workers, take=self._take)
+        self._stats = {
+            "sent": 0,
+            "failed": 0,
+            "failed_messages": 0,
+            "coalesced": 0,
+            "send_seconds": 0.0,
+            "max_send_seconds": 0.0,
+            "throttle_seconds": 0.0,
+        }
+
+    # -----------------------------
+    # Enqueue
+    # -----------------------------
+    def enqueue(self, chat_id: int, method: str, payload: dict, coalesce: bool = False) -> asyncio.Future:
+        """
+        Queue a Telegram call. The returned future resolves once it is sent or raises the send error.
+        """
+        message = OutboundMessage(method, payload, coalesce)
+        self.queue.put(chat_id, message)
+        return message.future
+
+    def enqueue_message(self, chat_id: int, text: str) -> asyncio.Future:
+        """Queue a plain text message (HTML parse mode, coalescible)."""
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
+        return self.enqueue(chat_id, "sendMessage", payload, coalesce=True)
+
+    def enqueue_payment_button(self, chat_id: int, payment_url: str) -> asyncio.Future:
+        """Queue the Pay Now button message."""
+        payload = {
+            "chat_id": chat_id,
+            "text": "💳 Click the button below to complete your payment securely:",
+            "reply_markup": {"inline_keyboard": [[{"text": "✅ Pay Now", "url": payment_url}]]},
+        }
+        return self.enqueue(chat_id, "sendMessage", payload)
+
+    async def send_message(self, chat_id: int, text: str):
+        """Queue a plain text message and wait until it is sent; raises if sending failed."""
+        await self.enqueue_message(chat_id, text)
+
+    # -----------------------------
+    # Send
+    # -----------------------------
+    @staticmethod
+    def _take(pending) -> int:
+        """
+        Batch consecutive coalescible texts from the head of a chat's queue.
+        """
+        first = pending[0][1]
+        if not first.coalesce:
+            return 1
+        count, length = 0, -2
+        for _, message in pending:
+            if not message.coalesce:
+                break
+            length += len(message.payload["text"]) + 2
+            if count and length > MAX_MESSAGE_LENGTH:
+                break
+            count += 1
+        return count
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # Drop buckets of quiet chats so the dict doesn't grow forever
+            if len(self.chat_buckets) > 10000:
+                self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_full()}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _send(self, chat_id: int, messages: list[OutboundMessage]):
+        method, payload = messages[0].method, messages[0].payload
+        if len(messages) > 1:
+            payload = {**payload, "text": "\n\n".join(m.payload["text"] for m in messages)}
+            self._stats["coalesced"] += len(messages) - 1
+
+        try:
+            waited = await self._chat_bucket(chat_id).acquire()
+            waited += await self.global_bucket.acquire()
+            self._stats["throttle_seconds"] += waited
+
+            started = time.perf_counter()
+            try:
+                await self.client.call(method, payload)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._stats["send_seconds"] += elapsed
+                self._stats["max_send_seconds"] = max(self._stats["max_send_seconds"], elapsed)
+        except asyncio.CancelledError:
+            for m in messages:
+                m.future.cancel()
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            self._stats["failed_messages"] += len(messages)
+            logger.exception(f"Failed to send Telegram {method} to chat {chat_id}")
+            for m in messages:
+                m.future.set_exception(e)
+        else:
+            self._stats["sent"] += 1
+            for m in messages:
+                m.future.set_result(None)
+
+    # -----------------------------
+    # Lifecycle / metrics
+    # -----------------------------
+    def start(self):
+        self.queue.start()
+
+    async def stop(self):
+        await self.queue.stop(drain=True)
+
+    def stats(self) -> dict:
+        attempts = self._stats["sent"] + self._stats["failed"]
+        return {
+            **self._stats,
+            "queue_depth": self.queue.depth(),
+            "avg_send_seconds": (self._stats["send_seconds"] / attempts) if attempts else 0.0,
+            "avg_throttle_seconds": (self._stats["throttle_seconds"] / attempts) if attempts else 0.0,
+            "queue": self.queue.stats(),
+        }
+
+
+dispatcher = TelegramDispatcher()
@@ -0,0 +1,107 @@
+"""
+Templated system messages.
+
+Order summaries and payment confirmations have a fixed shape, so they are
+rendered from app/prompts/messages.py instead of asking the LLM to write
+them. Every variant is parsed once at import into literal text and fields;
+rendering is a join, and successive renders of a message rotate through its
+variants so customers don't see the same sentence every time.
+"""
+
+import html
+import itertools
+import threading
+import time
+from string import Formatter
+
+from app.prompts.messages import MESSAGE_TEMPLATES
+from app.utils.config import MESSAGE_LOCALE
+
+# literal text, then (field, format_spec) or None after the last literal
+Part = tuple[str, tuple[str, str] | None]
+
+
+class MessageTemplate:
+    def __init__(self, name: str, variants: list[str]):
+        if not variants:
+            raise ValueError(f"template {name!r} has no variants")
+        self.name = name
+        self.variants = [self._compile(text) for text in variants]
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(text: str) -> list[Part]:
+        return [
+            (literal, (field, spec) if field is not None else None)
+            for literal, field, spec, _ in Formatter().parse(text)
+        ]
+
+    def render(self, values: dict, variant: int | None = None) -> str:
+        """
+        Render the next variant in rotation (or the given one). Values are HTML-escaped.
+        """
+        if variant is None:
+            with self._lock:
+                variant = next(self._rotation)
+        out = []
+        for literal, field in self.variants[variant % len(self.variants)]:
+            out.append(literal)
+            if field is not None:
+                name, spec = field
+                out.append(html.escape(format(values[name], spec), quote=False))
+        return "".join(out)
+
+
+class TemplateEngine:
+    """
+    Message templates per locale, falling back to default_locale for missing
+    locales or messages.
+    """
+
+    def __init__(self, catalog: dict = MESSAGE_TEMPLATES, default_locale: str = MESSAGE_LOCALE):
+        if default_locale not in catalog:
+            default_locale = "en"
+        self.default_locale = default_locale
+        self._templates: dict[str, dict[str, MessageTemplate]] = {}
+        self._phrases: dict[str, dict[str, str]] = {}
+        for locale, entries in catalog.items():
+            for name, entry in entries.items():
+                if isinstance(entry, str):
+                    self._phrases.setdefault(locale, {})[name] = entry
+                else:
+                    self._templates.setdefault(locale, {})[name] = MessageTemplate(name, entry)
+        self._stats = {"renders": 0, "render_seconds": 0.0}
+
+    def _lookup(self, table: dict, name: str, locale: str | None):
+        for candidate in (locale or self.default_locale, self.default_locale):
+            entry = table.get(candidate, {}).get(name)
+            if entry is not None:
+                return entry
+        raise KeyError(f"no message {name!r} for locale {locale or self.default_locale!r}")
+
+    def phrase(self, name: str, locale: str | None = None) -> str:
+        return self._lookup(self._phrases, name, locale)
+
+    def render(self, message: str, /, locale: str | None = None, variant: int | None = None, **values) -> str:
+        started = time.perf_counter()
+        template = self._lookup(self._templates, message, locale)
+        text = template.render(values, variant)
+        self._stats["renders"] += 1
+        self._stats["render_seconds"] += time.perf_counter() - started
+        return text
+
+    def stats(self) -> dict:
+        renders = self._stats["renders"]
+        return {
+            **self._stats,
+            "avg_render_us": (self._stats["render_seconds"] / renders * 1e6) if renders else 0.0,
+            "default_locale": self.default_locale,
+        }
+
+
+def format_naira(amount) -> str:
+    return f"₦{amount:,.0f}"
+
+
+messages = TemplateEngine()
@@ -0,0 +1,216 @@
+"""
+Dense-vector index over company_data chunks.
+
+Vectors live in a .npy file on disk that every process opens with
+np.load(mmap_mode="r"), so all uvicorn workers share one read-only copy via
+the OS page cache. Search is a single matrix-vector product plus top-k.
+
+The embedding function is pluggable (VECTOR_EMBEDDER = "hashing" or
+"package.module:function"); the default hashing embedder is fully local.
+Stored rows and queries are L2-normalized, so the matrix-vector product is
+cosine similarity whatever the embedder returns.
+Rebuilds are incremental: rows for chunks whose text hash is unchanged are
+copied from the previous matrix and only new/changed chunks are embedded.
+
+Each build writes its matrix to a new vectors-<version>.npy and then
+atomically replaces manifest.json, which names that file, so a reader
+always loads a manifest and matrix that belong together.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.utils.config import VECTOR_INDEX_DIR, VECTOR_EMBEDDER, VECTOR_DIM
+
+Embedder = Callable[[list[str]], np.ndarray]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row so a dot product is cosine similarity; zero rows stay zero.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words, word bigrams and character trigrams,
+    L2-normalized. Deterministic, no model download, no network.
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        words = _WORD_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return _normalize(matrix)
+
+
+def load_embedder(spec: str = VECTOR_EMBEDDER) -> Embedder:
+    """
+    "hashing" -> HashingEmbedder, otherwise "module:attribute" returning
+    a callable (list[str]) -> (n, dim) array.
+    """
+    if spec == "hashing":
+        return HashingEmbedder()
+    module_name, _, attribute = spec.partition(":")
+    embedder = getattr(importlib.import_module(module_name), attribute)
+    if isinstance(embedder, type):
+        embedder = embedder()
+    return embedder
+
+
+def _embedder_name(embedder: Embedder) -> str:
+    return getattr(embedder, "name", None) or f"{type(embedder).__module__}.{type(embedder).__qualname__}"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class VectorStore:
+    def __init__(self, index_dir: Path = VECTOR_INDEX_DIR, embedder: Embedder | None = None):
+        self.index_dir = Path(index_dir)
+        self.embedder = embedder or load_embedder()
+        self.vectors: np.ndarray | None = None
+        self.chunks: list = []
+        self.stats = {"embedded": 0, "reused": 0}
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.index_dir / "manifest.json"
+
+    def _vectors_path(self, manifest: dict) -> Path:
+        # Manifests from before versioned files point at vectors.npy
+        return self.index_dir / manifest.get("vectors", "vectors.npy")
+
+    def _read_manifest(self) -> dict | None:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def build(self, chunks: list):
+        """
+        Make the on-disk index match chunks (row i = chunks[i]) and memory-map it.
+        """
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        name = _embedder_name(self.embedder)
+        hashes = [_text_hash(chunk.text) for chunk in chunks]
+
+        manifest = self._read_manifest()
+        previous = None
+        # Indexes written before rows were normalized are rebuilt from scratch
+        if (
+            manifest
+            and manifest.get("embedder") == name
+            and manifest.get("normalized")
+            and self._vectors_path(manifest).exists()
+        ):
+            if manifest.get("hashes") == hashes:
+                self._open(manifest, chunks)
+                self.stats["reused"] += len(chunks)
+                return self
+            previous = np.load(self._vectors_path(manifest), mmap_mode="r")
+
+        old_rows = {h: i for i, h in enumerate(manifest["hashes"])} if previous is not None else {}
+        missing = [i for i, h in enumerate(hashes) if h not in old_rows]
+        embedded = _normalize(self.embedder([chunks[i].text for i in missing])) if missing else None
+
+        if embedded is not None:
+            dim = embedded.shape[1]
+        elif previous is not None:
+            dim = previous.shape[1]
+        else:
+            # No chunks and nothing to copy from: an empty index
+            dim = getattr(self.embedder, "dim", 0)
+        matrix = np.empty((len(chunks), dim), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if h in old_rows:
+                matrix[i] = previous[old_rows[h]]
+        if embedded is not None:
+            matrix[missing] = embedded
+        self.stats["embedded"] += len(missing)
+        self.stats["reused"] += len(chunks) - len(missing)
+
+        # New matrix under its own name first, then swap the manifest that points at it
+        version = hashlib.sha1(json.dumps([name, "normalized", hashes]).encode("utf-8")).hexdigest()[:16]
+        new_manifest = {
+            "embedder": name,
+            "dim": dim,
+            "normalized": True,
+            "hashes": hashes,
+            "vectors": f"vectors-{version}.npy",
+        }
+        self._atomic_write(self._vectors_path(new_manifest), lambda f: np.save(f, matrix))
+        self._atomic_write(self._manifest_path, lambda f: f.write(json.dumps(new_manifest).encode("utf-8")))
+        self._remove_stale(keep={new_manifest["vectors"], manifest.get("vectors") if manifest else None})
+        self._open(new_manifest, chunks)
+        return self
+
+    def _remove_stale(self, keep: set):
+        """
+        Delete older matrices; the one just replaced is kept for readers that
+        read the previous manifest but haven't opened its file yet.
+        """
+        for path in self.index_dir.glob("vectors*.npy"):
+            if path.name not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _atomic_write(self, path: Path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _open(self, manifest: dict, chunks: list):
+        self.vectors = np.load(self._vectors_path(manifest), mmap_mode="r")
+        self.chunks = list(chunks)
+
+    def search(self, query: str, k: int) -> list[tuple]:
+        """
+        Top-k (chunk, cosine similarity) for query.
+        """
+        if self.vectors is None or not len(self.chunks) or not query:
+            return []
+        q = _normalize(self.embedder([query])[0])
+        scores = self.vectors @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
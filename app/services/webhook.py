@@ -6,7 +6,7 @@ import hmac
 import hashlib
 import os
 import json
-from app.services.storage import mark_order_paid, create_payment
+from app.services.storage import ChargeResult, record_charge
 
 PAYSTACK_WEBHOOK_SECRET = os.getenv("PAYSTACK_SECRET_KEY")
 
@@ -24,10 +24,10 @@ def verify_paystack_signature(payload: bytes, signature: str) -> bool:
     return hmac.compare_digest(computed_hash, signature)
 
 
-def handle_paystack_event(event: dict):
+def handle_paystack_event(event: dict) -> ChargeResult | None:
     """
     Handle Paystack webhook events.
-    Returns order_id if successful, None otherwise.
+    Returns (order_id, session_id) if successful, None otherwise.
     """
 
     event_type = event.get("event")
@@ -38,36 +38,18 @@ def handle_paystack_event(event: dict):
         amount = data.get("amount")
         status = data.get("status")
 
-        metadata = data.get("metadata", {})
+        metadata = data.get("metadata") or {}
         order_id = metadata.get("order_id")
-
-        # Try to get order_id from existing payment if not in metadata
-        if not order_id:
-            from app.services.storage import get_order_id_by_reference
-            order_id = get_order_id_by_reference(reference)
-
-        if not order_id:
-            print(f"Warning: No order_id found for payment reference {reference}")
-            return None
-
-        # Check if payment already exists to avoid duplicates
-        from app.services.storage import payment_exists
-        if not payment_exists(reference):
-            # Save payment
-            create_payment(
-                order_id=order_id,
-                reference=reference,
-                amount=amount,
-                status=status
-            )
-        else:
-            # Update existing payment status
-            from app.services.storage import update_payment_status
-            update_payment_status(reference, status)
-
-        if status == "success":
-            mark_order_paid(order_id)
-        
-        return order_id
-    
-    return None
\ No newline at end of file
+        try:
+            order_id = int(order_id) if order_id else None
+        except (TypeError, ValueError):
+            order_id = None
+
+        # One transaction: upsert payment, mark order paid, resolve session.
+        # Without order_id in metadata the payment we created at checkout provides it.
+        result = record_charge(reference, amount, status, order_id=order_id)
+        if result is None:
+            print(f"Warning: No order found for payment reference {reference}")
+        return result
+
+    return None
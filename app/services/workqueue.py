@@ -0,0 +1,196 @@
+"""
+Keyed async work queue.
+
+Items are queued per key (e.g. a Telegram chat_id). A pool of worker tasks
+processes keys in parallel, but never more than one batch per key at a time,
+so per-key ordering is preserved without any locks in the handlers.
+
+With linger > 0 a key is held back until no new item has arrived for
+linger seconds (capped at max_linger after the oldest item), so bursts for
+one key can be handled as a single batch. Urgent items release their key
+immediately.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+# pending entries for one key are (enqueued_at, item) tuples, oldest first
+Take = Callable[[deque], int]
+Handler = Callable[[Hashable, list], Awaitable[None]]
+
+
+def take_one(pending: deque) -> int:
+    return 1
+
+
+class KeyedWorkQueue:
+    def __init__(
+        self,
+        name: str,
+        handler: Handler,
+        workers: int = 4,
+        take: Take = take_one,
+        linger: float = 0.0,
+        max_linger: float | None = None,
+    ):
+        """
+        handler(key, items) processes a batch for one key.
+        take(pending) decides how many entries from the head of a key's queue
+        go into the next batch (at least one is always taken).
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.take = take
+        self.linger = linger
+        self.max_linger = max_linger if max_linger is not None else linger
+
+        self._pending: dict[Hashable, deque] = {}
+        # keys that are queued in _ready or being handled; lingering keys have a timer instead
+        self._released: set = set()
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._urgent_keys: set = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._started_at = None
+        self._depth = 0
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "batches": 0,
+            "errors": 0,
+            "busy_workers": 0,
+            "busy_seconds": 0.0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "urgent": 0,
+        }
+
+    def put(self, key: Hashable, item, urgent: bool = False):
+        """
+        Queue item for key (non-blocking). Urgent items skip the linger delay.
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = deque()
+        pending.append((time.perf_counter(), item))
+        self._depth += 1
+        self._stats["enqueued"] += 1
+        self._idle.clear()
+
+        if urgent:
+            self._stats["urgent"] += 1
+            self._urgent_keys.add(key)
+            self._release(key)
+        elif key not in self._released:
+            self._schedule(key)
+
+    def _release(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if key not in self._released:
+            self._released.add(key)
+            self._ready.put_nowait(key)
+
+    def _schedule(self, key: Hashable):
+        """
+        Release key once it has been quiet for linger seconds (or max_linger has passed).
+        """
+        pending = self._pending[key]
+        deadline = min(pending[-1][0] + self.linger, pending[0][0] + self.max_linger)
+        delay = deadline - time.perf_counter()
+        if delay <= 0:
+            self._release(key)
+            return
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[key] = asyncio.get_running_loop().call_later(delay, self._release, key)
+
+    def depth(self) -> int:
+        return self._depth
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            pending = self._pending[key]
+            count = min(max(1, self.take(pending)), len(pending))
+            entries = [pending.popleft() for _ in range(count)]
+            self._depth -= count
+
+            now = time.perf_counter()
+            for enqueued_at, _ in entries:
+                wait = now - enqueued_at
+                self._stats["wait_seconds"] += wait
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+
+            self._stats["busy_workers"] += 1
+            try:
+                await self.handler(key, [item for _, item in entries])
+            except Exception:
+                self._stats["errors"] += 1
+                logger.exception(f"{self.name}: handler failed for key {key!r}")
+            finally:
+                self._stats["busy_workers"] -= 1
+                self._stats["busy_seconds"] += time.perf_counter() - now
+                self._stats["processed"] += count
+                self._stats["batches"] += 1
+                self._released.discard(key)
+                if pending and key in self._urgent_keys:
+                    self._release(key)
+                elif pending:
+                    self._schedule(key)
+                else:
+                    self._urgent_keys.discard(key)
+                    del self._pending[key]
+                    if not self._pending:
+                        self._idle.set()
+
+    def start(self):
+        if not self._tasks:
+            self._started_at = time.perf_counter()
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+                for i in range(self.workers)
+            ]
+
+    async def join(self):
+        """Wait until every queued item has been processed."""
+        await self._idle.wait()
+
+    async def stop(self, drain: bool = True, timeout: float | None = 10.0):
+        if drain and self._tasks:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.name}: stopped with {self._depth} items still queued")
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        processed = self._stats["processed"]
+        elapsed = (time.perf_counter() - self._started_at) if self._started_at else 0.0
+        capacity = elapsed * self.workers
+        return {
+            **self._stats,
+            "depth": self._depth,
+            "keys_pending": len(self._pending),
+            "keys_lingering": len(self._timers),
+            "workers": self.workers,
+            "linger": self.linger,
+            "avg_wait_seconds": (self._stats["wait_seconds"] / processed) if processed else 0.0,
+            "utilization": (self._stats["busy_seconds"] / capacity) if capacity else 0.0,
+        }
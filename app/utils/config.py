@@ -0,0 +1,176 @@
+"""
+Runtime configuration.
+
+Every setting is read from the environment once at import time so the rest of
+the app can import plain constants instead of calling os.getenv everywhere.
+"""
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# -----------------------------
+# LLM / model clients
+# -----------------------------
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+INTENT_MODEL = os.getenv("INTENT_MODEL", LLM_MODEL)
+LLM_MAX_CONCURRENCY = _env_int("LLM_MAX_CONCURRENCY", 16)       # in-flight calls per model
+# Per-model overrides of LLM_MAX_CONCURRENCY, e.g. "gpt-4o=4,gpt-4o-mini=32"
+LLM_MODEL_CONCURRENCY = {
+    model.strip(): int(limit)
+    for model, _, limit in (
+        entry.partition("=") for entry in os.getenv("LLM_MODEL_CONCURRENCY", "").split(",") if entry.strip()
+    )
+}
+LLM_MAX_CONNECTIONS = _env_int("LLM_MAX_CONNECTIONS", 32)       # pooled HTTP connections per client
+LLM_MAX_KEEPALIVE = _env_int("LLM_MAX_KEEPALIVE", 16)           # idle keep-alive connections kept open
+LLM_KEEPALIVE_EXPIRY = _env_float("LLM_KEEPALIVE_EXPIRY", 60.0)  # seconds
+LLM_TIMEOUT = _env_float("LLM_TIMEOUT", 30.0)                   # seconds
+
+CONTEXT_TOKEN_BUDGET = _env_int("CONTEXT_TOKEN_BUDGET", 3000)        # history tokens sent per call
+CONTEXT_SUMMARY_TOKENS = _env_int("CONTEXT_SUMMARY_TOKENS", 300)     # running summary of dropped turns
+SYSTEM_MESSAGES_MODE = os.getenv("SYSTEM_MESSAGES_MODE", "template")  # order summary / payment confirmation: "template" | "llm"
+MESSAGE_LOCALE = os.getenv("MESSAGE_LOCALE", "en")                   # templated messages: "en" | "pcm" (Nigerian Pidgin)
+
+
+# -----------------------------
+# Knowledge retrieval
+# -----------------------------
+RAG_ENABLED = _env_bool("RAG_ENABLED", True)      # False = paste all company_data into every prompt
+RAG_TOP_K = _env_int("RAG_TOP_K", 4)
+RAG_RETRIEVER = os.getenv("RAG_RETRIEVER", "bm25")   # "bm25" | "vector" | "hybrid"
+RAG_PINNED_FILES = tuple(
+    name.strip() for name in os.getenv("RAG_PINNED_FILES", "about.txt").split(",") if name.strip()
+)
+
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", str(BASE_DIR / "vector_index")))
+VECTOR_EMBEDDER = os.getenv("VECTOR_EMBEDDER", "hashing")  # or "package.module:function"
+VECTOR_DIM = _env_int("VECTOR_DIM", 1024)                   # hashing embedder dimensions
+
+
+# -----------------------------
+# Intent detection
+# -----------------------------
+INTENT_CLASSIFIER_ENABLED = _env_bool("INTENT_CLASSIFIER_ENABLED", True)
+INTENT_CONFIDENCE_THRESHOLD = _env_float("INTENT_CONFIDENCE_THRESHOLD", 0.75)
+INTENT_CHECKOUT_CONFIDENCE_THRESHOLD = _env_float("INTENT_CHECKOUT_CONFIDENCE_THRESHOLD", 0.95)  # labels that move checkout forward
+INTENT_CACHE_SIZE = _env_int("INTENT_CACHE_SIZE", 5000)              # entries kept in memory
+INTENT_CACHE_TTL = _env_float("INTENT_CACHE_TTL", 24 * 3600)          # seconds
+INTENT_CACHE_MAX_MESSAGE_LENGTH = _env_int("INTENT_CACHE_MAX_MESSAGE_LENGTH", 200)
+INTENT_CACHE_PERSIST = _env_bool("INTENT_CACHE_PERSIST", False)       # SQLite second tier
+
+
+# -----------------------------
+# FAQ response cache
+# -----------------------------
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_INTENTS = tuple(
+    name.strip()
+    for name in os.getenv("RESPONSE_CACHE_INTENTS", "product_inquiry,pricing,general_question").split(",")
+    if name.strip()
+)
+RESPONSE_CACHE_SIZE = _env_int("RESPONSE_CACHE_SIZE", 2000)               # answers kept in memory
+RESPONSE_CACHE_TTL = _env_float("RESPONSE_CACHE_TTL", 6 * 3600)           # seconds
+RESPONSE_CACHE_MAX_QUESTION_LENGTH = _env_int("RESPONSE_CACHE_MAX_QUESTION_LENGTH", 200)
+RESPONSE_CACHE_PERSIST = _env_bool("RESPONSE_CACHE_PERSIST", False)       # SQLite second tier
+RESPONSE_CACHE_SESSIONS = _env_int("RESPONSE_CACHE_SESSIONS", 20000)       # sessions remembered as past their first product question
+
+
+# -----------------------------
+# Conversation memory (0 disables a limit)
+# -----------------------------
+MEMORY_MAX_SESSIONS = _env_int("MEMORY_MAX_SESSIONS", 10000)           # live sessions (LRU eviction)
+MEMORY_MAX_MESSAGES = _env_int("MEMORY_MAX_MESSAGES", 200)             # per session, oldest dropped first
+MEMORY_IDLE_TTL = _env_float("MEMORY_IDLE_TTL", 3 * 24 * 3600)         # seconds without activity
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "memory")                 # "memory" | "sqlite"
+MEMORY_DB_PATH = Path(os.getenv("MEMORY_DB_PATH", str(BASE_DIR / "memory.db")))
+MEMORY_FLUSH_INTERVAL = _env_float("MEMORY_FLUSH_INTERVAL", 1.0)       # seconds between write-behind flushes
+MEMORY_FLUSH_BATCH = _env_int("MEMORY_FLUSH_BATCH", 100)               # flush early once this many are buffered
+MEMORY_SHARED = _env_bool("MEMORY_SHARED", False)                      # sqlite backend used by several worker processes
+
+
+# -----------------------------
+# Session / checkout state
+# -----------------------------
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")                   # "memory" | "sqlite" (shared across workers)
+STATE_DB_PATH = Path(os.getenv("STATE_DB_PATH", str(BASE_DIR / "state.db")))
+STATE_CACHE_TTL = _env_float("STATE_CACHE_TTL", 0.25)                  # seconds a read may be served from process cache
+
+
+# -----------------------------
+# Telegram
+# -----------------------------
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")   # point at a stand-in for testing
+TELEGRAM_TIMEOUT = _env_float("TELEGRAM_TIMEOUT", 10.0)           # seconds
+TELEGRAM_MAX_RETRIES = _env_int("TELEGRAM_MAX_RETRIES", 3)        # on 429 / 5xx / network errors
+TELEGRAM_MAX_CONNECTIONS = _env_int("TELEGRAM_MAX_CONNECTIONS", 50)
+TELEGRAM_INGESTION_MODE = os.getenv("TELEGRAM_INGESTION_MODE", "queue")  # "queue" (ack then process) | "inline" | "sharded"
+SHARD_WORKERS = _env_int("SHARD_WORKERS", os.cpu_count() or 1)         # worker processes in "sharded" mode
+SHARD_HEALTH_INTERVAL = _env_float("SHARD_HEALTH_INTERVAL", 5.0)       # seconds between checks that every shard worker is alive
+TELEGRAM_INGEST_WORKERS = _env_int("TELEGRAM_INGEST_WORKERS", 16)      # concurrent chats being processed
+TELEGRAM_DEBOUNCE_MS = _env_int("TELEGRAM_DEBOUNCE_MS", 1200)          # quiet time before a chat's burst is one turn (0 = off)
+TELEGRAM_DEBOUNCE_MAX_MS = _env_int("TELEGRAM_DEBOUNCE_MAX_MS", 4000)  # never hold a burst longer than this
+TELEGRAM_POLL_TIMEOUT = _env_int("TELEGRAM_POLL_TIMEOUT", 30)          # getUpdates long-poll seconds
+TELEGRAM_POLL_LIMIT = _env_int("TELEGRAM_POLL_LIMIT", 100)             # updates per getUpdates batch (max 100)
+TELEGRAM_DEDUP_WINDOW = _env_float("TELEGRAM_DEDUP_WINDOW", 24 * 3600)  # seconds an update_id is remembered
+TELEGRAM_DEDUP_MAX_IDS = _env_int("TELEGRAM_DEDUP_MAX_IDS", 100000)
+TELEGRAM_DEDUP_PERSIST = _env_bool("TELEGRAM_DEDUP_PERSIST", False)   # also record ids in SQLite
+TELEGRAM_DEDUP_CLAIM_TIMEOUT = _env_float("TELEGRAM_DEDUP_CLAIM_TIMEOUT", 300.0)  # unfinished claim in SQLite expires (crashed worker)
+TELEGRAM_DISPATCH_WORKERS = _env_int("TELEGRAM_DISPATCH_WORKERS", 8)   # outbound send workers
+TELEGRAM_GLOBAL_RATE = _env_float("TELEGRAM_GLOBAL_RATE", 30.0)        # messages/second across all chats
+TELEGRAM_CHAT_RATE = _env_float("TELEGRAM_CHAT_RATE", 1.0)             # messages/second per chat
+TELEGRAM_CHAT_BURST = _env_float("TELEGRAM_CHAT_BURST", 3.0)           # short bursts allowed per chat
+
+
+# -----------------------------
+# Paystack
+# -----------------------------
+PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")   # point at a stand-in for testing
+PAYSTACK_TIMEOUT = _env_float("PAYSTACK_TIMEOUT", 15.0)          # seconds
+PAYSTACK_MAX_RETRIES = _env_int("PAYSTACK_MAX_RETRIES", 3)
+PAYSTACK_MAX_CONNECTIONS = _env_int("PAYSTACK_MAX_CONNECTIONS", 20)
+PAYMENT_CONFIRM_WORKERS = _env_int("PAYMENT_CONFIRM_WORKERS", 4)            # confirmations generated at once
+PAYMENT_CONFIRM_MAX_ATTEMPTS = _env_int("PAYMENT_CONFIRM_MAX_ATTEMPTS", 5)
+PAYMENT_CONFIRM_BACKOFF = _env_float("PAYMENT_CONFIRM_BACKOFF", 2.0)        # seconds before the first retry, doubled each time
+JOB_RESUME_AFTER = _env_float("JOB_RESUME_AFTER", 60.0)                     # jobs whose runner stopped renewing them this long ago are resumed
+
+
+# -----------------------------
+# Orders database
+# -----------------------------
+APP_DB_PATH = Path(os.getenv("APP_DB_PATH", str(BASE_DIR / "app.db")))
+DB_BUSY_TIMEOUT_MS = _env_int("DB_BUSY_TIMEOUT_MS", 5000)          # wait this long for a lock before failing
+DB_CACHED_STATEMENTS = _env_int("DB_CACHED_STATEMENTS", 256)       # prepared statements kept per connection
+
+
+# -----------------------------
+# Caches
+# -----------------------------
+CACHE_DB_PATH = Path(os.getenv("CACHE_DB_PATH", str(BASE_DIR / "cache.db")))
+DEDUP_DB_PATH = Path(os.getenv("DEDUP_DB_PATH", str(CACHE_DB_PATH)))
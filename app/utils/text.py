@@ -0,0 +1,22 @@
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a short chat message for matching and caching:
+    lowercase, drop emoji/symbols/punctuation (apostrophes are removed so
+    "I'll" == "ill"), and collapse whitespace.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    kept = []
+    for ch in text:
+        if ch.isalnum():
+            kept.append(ch)
+        elif ch in "'’":
+            continue
+        elif ch.isspace() or unicodedata.category(ch)[0] in "PSZC":
+            kept.append(" ")
+    return _WHITESPACE_RE.sub(" ", "".join(kept)).strip()
@@ -0,0 +1,107 @@
+"""
+Benchmark: end-to-end checkout latency, templated vs LLM-written system messages.
+
+Drives concurrent checkouts through app.agent.handle_user_message
+("I want to buy" -> order summary, "yes", "pay now") and then the
+charge.success confirmation, with SYSTEM_MESSAGES_MODE set to "llm" and to
+"template". The model call is simulated with a fixed latency inside the real
+LLM_MAX_CONCURRENCY slot, intent detection is scripted and Paystack link
+creation is a short sleep, so only the system-message path differs.
+
+Run from the repo root:
+    python -m benchmarks.bench_checkout
+"""
+
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from app import agent as agent_module
+from app.agent import create_sales_agent, generate_payment_confirmation, handle_user_message
+from app.services.memory import memory
+from app.services.state import session_states
+from app.services.templates import messages
+
+CHECKOUTS = 200
+CONCURRENCY = 50         # customers checking out at once
+LLM_LATENCY = 1.2        # seconds per simulated completion
+PAYSTACK_LATENCY = 0.3   # seconds to create a payment link
+
+DETAILS = "My name is Chiamaka Okafor, email chiamaka{n}@gmail.com, phone 0803123{n:04d}, address 14 Admiralty Way, Lekki"
+
+INTENTS = {"I want to buy it": "purchase_intent", "yes": "order_confirmation", "pay now": "payment_initiation"}
+
+
+class SimulatedAgent:
+    async def run(self, task: str):
+        await asyncio.sleep(LLM_LATENCY)
+        return SimpleNamespace(messages=[SimpleNamespace(content="Simulated reply.")])
+
+
+async def scripted_intent(message: str) -> str:
+    return INTENTS.get(message, "unknown")
+
+
+async def create_payment_link(action: str, user_data: dict) -> dict:
+    await asyncio.sleep(PAYSTACK_LATENCY)
+    return {"action": "payment_link_created", "data": {"payment_url": f"https://checkout.example/{user_data['session_id']}"}}
+
+
+async def checkout(agent, session_id: str, n: int) -> dict[str, float]:
+    memory.add_message(session_id, "user", DETAILS.format(n=n))
+    timings = {}
+    started = time.perf_counter()
+
+    result = await handle_user_message(agent, session_id, "I want to buy it")
+    assert result["action"] == "show_order_summary", result
+    timings["summary"] = time.perf_counter() - started
+
+    assert (await handle_user_message(agent, session_id, "yes"))["action"] == "await_payment_command"
+    assert (await handle_user_message(agent, session_id, "pay now"))["action"] == "payment_link_created"
+
+    # charge.success: unlock and confirm
+    confirmed_at = time.perf_counter()
+    session_states.reset(session_id)
+    await generate_payment_confirmation(agent, session_id, amount=2700000)
+    timings["confirmation"] = time.perf_counter() - confirmed_at
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+async def run(mode: str) -> dict[str, list[float]]:
+    agent_module.SYSTEM_MESSAGES_MODE = mode
+    agent = create_sales_agent()
+    agent.for_session = lambda *args, **kwargs: SimulatedAgent()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(n: int):
+        async with semaphore:
+            return await checkout(agent, f"{mode}-{n}", n)
+
+    results = await asyncio.gather(*(one(n) for n in range(CHECKOUTS)))
+    return {key: [r[key] for r in results] for key in results[0]}
+
+
+def p95(values: list[float]) -> float:
+    return statistics.quantiles(values, n=20)[-1]
+
+
+def main():
+    print(f"{CHECKOUTS} checkouts, {CONCURRENCY} concurrent, simulated LLM {LLM_LATENCY:.1f}s, Paystack {PAYSTACK_LATENCY:.1f}s")
+    with mock.patch.object(agent_module, "detect_intent", scripted_intent), \
+         mock.patch.object(agent_module, "handle_intent_action", create_payment_link):
+        for mode in ("llm", "template"):
+            timings = asyncio.run(run(mode))
+            print(f"  {mode:<8}", end="")
+            for key in ("summary", "confirmation", "total"):
+                print(f"  {key} p50 {statistics.median(timings[key]) * 1000:7.1f} ms  p95 {p95(timings[key]) * 1000:7.1f} ms", end="")
+            print()
+
+    stats = messages.stats()
+    print(f"template renders: {stats['renders']}, {stats['avg_render_us']:.1f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: webhook lookup latency vs payment history size, before and after
+the indexing migration.
+
+Builds orders databases with 10k / 100k / 1M payments (one customer and
+order each) at schema version 1 (no indexes), times the storage lookups the
+Paystack webhook uses, applies the remaining migrations and times them again.
+
+Run from the repo root:
+    python -m benchmarks.bench_db_lookups
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.db.database import ConnectionManager
+from app.db.migrations import migrate
+from app.services import storage
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+LOOKUPS = {
+    "session by reference": lambda n: storage.get_session_id_by_payment_reference(f"ref-{n}"),
+    "payment_exists": lambda n: storage.payment_exists(f"ref-{n}"),
+    "order by reference": lambda n: storage.get_order_id_by_reference(f"ref-{n}"),
+    "session by order_id": lambda n: storage.get_session_id_by_order_id(n + 1),
+}
+
+
+def populate(conn, rows: int):
+    with conn:
+        conn.executemany(
+            "INSERT INTO customers (session_id, email) VALUES (?, ?)",
+            ((str(100000 + i), f"c{i}@example.com") for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (customer_id, amount, status) VALUES (?, 27000, 'paid')",
+            ((i + 1,) for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO payments (order_id, reference, status, amount) VALUES (?, ?, 'success', 2700000)",
+            ((i + 1, f"ref-{i}") for i in range(rows)),
+        )
+
+
+def time_lookups(rows: int, samples: int) -> dict[str, float]:
+    """Mean microseconds per call over random existing rows."""
+    keys = [random.randrange(rows) for _ in range(samples)]
+    results = {}
+    for name, lookup in LOOKUPS.items():
+        started = time.perf_counter()
+        for n in keys:
+            lookup(n)
+        results[name] = (time.perf_counter() - started) / samples * 1e6
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in SIZES:
+            manager = ConnectionManager(Path(tmp) / f"orders-{rows}.db")
+            # The storage functions use the module's connection manager
+            storage.db = manager
+            conn = manager.get()
+            migrate(conn, target=1)
+            populate(conn, rows)
+
+            before = time_lookups(rows, samples=max(5, 200_000 // rows))
+            started = time.perf_counter()
+            migrate(conn)
+            migration_seconds = time.perf_counter() - started
+            after = time_lookups(rows, samples=5000)
+
+            print(f"{rows:>9,} payments  (migration took {migration_seconds:.2f}s)")
+            for name in LOOKUPS:
+                print(
+                    f"    {name:<22} {before[name]:>10.1f} us -> {after[name]:>6.1f} us  "
+                    f"({before[name] / after[name]:,.0f}x)"
+                )
+            manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
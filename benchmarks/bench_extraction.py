@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: contact-detail extraction throughput (messages/second).
+
+Compares the previous approach (one re.search per pattern per field) with
+the single-pass ExtractionEngine on realistic Nigerian customer messages.
+
+Run from the repo root:
+    python -m benchmarks.bench_extraction
+"""
+
+import re
+import time
+
+from app.services.extraction import engine
+
+MESSAGES = [
+    "Hello, I'd like the niacinamide serum please",
+    "My name is Chiamaka Okafor and my email is chiamaka.okafor@gmail.com",
+    "You can reach me on 08031234567 or +2348123456789",
+    "Please deliver to 14 Admiralty Way, Lekki Phase 1, Lagos. My number is 07012345678",
+    "how much is the cerave cleanser?",
+    "I have oily skin and dark spots, budget is 20k",
+    "Tunde Bakare",
+    "My address is Plot 5, Aminu Kano Crescent, Wuse 2, Abuja",
+    "email: adaeze_n@yahoo.co.uk phone 2349012345678",
+    "yes that's correct, pay now",
+]
+
+
+def legacy_extract(content: str) -> dict:
+    info = {"name": None, "email": None, "phone": None, "address": None}
+
+    match = re.search(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", content)
+    if match:
+        info["email"] = match.group(0)
+
+    for pattern in (r"\+?234[789]\d{9}", r"0[789]\d{9}", r"\b\d{11}\b"):
+        match = re.search(pattern, content)
+        if match:
+            info["phone"] = match.group(0)
+            break
+
+    for pattern in (
+        r"(?:my name is|i\'?m|i am|call me|name:)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
+        r"^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)$",
+    ):
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            name = (match.group(1) or "").strip()
+            if 2 <= len(name) <= 50 and not re.search(r"\d", name):
+                info["name"] = name
+                break
+
+    if any(k in content.lower() for k in ["address", "deliver", "delivery", "location", "live at", "reside"]):
+        match = re.search(
+            r"(?:address|deliver to|delivery|location|live at|reside)[:\s]+(.{10,200})",
+            content,
+            re.IGNORECASE,
+        )
+        if match:
+            address = re.sub(r"[.,;!?]+$", "", (match.group(1) or "").strip())
+            if 10 <= len(address) <= 200:
+                info["address"] = address
+
+    return info
+
+
+def run(label: str, fn, rounds: int = 5000) -> float:
+    total = len(MESSAGES) * rounds
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            fn(message)
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed
+    print(f"{label:<18} {rate:>12,.0f} msg/s  ({elapsed * 1e6 / total:.2f} µs/msg)")
+    return rate
+
+
+def main():
+    for message in MESSAGES:
+        if legacy_extract(message) != engine.extract(message):
+            print(f"note: results differ for {message!r}")
+
+    legacy = run("per-pattern", legacy_extract)
+    single = run("single-pass", engine.extract)
+    print(f"speed-up: {single / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
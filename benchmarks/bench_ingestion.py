@@ -0,0 +1,175 @@
+"""
+Benchmark: Telegram ingestion via webhook (queued) vs getUpdates long polling.
+
+Both paths feed the same UpdateIngestor, with a simulated agent turn
+(fixed latency) that replies through the async Telegram client to the local
+stand-in. Measures the time from the first update to the last reply for a
+burst of updates spread over many chats.
+
+Run from the repo root:
+    python -m benchmarks.bench_ingestion
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.polling import TelegramPoller
+from app.services.dedup import UpdateDeduplicator
+from app.services.ingestion import UpdateIngestor
+from app.services.telegram import TelegramClient
+from app.bot import get_update_chat_id
+from benchmarks import fake_telegram
+
+TELEGRAM_PORT = 8081
+WEBHOOK_PORT = 8083
+API_URL = f"http://127.0.0.1:{TELEGRAM_PORT}/botTEST"
+TURN_LATENCY = 0.2     # simulated intent + LLM time per turn
+SENDER_CONNECTIONS = 40  # Telegram's default webhook max_connections
+
+
+# Updates fully handled (a chat's burst is one turn, so this can exceed the reply count)
+_processed = 0
+
+
+def make_turn(client: TelegramClient):
+    async def process(updates: list[dict]):
+        global _processed
+        await asyncio.sleep(TURN_LATENCY)
+        chat_id = get_update_chat_id(updates[-1])
+        await client.call("sendMessage", {"chat_id": chat_id, "text": f"reply to {len(updates)}"})
+        _processed += len(updates)
+
+    return process
+
+
+_next_update_id = 0
+
+
+def make_updates(n: int, chats: int) -> list[dict]:
+    # update_ids must not repeat across runs or the webhook's dedup drops them
+    global _next_update_id
+    first = _next_update_id + 1
+    _next_update_id += n
+    return [
+        {"update_id": first + i, "message": {"chat": {"id": i % chats}, "text": f"message {i}"}}
+        for i in range(n)
+    ]
+
+
+def wait_for_processed(expected: int, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while _processed < expected:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"only {_processed} of {expected} updates were processed")
+        time.sleep(0.005)
+
+
+# -----------------------------
+# Webhook path
+# -----------------------------
+def serve_webhook_app() -> uvicorn.Server:
+    webhook_app = FastAPI()
+    client = TelegramClient(api_url=API_URL)
+    dedup = UpdateDeduplicator()
+    ingestor = UpdateIngestor(make_turn(client), get_update_chat_id, debounce_ms=0)
+
+    @webhook_app.on_event("startup")
+    async def startup():
+        ingestor.start()
+
+    @webhook_app.post("/telegram/webhook")
+    async def telegram_webhook(request: Request):
+        data = await request.json()
+        if dedup.is_duplicate(data.get("update_id")):
+            return {"status": "duplicate"}
+        if not ingestor.submit(data):
+            return {"status": "ignored"}
+        return {"status": "queued"}
+
+    server = uvicorn.Server(uvicorn.Config(webhook_app, host="127.0.0.1", port=WEBHOOK_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def deliver_webhooks(updates: list[dict]):
+    """Post updates the way Telegram does: up to SENDER_CONNECTIONS in parallel."""
+    limits = httpx.Limits(max_connections=SENDER_CONNECTIONS)
+    async with httpx.AsyncClient(limits=limits) as sender:
+        url = f"http://127.0.0.1:{WEBHOOK_PORT}/telegram/webhook"
+        await asyncio.gather(*(sender.post(url, json=update) for update in updates))
+
+
+def run_webhook(n: int, chats: int) -> float:
+    updates = make_updates(n, chats)
+    expected = _processed + n
+    started = time.perf_counter()
+    asyncio.run(deliver_webhooks(updates))
+    wait_for_processed(expected)
+    return time.perf_counter() - started
+
+
+# -----------------------------
+# Polling path
+# -----------------------------
+async def poll_until(poller: TelegramPoller, expected: int):
+    task = asyncio.create_task(poller.run())
+    while _processed < expected:
+        await asyncio.sleep(0.005)
+    poller.stop()
+    await task
+
+
+def run_polling(n: int, chats: int) -> tuple[float, dict]:
+    fake_telegram.app.state.updates = []
+    expected = _processed + n
+    started = time.perf_counter()
+    for i in range(n):
+        fake_telegram.push_update(i % chats, f"message {i}")
+
+    async def main():
+        client = TelegramClient(api_url=API_URL)
+        poller = TelegramPoller(
+            process=make_turn(client),
+            client=client,
+            dedup=UpdateDeduplicator(),
+            poll_timeout=1,
+            is_urgent=lambda update: False,
+        )
+        try:
+            await poll_until(poller, expected)
+        finally:
+            await client.close()
+        return poller.stats()
+
+    stats = asyncio.run(main())
+    return time.perf_counter() - started, stats
+
+
+def main():
+    telegram_server = fake_telegram.serve_in_thread(TELEGRAM_PORT)
+    webhook_server = serve_webhook_app()
+    print(f"simulated turn: {TURN_LATENCY * 1000:.0f} ms, fake Telegram latency: {fake_telegram.LATENCY * 1000:.0f} ms")
+    try:
+        for n, chats in ((100, 100), (500, 100), (500, 500)):
+            webhook = run_webhook(n, chats)
+            polling, stats = run_polling(n, chats)
+            turns = stats["ingest"]["turns"]
+            print(
+                f"{n:>4} updates / {chats:>3} chats  webhook {webhook:6.2f}s ({n / webhook:6.1f} upd/s)  "
+                f"polling {polling:6.2f}s ({n / polling:6.1f} upd/s, {turns} turns, "
+                f"max batch {stats['max_batch_size']})"
+            )
+    finally:
+        webhook_server.should_exit = True
+        telegram_server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
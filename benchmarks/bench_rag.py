@@ -0,0 +1,66 @@
+"""
+Offline benchmark: retrieval latency and prompt-token reduction.
+
+For a sample of customer questions, compares the system prompt with the
+whole company_data pasted in against the prompt built from retrieved chunks.
+
+Run from the repo root:
+    python -m benchmarks.bench_rag
+"""
+
+import statistics
+import time
+
+from app.prompts.system_prompt import build_system_message, system_message
+from app.services.context import count_tokens
+from app.services.rag import KnowledgeRetriever, load_chunks
+
+QUESTIONS = [
+    "hi",
+    "good morning",
+    "I have acne on my forehead, what should I use?",
+    "what do you have for dark spots",
+    "how much is bio oil",
+    "my skin is very dry and flaky",
+    "do you deliver to Abuja?",
+    "what is good for blackheads on my nose",
+    "I have stretch marks after pregnancy",
+    "price of the ordinary retinol",
+    "do you accept pay on delivery",
+    "which moisturizer for sensitive skin",
+    "what's the store name",
+    "I want something for wrinkles and fine lines",
+    "razor bumps after shaving",
+]
+
+
+def main(rounds: int = 200):
+    started = time.perf_counter()
+    retriever = KnowledgeRetriever(load_chunks())
+    build_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            t0 = time.perf_counter()
+            retriever.context_for(question)
+            latencies.append((time.perf_counter() - t0) * 1e6)
+
+    full_tokens = count_tokens(system_message)
+    retrieved_tokens = [
+        count_tokens(build_system_message(retriever.context_for(q))) for q in QUESTIONS
+    ]
+    avg_retrieved = statistics.mean(retrieved_tokens)
+
+    latencies.sort()
+    print(f"chunks indexed:           {len(retriever.index.chunks)} (built in {build_ms:.1f} ms)")
+    print(f"retrieval latency p50:    {latencies[len(latencies) // 2]:.1f} µs")
+    print(f"retrieval latency p99:    {latencies[int(len(latencies) * 0.99)]:.1f} µs")
+    print(f"system prompt, full:      {full_tokens} tokens")
+    print(f"system prompt, retrieved: {avg_retrieved:.0f} tokens avg "
+          f"(min {min(retrieved_tokens)}, max {max(retrieved_tokens)})")
+    print(f"reduction per call:       {1 - avg_retrieved / full_tokens:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: FAQ response cache hit rate and latency saved.
+
+Replays a skewed stream of product / pricing / general questions (a few
+popular ones asked most often, with casing and punctuation varying between
+customers) through app.services.response_cache.cached_reply with a simulated
+LLM answer, then again after a simulated knowledge-base edit to show the
+cache starting over on the new version.
+
+Run from the repo root:
+    python -m benchmarks.bench_response_cache
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from unittest import mock
+
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import ResponseCache, cached_reply
+
+TURNS = 2000
+LLM_LATENCY = 1.2   # seconds per simulated answer
+TIME_SCALE = 0.01   # sleep this fraction of LLM_LATENCY so the run stays short
+
+QUESTIONS = [
+    ("product_inquiry", "What do you have for dark spots?"),
+    ("pricing", "How much is Bio Oil?"),
+    ("general_question", "Do you deliver to Abuja?"),
+    ("product_inquiry", "Which moisturizer for sensitive skin"),
+    ("pricing", "price of the ordinary retinol"),
+    ("general_question", "Do you accept pay on delivery?"),
+    ("product_inquiry", "What is good for blackheads on my nose"),
+    ("pricing", "How much is the CeraVe foaming cleanser"),
+    ("general_question", "How long does delivery to Port Harcourt take?"),
+    ("product_inquiry", "razor bumps after shaving"),
+    ("product_inquiry", "Something for wrinkles and fine lines?"),
+    # Not shareable: follow-up or personal details
+    ("pricing", "how much is it?"),
+    ("product_inquiry", "is this one good for oily skin"),
+    ("product_inquiry", "I have stretch marks after pregnancy, what can I use"),
+    ("general_question", "can you deliver to 14 Admiralty Way Lekki? my number is 08031234567"),
+]
+
+# Zipf-like popularity: question i is asked about 1/(i+1) as often as the first
+WEIGHTS = [1 / (i + 1) for i in range(len(QUESTIONS))]
+
+
+def vary(text: str, rng: random.Random) -> str:
+    text = rng.choice([text, text.lower(), text.upper(), text.capitalize()])
+    return text.rstrip("?") + rng.choice(["", "?", "??", " ?", " 🙏"])
+
+
+async def answer(personal: bool) -> str:
+    await asyncio.sleep(LLM_LATENCY * TIME_SCALE)
+    return "Simulated answer."
+
+
+async def replay(rng: random.Random, run: str) -> list[float]:
+    latencies = []
+    for n in range(TURNS):
+        intent, question = rng.choices(QUESTIONS, WEIGHTS)[0]
+        started = time.perf_counter()
+        await cached_reply(f"{run}-chat-{n}", vary(question, rng), intent, answer)
+        latencies.append((time.perf_counter() - started) / TIME_SCALE)
+    return latencies
+
+
+def report(label: str, latencies: list[float], cache: ResponseCache, before: dict):
+    stats = cache.stats()
+    hits = stats["cache"]["hits"] - before["hits"]
+    lookups = hits + stats["cache"]["misses"] - before["misses"]
+    eligible = stats["eligible"] - before["eligible"]
+    print(
+        f"  {label:<20} eligible {eligible / TURNS:5.1%}  hit rate {hits / max(lookups, 1):5.1%}  "
+        f"mean {statistics.mean(latencies):5.2f}s (uncached {LLM_LATENCY:.2f}s)  "
+        f"saved {(TURNS * LLM_LATENCY - sum(latencies)) / 60:5.1f} min over {TURNS} turns"
+    )
+
+
+def snapshot(cache: ResponseCache) -> dict:
+    stats = cache.stats()
+    return {"hits": stats["cache"]["hits"], "misses": stats["cache"]["misses"], "eligible": stats["eligible"]}
+
+
+def main():
+    rng = random.Random(7)
+    cache = ResponseCache(enabled=True)
+    response_cache_module.response_cache = cache
+    print(f"{TURNS} turns over {len(QUESTIONS)} questions, simulated LLM {LLM_LATENCY:.1f}s")
+
+    before = snapshot(cache)
+    report("knowledge v1", asyncio.run(replay(rng, "v1")), cache, before)
+
+    with mock.patch.object(response_cache_module, "knowledge_version", lambda: "edited-catalog"):
+        before = snapshot(cache)
+        report("after catalog edit", asyncio.run(replay(rng, "edited")), cache, before)
+
+    stats = cache.stats()
+    print(
+        f"invalidations: {stats['invalidations']}, entries: {stats['cache']['size']}, "
+        f"estimated LLM time saved: {stats['saved_seconds'] / TIME_SCALE / 60:.1f} min"
+    )
+
+
+if __name__ == "__main__":
+    main()
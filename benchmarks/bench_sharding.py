@@ -0,0 +1,99 @@
+"""
+Benchmark: sharded worker processes for CPU-bound turn work.
+
+Each update runs contact extraction, BM25 retrieval and JSON encoding (the
+CPU-bound parts of a turn, no LLM) in the shard that owns its chat. Compares
+1..N shards, then shows how many chats change owner when resizing with jump
+consistent hashing versus plain modulo hashing.
+
+Run from the repo root:
+    python -m benchmarks.bench_sharding
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from app.services.extraction import engine
+from app.services.rag import get_retriever
+from app.services.sharding import ShardedExecutor, shard_for
+
+UPDATES = 3000
+CHATS = 500
+ROUNDS = 20  # repeat the per-turn CPU work so it dominates queueing overhead
+
+TEXTS = [
+    "My name is Chiamaka Okafor and my email is chiamaka.okafor@gmail.com",
+    "I have oily skin and dark spots, what serum do you recommend?",
+    "Please deliver to 14 Admiralty Way, Lekki Phase 1, Lagos. My number is 07012345678",
+    "how much is the cerave cleanser and do you deliver to Abuja?",
+]
+
+
+class CpuBoundRuntime:
+    async def start(self, index: int, count: int):
+        self.retriever = get_retriever()
+
+    def is_urgent(self, update: dict) -> bool:
+        return False
+
+    async def process(self, updates: list[dict]):
+        for update in updates:
+            text = update["message"]["text"]
+            for _ in range(ROUNDS):
+                fields = engine.extract(text)
+                context = self.retriever.context_for(text)
+                json.dumps({"fields": fields, "context": context, "update": update})
+
+    def reset_session(self, session_id: str):
+        pass
+
+    async def confirm_payment(self, session_id: str, amount):
+        pass
+
+    def rebalance(self, index: int, count: int) -> int:
+        return 0
+
+    async def stop(self):
+        pass
+
+
+def make_update(i: int) -> dict:
+    return {"update_id": i, "message": {"chat": {"id": 1000 + i % CHATS}, "text": TEXTS[i % len(TEXTS)]}}
+
+
+async def run(shards: int) -> float:
+    executor = ShardedExecutor(workers=shards, runtime_cls=CpuBoundRuntime)
+    executor.start()
+    await executor.wait_ready()
+    started = time.perf_counter()
+    for i in range(UPDATES):
+        executor.submit(make_update(i))
+    await executor.stop()  # drains every shard
+    return time.perf_counter() - started
+
+
+def moved_share(before: int, after: int, place) -> float:
+    keys = range(100000)
+    return sum(place(k, before) != place(k, after) for k in keys) / len(keys)
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    print(f"{UPDATES} updates over {CHATS} chats, {cpus} CPU(s)")
+    baseline = None
+    for shards in sorted({1, 2, 4, cpus}):
+        elapsed = asyncio.run(run(shards))
+        baseline = baseline or elapsed
+        print(f"{shards:>2} shard(s): {elapsed:6.2f}s  {UPDATES / elapsed:7.1f} upd/s  x{baseline / elapsed:4.1f}")
+
+    print("\nchats that change owner on resize:")
+    for before, after in ((2, 3), (4, 5), (8, 7)):
+        jump = moved_share(before, after, shard_for)
+        modulo = moved_share(before, after, lambda k, n: hash(str(k)) % n)
+        print(f"  {before} -> {after} shards: jump hash {jump:5.1%}   modulo {modulo:5.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Multi-worker load test for the shared SQLite session state and memory.
+
+Runs N worker processes against one SQLite state store and one shared
+conversation-memory database, like `uvicorn --workers N`. Each worker drives
+checkout flows (details -> summary -> confirm -> pay now -> webhook reset) with
+a simulated LLM/Paystack wait and a per-worker concurrency cap, the way
+LLM_MAX_CONCURRENCY caps a real worker. Then every worker races to take
+the payment lock on the same sessions; exactly one must win each.
+
+Run from the repo root:
+    python -m benchmarks.bench_state
+"""
+
+import asyncio
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.memory import SqliteConversationMemory
+from app.services.state import SqliteStateStore, AWAITING_CONFIRMATION, AWAITING_PAYMENT
+
+FLOWS = 400             # checkout flows per run (split across workers)
+CONCURRENCY = 8         # in-flight turns per worker
+IO_LATENCY = 0.05       # simulated LLM / Paystack call
+RACE_SESSIONS = 200
+
+DETAILS = "My name is Chiamaka Okafor, email chiamaka{n}@gmail.com, phone 0803123{n:04d}, address 14 Admiralty Way, Lekki"
+
+
+async def checkout_flow(states: SqliteStateStore, memory: SqliteConversationMemory, session_id: str, n: int):
+    memory.add_message(session_id, "user", DETAILS.format(n=n % 10000))
+    await asyncio.sleep(IO_LATENCY)
+    assert memory.get_profile(session_id).is_complete()
+    states.transition(session_id, AWAITING_CONFIRMATION)
+    memory.add_message(session_id, "assistant", "Here is your order summary...")
+
+    memory.add_message(session_id, "user", "yes")
+    assert states.transition(session_id, AWAITING_PAYMENT, from_stage=AWAITING_CONFIRMATION)
+
+    memory.add_message(session_id, "user", "pay now")
+    assert states.get(session_id, fresh=True).stage == AWAITING_PAYMENT
+    assert states.lock_payment(session_id)
+    await asyncio.sleep(IO_LATENCY)
+    states.set_payment_url(session_id, f"https://checkout.example/{session_id}")
+    assert states.get(session_id).payment_locked
+
+    # charge.success webhook
+    states.reset(session_id)
+
+
+def worker(worker_id: int, workers: int, db_dir: str, start_at: float, results):
+    states = SqliteStateStore(Path(db_dir) / "state.db", cache_ttl=0.25)
+    memory = SqliteConversationMemory(Path(db_dir) / "memory.db", shared=True)
+
+    async def run_flows():
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(n: int):
+            async with semaphore:
+                await checkout_flow(states, memory, f"w{workers}-s{n}", n)
+
+        await asyncio.gather(*(one(n) for n in range(worker_id, FLOWS, workers)))
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.perf_counter()
+    asyncio.run(run_flows())
+    elapsed = time.perf_counter() - started
+
+    wins = sum(states.lock_payment(f"race-{workers}-{i}") for i in range(RACE_SESSIONS))
+    results.put((elapsed, wins, states.stats()["conflicts"]))
+    states.close()
+
+
+def run(workers: int, db_dir: str) -> tuple[float, int]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start_at = time.time() + 2.0  # let every process finish importing
+    processes = [
+        ctx.Process(target=worker, args=(i, workers, db_dir, start_at, results)) for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = max(o[0] for o in outcomes)
+    wins = sum(o[1] for o in outcomes)
+    return elapsed, wins
+
+
+def main():
+    print(f"{FLOWS} checkout flows, {CONCURRENCY} concurrent turns per worker, {IO_LATENCY * 1000:.0f} ms simulated I/O")
+    with tempfile.TemporaryDirectory() as db_dir:
+        baseline = None
+        for workers in (1, 2, 4, 8):
+            elapsed, wins = run(workers, db_dir)
+            rate = FLOWS / elapsed
+            baseline = baseline or rate
+            status = "ok" if wins == RACE_SESSIONS else "DOUBLE LOCK"
+            print(
+                f"{workers} worker(s): {elapsed:6.2f}s  {rate:7.1f} flows/s  x{rate / baseline:4.1f}  "
+                f"lock race: {wins}/{RACE_SESSIONS} won ({status})"
+            )
+
+
+if __name__ == "__main__":
+    main()
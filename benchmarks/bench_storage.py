@@ -0,0 +1,167 @@
+"""
+Benchmark: storage operations per second, connect-per-query vs managed connections.
+
+Replays the storage calls of a checkout + charge.success webhook
+(create customer/order/payment, reference lookups, status updates) against
+a fresh database: first with the previous pattern (sqlite3.connect, default
+rollback journal, close after every query), then through app.services.storage
+on per-thread WAL connections. Runs single-threaded and with several threads
+(sync FastAPI endpoints run on a thread pool).
+
+Run from the repo root:
+    python -m benchmarks.bench_storage
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["APP_DB_PATH"] = str(Path(_tmp.name) / "managed.db")
+
+from app.db.database import db, init_db  # noqa: E402
+from app.services import storage  # noqa: E402
+
+CHECKOUTS = 1000
+THREADS = 4
+OPS_PER_CHECKOUT = 8
+
+
+# -----------------------------
+# Previous pattern: connect / query / close
+# -----------------------------
+class LegacyStorage:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _write(self, sql: str, params: tuple) -> int:
+        conn = sqlite3.connect(self.path)
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        conn.commit()
+        rowid = cur.lastrowid
+        conn.close()
+        return rowid
+
+    def _read(self, sql: str, params: tuple):
+        conn = sqlite3.connect(self.path)
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        result = cur.fetchone()
+        conn.close()
+        return result
+
+    def create_customer(self, session_id, email, name=None, phone=None, address=None):
+        return self._write(
+            "INSERT INTO customers (session_id, email, name, phone, address) VALUES (?, ?, ?, ?, ?)",
+            (session_id, email, name, phone, address),
+        )
+
+    def create_order(self, customer_id, amount):
+        return self._write("INSERT INTO orders (customer_id, amount, status) VALUES (?, ?, ?)", (customer_id, amount, "pending"))
+
+    def create_payment(self, order_id, reference, amount, status):
+        self._write(
+            "INSERT INTO payments (order_id, reference, status, amount) VALUES (?, ?, ?, ?)",
+            (order_id, reference, status, amount),
+        )
+
+    def get_session_id_by_payment_reference(self, reference):
+        result = self._read(
+            """
+            SELECT c.session_id FROM payments p
+            JOIN orders o ON p.order_id = o.id
+            JOIN customers c ON o.customer_id = c.id
+            WHERE p.reference = ? LIMIT 1
+            """,
+            (reference,),
+        )
+        return result[0] if result else None
+
+    def payment_exists(self, reference):
+        return self._read("SELECT COUNT(*) FROM payments WHERE reference = ?", (reference,))[0] > 0
+
+    def get_order_id_by_reference(self, reference):
+        result = self._read("SELECT order_id FROM payments WHERE reference = ? LIMIT 1", (reference,))
+        return result[0] if result else None
+
+    def update_payment_status(self, reference, status):
+        self._write("UPDATE payments SET status = ? WHERE reference = ?", (status, reference))
+
+    def mark_order_paid(self, order_id):
+        self._write("UPDATE orders SET status = 'paid' WHERE id = ?", (order_id,))
+
+
+def create_legacy_schema(path: Path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE customers (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, name TEXT,
+                            email TEXT, phone TEXT, address TEXT);
+    CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER, amount INTEGER,
+                         status TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER, reference TEXT,
+                           status TEXT, amount INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    """)
+    conn.close()
+
+
+# -----------------------------
+# Workload
+# -----------------------------
+def checkout(store, n: int):
+    reference = f"ref-{n}"
+    customer_id = store.create_customer(f"chat-{n}", f"c{n}@example.com", "Ada", "08031234567", "Lekki")
+    order_id = store.create_order(customer_id, 27000)
+    store.create_payment(order_id, reference, 2700000, "pending")
+    # charge.success webhook
+    store.get_order_id_by_reference(reference)
+    store.payment_exists(reference)
+    store.update_payment_status(reference, "success")
+    store.mark_order_paid(order_id)
+    assert store.get_session_id_by_payment_reference(reference) == f"chat-{n}"
+
+
+def run(store, threads: int, first: int) -> float:
+    """Run CHECKOUTS checkouts numbered from first, split over threads."""
+    per_thread = CHECKOUTS // threads
+
+    def work(offset: int):
+        for n in range(offset, offset + per_thread):
+            checkout(store, n)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=work, args=(first + i * per_thread,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def main():
+    legacy_path = Path(_tmp.name) / "legacy.db"
+    create_legacy_schema(legacy_path)
+    legacy = LegacyStorage(legacy_path)
+    init_db()
+
+    ops = CHECKOUTS * OPS_PER_CHECKOUT
+    print(f"{CHECKOUTS} checkouts x {OPS_PER_CHECKOUT} storage calls")
+    try:
+        for round_, threads in enumerate((1, THREADS)):
+            before = run(legacy, threads, round_ * CHECKOUTS)
+            after = run(storage, threads, round_ * CHECKOUTS)
+            print(
+                f"{threads} thread(s)  connect-per-query {ops / before:8.0f} ops/s   "
+                f"managed WAL {ops / after:8.0f} ops/s   speed-up {before / after:4.1f}x"
+            )
+        print(f"connections opened by the manager: {db.stats()['opened']}")
+    finally:
+        db.close_all()
+        _tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: concurrent Telegram sends, blocking requests vs the async pooled client.
+
+Simulates N chats replying at the same time from async handlers. With the
+old blocking requests.post every send stalls the event loop, so sends run
+one after another; the async client overlaps them on pooled connections.
+
+Run from the repo root:
+    python -m benchmarks.bench_telegram
+"""
+
+import asyncio
+import time
+
+import requests
+
+from app.services.telegram import TelegramClient
+from benchmarks.fake_telegram import LATENCY, serve_in_thread
+
+PORT = 8081
+API_URL = f"http://127.0.0.1:{PORT}/botTEST"
+
+
+async def blocking_sends(n: int):
+    async def send(chat_id: int):
+        response = requests.post(f"{API_URL}/sendMessage", json={"chat_id": chat_id, "text": "hi"})
+        response.raise_for_status()
+
+    await asyncio.gather(*(send(i) for i in range(n)))
+
+
+async def async_sends(n: int):
+    client = TelegramClient(api_url=API_URL)
+    try:
+        await asyncio.gather(*(client.call("sendMessage", {"chat_id": i, "text": "hi"}) for i in range(n)))
+    finally:
+        await client.close()
+
+
+def run(label: str, coro_fn, n: int):
+    started = time.perf_counter()
+    asyncio.run(coro_fn(n))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {n:>4} sends in {elapsed:6.2f}s  ({n / elapsed:7.1f} msg/s)")
+    return elapsed
+
+
+def main():
+    server = serve_in_thread(PORT)
+    print(f"fake Telegram latency: {LATENCY * 1000:.0f} ms per call")
+    try:
+        for n in (10, 50, 200):
+            before = run("blocking requests.post", blocking_sends, n)
+            after = run("async pooled client", async_sends, n)
+            print(f"{'':<22} speed-up {before / after:.1f}x")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
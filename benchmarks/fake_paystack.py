@@ -0,0 +1,90 @@
+"""
+Local Paystack API stand-in.
+
+Implements POST /transaction/initialize and GET /transaction/verify/{reference}
+with fixed latency and optional failure injection, and rejects a reused
+reference the way Paystack does. Point the app at it with
+PAYSTACK_BASE_URL=http://127.0.0.1:8082
+
+Run standalone:
+    uvicorn benchmarks.fake_paystack:app --port 8082
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("FAKE_PAYSTACK_LATENCY", "0.1"))            # seconds per call
+FAILURE_RATIO = float(os.getenv("FAKE_PAYSTACK_FAILURE_RATIO", "0"))  # share of calls answered with 503
+
+app = FastAPI()
+app.state.transactions = {}
+app.state.calls = 0
+
+
+async def _simulate():
+    app.state.calls += 1
+    await asyncio.sleep(LATENCY)
+    if FAILURE_RATIO and random.random() < FAILURE_RATIO:
+        return JSONResponse(status_code=503, content={"status": False, "message": "Service unavailable"})
+    return None
+
+
+@app.post("/transaction/initialize")
+async def initialize(request: Request):
+    body = await request.json()
+    failure = await _simulate()
+    if failure:
+        return failure
+
+    reference = body["reference"]
+    if reference in app.state.transactions:
+        return JSONResponse(status_code=400, content={"status": False, "message": "Duplicate Transaction Reference"})
+
+    app.state.transactions[reference] = {
+        "reference": reference,
+        "amount": body["amount"],
+        "email": body["email"],
+        "status": "abandoned",
+        "metadata": body.get("metadata"),
+        "access_code": reference[:12],
+    }
+    return {
+        "status": True,
+        "message": "Authorization URL created",
+        "data": {
+            "authorization_url": f"https://checkout.paystack.test/{reference}",
+            "access_code": reference[:12],
+            "reference": reference,
+        },
+    }
+
+
+@app.get("/transaction/verify/{reference}")
+async def verify(reference: str):
+    failure = await _simulate()
+    if failure:
+        return failure
+
+    transaction = app.state.transactions.get(reference)
+    if transaction is None:
+        return JSONResponse(status_code=400, content={"status": False, "message": "Transaction reference not found"})
+    return {"status": True, "message": "Verification successful", "data": transaction}
+
+
+def serve_in_thread(port: int = 8082) -> uvicorn.Server:
+    """
+    Start the stand-in on a background thread and wait until it accepts requests.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
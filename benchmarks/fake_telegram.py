@@ -0,0 +1,99 @@
+"""
+Local Telegram Bot API stand-in for benchmarks.
+
+Answers POST /bot<token>/<method> after a fixed latency and records every
+call. Optionally rejects a fraction of calls with 429 + retry_after.
+getUpdates serves updates queued with push_update(), long-polling like
+the real API and dropping updates below the confirmed offset.
+
+Run standalone:
+    uvicorn benchmarks.fake_telegram:app --port 8081
+and point the app at it with TELEGRAM_API_BASE=http://127.0.0.1:8081
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("FAKE_TELEGRAM_LATENCY", "0.05"))        # seconds per call
+RATE_LIMIT_RATIO = float(os.getenv("FAKE_TELEGRAM_429_RATIO", "0"))  # share of calls answered with 429
+
+app = FastAPI()
+app.state.calls = []
+app.state.message_id = 0
+app.state.updates = []
+app.state.update_id = 0
+_updates_lock = threading.Lock()
+
+
+def push_update(chat_id: int, text: str) -> dict:
+    """
+    Queue an incoming message for getUpdates (thread-safe). Returns the update.
+    """
+    with _updates_lock:
+        app.state.update_id += 1
+        update = {
+            "update_id": app.state.update_id,
+            "message": {
+                "message_id": app.state.update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": text,
+            },
+        }
+        app.state.updates.append(update)
+    return update
+
+
+def _pending_updates(offset: int, limit: int) -> list[dict]:
+    with _updates_lock:
+        # Calling with an offset confirms every earlier update
+        app.state.updates = [u for u in app.state.updates if u["update_id"] >= offset]
+        return app.state.updates[:limit]
+
+
+async def get_updates(payload: dict) -> dict:
+    offset = payload.get("offset", 0)
+    limit = payload.get("limit", 100)
+    deadline = time.monotonic() + payload.get("timeout", 0)
+    while True:
+        updates = _pending_updates(offset, limit)
+        if updates or time.monotonic() >= deadline:
+            return {"ok": True, "result": updates}
+        await asyncio.sleep(0.005)
+
+
+@app.post("/bot{token}/{method}")
+async def bot_method(token: str, method: str, request: Request):
+    payload = await request.json()
+    if method == "getUpdates":
+        return await get_updates(payload)
+    await asyncio.sleep(LATENCY)
+
+    if RATE_LIMIT_RATIO and random.random() < RATE_LIMIT_RATIO:
+        return JSONResponse(
+            status_code=429,
+            content={"ok": False, "error_code": 429, "parameters": {"retry_after": 0.05}},
+        )
+
+    app.state.calls.append((time.time(), method, payload))
+    app.state.message_id += 1
+    return {"ok": True, "result": {"message_id": app.state.message_id, "chat": {"id": payload.get("chat_id")}}}
+
+
+def serve_in_thread(port: int = 8081) -> uvicorn.Server:
+    """
+    Start the stand-in on a background thread and wait until it accepts requests.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
@@ -0,0 +1,20 @@
+"""
+Test settings: keys the config expects and every database in a throwaway
+directory, set before any app module is imported.
+"""
+
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="sales-agent-tests-")
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PAYSTACK_SECRET_KEY", "test")
+for name, filename in (
+    ("APP_DB_PATH", "app.db"),
+    ("MEMORY_DB_PATH", "memory.db"),
+    ("STATE_DB_PATH", "state.db"),
+    ("CACHE_DB_PATH", "cache.db"),
+):
+    os.environ.setdefault(name, os.path.join(_data_dir, filename))
+os.environ.setdefault("VECTOR_INDEX_DIR", os.path.join(_data_dir, "vector_index"))
@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.dedup import UpdateDeduplicator
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "dedup.db"
+
+
+def test_redelivered_update_is_a_duplicate():
+    dedup = UpdateDeduplicator(window=60, db_path=None)
+    assert not dedup.is_duplicate(1)
+    dedup.done(1)
+    assert dedup.is_duplicate(1)
+    assert not dedup.is_duplicate(None)
+
+
+def test_released_update_is_handled_again():
+    dedup = UpdateDeduplicator(window=60, db_path=None)
+    assert not dedup.is_duplicate(1)
+    dedup.release(1)
+    assert not dedup.is_duplicate(1)
+
+
+def test_ids_are_bounded():
+    dedup = UpdateDeduplicator(window=60, max_ids=2, db_path=None)
+    for update_id in (1, 2, 3):
+        dedup.is_duplicate(update_id)
+    assert dedup.stats()["tracked_ids"] == 2
+    assert not dedup.is_duplicate(1)
+
+
+def test_done_updates_are_duplicates_across_workers(db_path):
+    first = UpdateDeduplicator(window=60, db_path=db_path)
+    second = UpdateDeduplicator(window=60, db_path=db_path)
+    try:
+        assert not first.is_duplicate(1)
+        # Claimed by the first worker and not yet timed out
+        assert second.is_duplicate(1)
+        first.done(1)
+        assert second.is_duplicate(1)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_unfinished_claims_are_released_after_a_crash(db_path):
+    crashed = UpdateDeduplicator(window=60, db_path=db_path)
+    assert not crashed.is_duplicate(1)
+    crashed.close()
+
+    restarted = UpdateDeduplicator(window=60, db_path=db_path)
+    try:
+        assert restarted.release_unfinished() == 1
+        assert not restarted.is_duplicate(1)
+    finally:
+        restarted.close()
+
+
+def test_stale_claims_expire(db_path):
+    first = UpdateDeduplicator(window=60, db_path=db_path, claim_timeout=0)
+    second = UpdateDeduplicator(window=60, db_path=db_path, claim_timeout=0)
+    try:
+        assert not first.is_duplicate(1)
+        assert not second.is_duplicate(1)
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.extraction import engine
+from benchmarks.bench_extraction import MESSAGES, legacy_extract
+
+EDGE_CASES = [
+    "him Tolu",
+    "x08031234567",
+    "ada08031234567@x.com",
+    "Ada Obi\n",
+    "2348031234567@gmail.com",
+    "my name is ada and i live at 14 admiralty way",
+    "nondelivery to 14 Admiralty Way, Lekki",
+    "call me Ada, address: 5 Aminu Kano Crescent. Im Bola",
+    "delivery deliver to",
+    "I am Ada and my friend is going to send money to you later today ok",
+    "My number is 080312345678901",
+    "",
+]
+
+
+@pytest.mark.parametrize("message", MESSAGES + EDGE_CASES)
+def test_matches_the_per_pattern_extraction(message):
+    assert engine.extract(message) == legacy_extract(message)
+
+
+@pytest.mark.parametrize("message,field,value", [
+    ("him Tolu", "name", "Tolu"),
+    ("x08031234567", "phone", "08031234567"),
+    ("ada08031234567@x.com", "phone", "08031234567"),
+    ("ada08031234567@x.com", "email", "ada08031234567@x.com"),
+    ("Ada Obi\n", "name", "Ada Obi"),
+    ("Please deliver to 14 Admiralty Way, Lekki.", "address", "14 Admiralty Way, Lekki"),
+    ("You can reach me on 08031234567 or +2348123456789", "phone", "+2348123456789"),
+])
+def test_extracts_field(message, field, value):
+    assert engine.extract(message)[field] == value
+
+
+def test_scan_reports_spans():
+    message = "email ada@x.com phone 08031234567"
+    spans = {match.field: message[match.start:match.end] for match in engine.scan(message)}
+    assert spans == {"email": "ada@x.com", "phone": "08031234567"}
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import intent as intent_module
+from app.services.cache import TTLCache
+from app.services.intent import detect_intent, get_classifier
+
+
+class FakeModelClient:
+    def __init__(self, label: str):
+        self.label = label
+        self.calls = 0
+
+    async def create(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=self.label)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    client = FakeModelClient("general_question")
+    monkeypatch.setattr(intent_module.model_clients, "get_client", lambda model: client)
+    monkeypatch.setattr(intent_module, "intent_cache", TTLCache(maxsize=100, ttl=60))
+    return client
+
+
+@pytest.mark.parametrize("message", [
+    "I don't want to buy the serum",
+    "i havent paid yet",
+    "no, not now",
+    "I won't pay today",
+])
+def test_negated_messages_are_not_classified_locally(message):
+    assert get_classifier().predict(message)[0] is None
+
+
+@pytest.mark.parametrize("message", [
+    "I don't want to buy the serum",
+    "i havent paid yet",
+    "pay",
+])
+def test_uncertain_checkout_intents_go_to_the_llm(llm, message):
+    assert asyncio.run(detect_intent(message)) == "general_question"
+    assert llm.calls == 1
+
+
+@pytest.mark.parametrize("message,label", [
+    ("hello", "greeting"),
+    ("how much is bio oil", "pricing"),
+    ("i have paid", "payment_confirmation"),
+    ("send me the payment link", "payment_initiation"),
+])
+def test_confident_local_matches_skip_the_llm(llm, message, label):
+    assert asyncio.run(detect_intent(message)) == label
+    assert llm.calls == 0
+
+
+def test_payment_triggers_are_overridden(llm):
+    assert asyncio.run(detect_intent("pay now")) == "payment_initiation"
+    assert llm.calls == 0
+
+
+def test_stats_keep_the_cache_hit_counter(llm):
+    asyncio.run(detect_intent("zorbl quaxen flimb"))
+    before = intent_module.intent_stats()["cache"]
+    asyncio.run(detect_intent("zorbl quaxen flimb"))
+    stats = intent_module.intent_stats()
+    assert stats["cache"] == before + 1
+    assert stats["cache_tier"]["hits"] >= 1
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from app.db.database import ConnectionManager
+from app.db.migrations import migrate
+from app.services.jobs import JobRunner, DONE, FAILED, QUEUED
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ConnectionManager(tmp_path / "jobs.db")
+    migrate(manager.get())
+    yield manager
+    manager.close_all()
+
+
+def runner(manager, handler, **kwargs) -> JobRunner:
+    kwargs.setdefault("backoff", 0.01)
+    return JobRunner("test", handler, workers=2, manager=manager, **kwargs)
+
+
+async def wait_for_status(jobs: JobRunner, reference: str, status: str, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while jobs.outcome(reference)["status"] != status:
+        assert asyncio.get_running_loop().time() < deadline, jobs.outcome(reference)
+        await asyncio.sleep(0.01)
+
+
+def test_job_runs_once_per_reference(manager):
+    calls = []
+
+    async def handler(value):
+        calls.append(value)
+
+    async def main():
+        jobs = runner(manager, handler)
+        jobs.start()
+        assert jobs.submit("ref-1", "chat-1", 1)
+        await jobs.join()
+        assert not jobs.submit("ref-1", "chat-1", 1)
+        await jobs.stop()
+        return jobs.outcome("ref-1")
+
+    outcome = asyncio.run(main())
+    assert calls == [1]
+    assert outcome["status"] == DONE and outcome["attempts"] == 1
+
+
+def test_failed_job_is_retried_then_recorded(manager):
+    async def handler():
+        raise RuntimeError("boom")
+
+    async def main():
+        jobs = runner(manager, handler, max_attempts=3)
+        jobs.start()
+        jobs.submit("ref-1", "chat-1")
+        await wait_for_status(jobs, "ref-1", FAILED)
+        await jobs.stop()
+        return jobs.outcome("ref-1")
+
+    outcome = asyncio.run(main())
+    assert outcome["attempts"] == 3
+    assert outcome["last_error"] == "RuntimeError: boom"
+
+
+def test_restart_resumes_a_job_stopped_mid_run(manager):
+    calls = []
+
+    async def main():
+        running = asyncio.Event()
+
+        async def hang(value):
+            running.set()
+            await asyncio.sleep(3600)
+
+        first = runner(manager, hang, resume_after=300)
+        first.start()
+        first.submit("ref-1", "chat-1", 42)
+        await running.wait()
+        await first.stop(timeout=0.05)
+
+        async def record(value):
+            calls.append(value)
+
+        # A redeploy right away, well inside resume_after
+        second = runner(manager, record, resume_after=300)
+        second.start()
+        await wait_for_status(second, "ref-1", DONE)
+        await second.stop()
+
+    asyncio.run(main())
+    assert calls == [42]
+
+
+def test_restart_resumes_a_job_waiting_to_retry(manager):
+    calls = []
+
+    async def main():
+        async def fail(value):
+            raise RuntimeError("telegram is down")
+
+        first = runner(manager, fail, backoff=3600, resume_after=300)
+        first.start()
+        first.submit("ref-1", "chat-1", 7)
+        await first.join()
+        assert first.outcome("ref-1")["status"] == QUEUED
+        await first.stop()
+
+        async def record(value):
+            calls.append(value)
+
+        second = runner(manager, record, resume_after=300)
+        second.start()
+        await wait_for_status(second, "ref-1", DONE)
+        await second.stop()
+        return second.outcome("ref-1")
+
+    outcome = asyncio.run(main())
+    assert calls == [7]
+    assert outcome["attempts"] == 2
+
+
+def test_jobs_of_a_crashed_runner_are_taken_over(manager):
+    calls = []
+
+    async def record(value):
+        calls.append(value)
+
+    async def main():
+        # Claimed, then the process died: never run, never released
+        crashed = runner(manager, record, resume_after=0.3)
+        crashed.submit("ref-1", "chat-1", 5)
+
+        live = runner(manager, record, resume_after=0.3)
+        live.start()
+        await asyncio.sleep(0.05)
+        assert calls == []   # the owner's claim is still fresh
+        await wait_for_status(live, "ref-1", DONE)
+        await live.stop()
+
+    asyncio.run(main())
+    assert calls == [5]
+
+
+def test_live_runner_keeps_its_jobs(manager):
+    calls = []
+
+    async def main():
+        running = asyncio.Event()
+
+        async def slow(value):
+            running.set()
+            await asyncio.sleep(0.6)
+            calls.append(("owner", value))
+
+        async def other(value):
+            calls.append(("other", value))
+
+        owner = runner(manager, slow, resume_after=0.3)
+        owner.start()
+        owner.submit("ref-1", "chat-1", 1)
+        await running.wait()
+
+        watcher = runner(manager, other, resume_after=0.3)
+        watcher.start()
+        await wait_for_status(owner, "ref-1", DONE)
+        await asyncio.sleep(0.2)
+        await watcher.stop()
+        await owner.stop()
+
+    asyncio.run(main())
+    assert calls == [("owner", 1)]
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from app.db.migrations import LATEST_VERSION, _columns, migrate, schema_version
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "app.db")
+    yield conn
+    conn.close()
+
+
+def _indexes(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def test_fresh_database_reaches_the_latest_version(conn):
+    assert migrate(conn) == LATEST_VERSION
+    assert "ux_payments_reference" in _indexes(conn, "payments")
+    assert "owner" in _columns(conn, "background_jobs")
+
+
+def test_migrating_again_is_a_no_op(conn):
+    migrate(conn)
+    conn.execute("INSERT INTO payments (order_id, reference, status) VALUES (1, 'ref', 'success')")
+    conn.commit()
+    assert migrate(conn) == LATEST_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0] == 1
+
+
+def test_target_stops_at_that_version(conn):
+    assert migrate(conn, target=1) == 1
+    assert "ux_payments_reference" not in _indexes(conn, "payments")
+    assert migrate(conn) == LATEST_VERSION
+
+
+def test_duplicate_payments_are_archived(conn):
+    migrate(conn, target=1)
+    conn.executemany(
+        "INSERT INTO payments (id, order_id, reference, status) VALUES (?, ?, ?, ?)",
+        [
+            (1, 10, "ref-a", "success"),
+            (2, 10, "ref-a", "failed"),
+            (3, 11, "ref-b", "pending"),
+            (4, 11, "ref-b", "failed"),
+        ],
+    )
+    conn.commit()
+
+    migrate(conn)
+
+    kept = conn.execute("SELECT id FROM payments ORDER BY id").fetchall()
+    archived = conn.execute("SELECT id, reference FROM payments_duplicates ORDER BY id").fetchall()
+    # The successful row wins; otherwise the newest one does
+    assert kept == [(1,), (4,)]
+    assert archived == [(2, "ref-a"), (3, "ref-b")]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO payments (order_id, reference, status) VALUES (12, 'ref-a', 'success')")
+
+
+def test_legacy_customers_table_gains_address(conn):
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, session_id TEXT, name TEXT, email TEXT, phone TEXT)")
+    conn.commit()
+    migrate(conn)
+    assert "address" in _columns(conn, "customers")
+    assert schema_version(conn) == LATEST_VERSION
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app import bot
+
+
+class FakeDispatcher:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def confirmation(monkeypatch):
+    async def generate(agent, session_id, amount):
+        return f"Paid {amount}"
+
+    monkeypatch.setattr(bot, "generate_payment_confirmation", generate)
+
+
+def test_confirmation_is_sent_to_the_chat(monkeypatch, confirmation):
+    dispatcher = FakeDispatcher()
+    monkeypatch.setattr(bot, "dispatcher", dispatcher)
+    asyncio.run(bot.deliver_payment_confirmation(None, "12345", 500000))
+    assert dispatcher.sent == [(12345, "Paid 500000")]
+
+
+def test_failed_send_fails_the_confirmation(monkeypatch, confirmation):
+    monkeypatch.setattr(bot, "dispatcher", FakeDispatcher(RuntimeError("telegram is down")))
+    with pytest.raises(RuntimeError, match="telegram is down"):
+        asyncio.run(bot.deliver_payment_confirmation(None, "12345", 500000))
+
+
+def test_non_telegram_session_is_not_sent(monkeypatch, confirmation):
+    dispatcher = FakeDispatcher()
+    monkeypatch.setattr(bot, "dispatcher", dispatcher)
+    asyncio.run(bot.deliver_payment_confirmation(None, "web-session", 500000))
+    assert dispatcher.sent == []
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import ResponseCache, cached_reply
+from app.services.state import session_states
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(enabled=True, intents=("product_inquiry", "pricing", "general_question"))
+    monkeypatch.setattr(response_cache_module, "response_cache", cache)
+    return cache
+
+
+def ask(session_id: str, message: str, intent: str) -> list[bool]:
+    """Run one turn; returns the personal flags generate() was called with."""
+    calls = []
+
+    async def generate(personal: bool) -> str:
+        calls.append(personal)
+        return "answer"
+
+    asyncio.run(cached_reply(session_id, message, intent, generate))
+    return calls
+
+
+@pytest.mark.parametrize("message", [
+    "What do you have for dark spots?",
+    "How much is Bio Oil?",
+    "Do you deliver to Abuja?",
+])
+def test_general_questions_are_shared(cache, message):
+    assert cache.eligible("s-general", message, "general_question") is not None
+
+
+@pytest.mark.parametrize("message", [
+    "what do you recommend for my skin",
+    "which is better for me",
+    "what should I buy with my budget",
+    "do you deliver to my area",
+    "I'm allergic to fragrance, what can I use?",
+    "can you send it to our office",
+])
+def test_questions_about_the_customer_are_not_shared(cache, message):
+    assert cache.eligible("s-personal", message, "product_inquiry") is None
+
+
+@pytest.mark.parametrize("message", ["how much is it?", "is this one good for oily skin"])
+def test_follow_ups_are_not_shared(cache, message):
+    assert cache.eligible("s-follow-up", message, "pricing") is None
+
+
+def test_contact_details_are_not_shared(cache):
+    assert cache.eligible("s-contact", "can you call 08031234567", "general_question") is None
+
+
+def test_sessions_in_checkout_are_not_shared(cache):
+    session_states.lock_payment("s-checkout")
+    try:
+        assert cache.eligible("s-checkout", "How much is Bio Oil?", "pricing") is None
+    finally:
+        session_states.reset("s-checkout")
+
+
+def test_cached_answer_is_reused_across_sessions(cache):
+    assert ask("s-first", "How much is Bio Oil?", "pricing") == [False]
+    assert ask("s-second", "how much is bio oil", "pricing") == []
+
+
+def test_questions_after_a_product_discussion_use_the_history(cache):
+    assert ask("s-chat", "What do you have for dark spots?", "product_inquiry") == [False]
+    # Read against the earlier answer, so it must not get (or share) a stock reply
+    assert ask("s-chat", "How much is Bio Oil?", "pricing") == [True]
+    assert ask("s-chat", "Do you deliver to Abuja?", "general_question") == [True]
+    assert ask("s-other", "How much is Bio Oil?", "pricing") == [False]
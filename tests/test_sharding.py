@@ -0,0 +1,73 @@
+import asyncio
+import os
+from collections import Counter
+
+import pytest
+
+from app.services.sharding import ShardedExecutor, ShardJobError, jump_hash, shard_for
+
+
+def test_jump_hash_stays_in_range_and_is_stable():
+    for key in range(1000):
+        bucket = jump_hash(key, 7)
+        assert 0 <= bucket < 7
+        assert jump_hash(key, 7) == bucket
+
+
+def test_growing_moves_only_chats_to_the_new_shard():
+    before = {chat: shard_for(chat, 4) for chat in range(4000)}
+    after = {chat: shard_for(chat, 5) for chat in range(4000)}
+    moved = [chat for chat in before if before[chat] != after[chat]]
+    assert all(after[chat] == 4 for chat in moved)
+    assert 0.1 < len(moved) / len(before) < 0.3
+
+
+def test_chat_id_and_session_id_share_a_shard():
+    assert all(shard_for(chat, 8) == shard_for(str(chat), 8) for chat in range(500))
+    assert len(Counter(shard_for(chat, 8) for chat in range(8000))) == 8
+
+
+class CrashingRuntime:
+    """Shard runtime without the agent; amount "crash" kills the worker."""
+
+    async def start(self, index: int, count: int):
+        pass
+
+    def is_urgent(self, update: dict) -> bool:
+        return False
+
+    async def process(self, updates: list[dict]):
+        pass
+
+    def reset_session(self, session_id: str):
+        pass
+
+    async def confirm_payment(self, session_id: str, amount):
+        if amount == "crash":
+            os._exit(1)
+
+    def rebalance(self, index: int, count: int) -> int:
+        return 0
+
+    async def stop(self):
+        pass
+
+
+def test_dead_shard_is_restarted_and_its_confirmation_fails_fast():
+    async def main():
+        shards = ShardedExecutor(workers=1, runtime_cls=CrashingRuntime, health_interval=0.2)
+        shards.start()
+        try:
+            await shards.wait_ready()
+            with pytest.raises(ShardJobError, match="died"):
+                await shards.confirm_payment("42", "crash", timeout=60)
+
+            # The respawned worker takes the next confirmation
+            await shards.confirm_payment("42", 500000, timeout=60)
+            return shards.stats()
+        finally:
+            await shards.stop()
+
+    stats = asyncio.run(main())
+    assert stats["restarts"] == 1
+    assert stats["alive"] == 1
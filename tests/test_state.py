@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.state import (
+    AWAITING_CONFIRMATION,
+    AWAITING_PAYMENT,
+    COLLECTING,
+    DEFAULT_STATE,
+    MemoryStateStore,
+    SqliteStateStore,
+    StateStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStateStore()
+    else:
+        store = SqliteStateStore(tmp_path / "state.db", cache_ttl=0)
+    yield store
+    store.close()
+
+
+def test_unknown_session_has_default_state(store):
+    assert store.get("s1") == DEFAULT_STATE
+
+
+def test_transition_checks_the_expected_stage(store):
+    assert store.transition("s1", AWAITING_CONFIRMATION, from_stage=COLLECTING)
+    assert not store.transition("s1", AWAITING_PAYMENT, from_stage=COLLECTING)
+    assert store.get("s1").stage == AWAITING_CONFIRMATION
+    assert store.transition("s1", AWAITING_PAYMENT, from_stage=AWAITING_CONFIRMATION)
+    assert store.get("s1").stage == AWAITING_PAYMENT
+
+
+def test_payment_lock_is_taken_once(store):
+    assert store.lock_payment("s1")
+    assert not store.lock_payment("s1")
+    assert store.set_payment_url("s1", "https://pay/1")
+    assert store.get("s1").payment_url == "https://pay/1"
+
+    assert store.unlock_payment("s1")
+    assert not store.set_payment_url("s1", "https://pay/2")
+    assert store.get("s1") == DEFAULT_STATE
+    assert store.stats()["conflicts"] == 2
+
+
+def test_reset_forgets_the_session(store):
+    store.transition("s1", AWAITING_PAYMENT)
+    store.lock_payment("s1")
+    store.reset("s1")
+    assert store.get("s1") == DEFAULT_STATE
+
+
+def test_sqlite_stores_share_the_lock(tmp_path):
+    first = SqliteStateStore(tmp_path / "state.db")
+    second = SqliteStateStore(tmp_path / "state.db")
+    try:
+        assert first.lock_payment("s1")
+        assert not second.lock_payment("s1")
+        assert second.get("s1", fresh=True).payment_locked
+    finally:
+        first.close()
+        second.close()
+
+
+def test_backend_must_implement_the_interface():
+    class Partial(StateStore):
+        def get(self, session_id, fresh=False):
+            return DEFAULT_STATE
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,60 @@
+import pytest
+
+from app.db.database import ConnectionManager
+from app.db.migrations import migrate
+from app.services import storage
+from app.services.storage import ChargeResult, record_charge
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = ConnectionManager(tmp_path / "app.db")
+    migrate(manager.get())
+    monkeypatch.setattr(storage, "db", manager)
+    yield manager
+    manager.close_all()
+
+
+def _order_status(manager, order_id):
+    return manager.get().execute("SELECT status FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+
+
+def _payments(manager):
+    return manager.get().execute("SELECT reference, status, amount FROM payments").fetchall()
+
+
+def test_successful_charge_marks_the_order_paid(manager):
+    customer_id = storage.create_customer("chat-1", "ada@example.com")
+    order_id = storage.create_order(customer_id, 5000)
+
+    assert record_charge("ref-1", 5000, "success", order_id=order_id) == ChargeResult(order_id, "chat-1")
+    assert _order_status(manager, order_id) == "paid"
+    assert _payments(manager) == [("ref-1", "success", 5000)]
+
+
+def test_redelivered_charge_updates_the_same_payment(manager):
+    order_id = storage.create_order(storage.create_customer("chat-1", "ada@example.com"), 5000)
+
+    record_charge("ref-1", 5000, "pending", order_id=order_id)
+    assert _order_status(manager, order_id) == "pending"
+    record_charge("ref-1", None, "success", order_id=order_id)
+
+    assert _order_status(manager, order_id) == "paid"
+    assert _payments(manager) == [("ref-1", "success", 5000)]
+
+
+def test_charge_without_order_needs_a_known_reference(manager):
+    order_id = storage.create_order(storage.create_customer("chat-1", "ada@example.com"), 5000)
+
+    assert record_charge("unknown", 5000, "success") is None
+    assert _payments(manager) == []
+
+    storage.create_payment(order_id, "ref-1", 5000, "pending")
+    assert record_charge("ref-1", 5000, "success") == ChargeResult(order_id, "chat-1")
+    assert _order_status(manager, order_id) == "paid"
+
+
+def test_charge_for_an_unknown_order_is_kept_but_not_resolved(manager):
+    # Paystack won't redeliver, so the payment row is kept for reconciliation
+    assert record_charge("ref-1", 5000, "success", order_id=999) is None
+    assert _payments(manager) == [("ref-1", "success", 5000)]
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.services.telegram_dispatcher import TelegramDispatcher
+
+
+class FakeClient:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def call(self, method: str, payload: dict):
+        self.calls.append((method, payload))
+        if self.fail:
+            raise RuntimeError("telegram is down")
+
+
+def run_dispatcher(client, send):
+    async def main():
+        dispatcher = TelegramDispatcher(client=client, global_rate=1000, chat_rate=1000, chat_burst=1000)
+        dispatcher.start()
+        try:
+            return await send(dispatcher), dispatcher.stats()
+        finally:
+            await dispatcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_send_message_resolves_after_delivery():
+    client = FakeClient()
+    _, stats = run_dispatcher(client, lambda d: d.send_message(1, "hello"))
+    assert client.calls == [("sendMessage", {"chat_id": 1, "text": "hello", "parse_mode": "HTML"})]
+    assert stats["sent"] == 1 and stats["failed"] == 0
+
+
+def test_send_message_raises_when_delivery_fails():
+    with pytest.raises(RuntimeError, match="telegram is down"):
+        run_dispatcher(FakeClient(fail=True), lambda d: d.send_message(1, "hello"))
+
+
+def test_coalesced_messages_share_the_outcome():
+    async def send(dispatcher):
+        futures = [dispatcher.enqueue_message(1, text) for text in ("a", "b", "c")]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    results, stats = run_dispatcher(FakeClient(fail=True), send)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["failed_messages"] == 3
+
+
+def test_dropped_futures_are_fine_for_fire_and_forget_callers():
+    async def send(dispatcher):
+        dispatcher.enqueue_message(1, "not awaited")
+        await dispatcher.queue.join()
+
+    _, stats = run_dispatcher(FakeClient(fail=True), send)
+    assert stats["failed"] == 1
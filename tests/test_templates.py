@@ -0,0 +1,50 @@
+import pytest
+
+from app.prompts.messages import MESSAGE_TEMPLATES
+from app.services.intent import quick_intent_override
+from app.services.templates import MessageTemplate, TemplateEngine
+
+ORDER_VALUES = {
+    "name": "Ada <Obi>",
+    "email": "ada@example.com",
+    "phone": "08031234567",
+    "address": "14 Admiralty Way, Lekki",
+    "amount": "₦27,000",
+}
+
+ORDER_SUMMARIES = [
+    (locale, variant)
+    for locale, entries in MESSAGE_TEMPLATES.items()
+    for variant in range(len(entries["order_summary"]))
+]
+
+
+@pytest.mark.parametrize("locale,variant", ORDER_SUMMARIES)
+def test_order_summary_asks_to_confirm_details(locale, variant):
+    text = TemplateEngine().render("order_summary", locale=locale, variant=variant, **ORDER_VALUES)
+    closing = text.strip().splitlines()[-1]
+    assert closing.endswith("?")
+    assert "correct" in closing.lower()
+    # The natural answer must be a confirmation, not a payment trigger
+    assert quick_intent_override(closing.rstrip("?")) is None
+    for trigger in ("go ahead", "proceed", "pay now", "make payment"):
+        assert trigger not in closing.lower()
+
+
+@pytest.mark.parametrize("locale,variant", ORDER_SUMMARIES)
+def test_order_summary_renders_every_field(locale, variant):
+    text = TemplateEngine().render("order_summary", locale=locale, variant=variant, **ORDER_VALUES)
+    assert "Ada &lt;Obi&gt;" in text
+    for field in ("email", "phone", "amount"):
+        assert ORDER_VALUES[field] in text
+
+
+def test_renders_rotate_through_variants():
+    template = MessageTemplate("greeting", ["Hi {name}", "Hello {name}"])
+    assert [template.render({"name": "Ada"}) for _ in range(3)] == ["Hi Ada", "Hello Ada", "Hi Ada"]
+
+
+def test_missing_locale_falls_back_to_default():
+    engine = TemplateEngine(default_locale="en")
+    assert engine.render("payment_confirmation", locale="fr", variant=0, amount="₦5,000") == \
+        engine.render("payment_confirmation", locale="en", variant=0, amount="₦5,000")
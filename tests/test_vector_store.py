@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.vector_store import VectorStore
+
+
+class ScaledEmbedder:
+    """Unnormalized vectors: the long one would win a raw dot product."""
+
+    name = "scaled"
+    dim = 2
+    vectors = {
+        "short": [1.0, 0.0],
+        "long": [10.0, 10.0],
+        "query": [1.0, 0.1],
+    }
+
+    def __call__(self, texts):
+        return np.array([self.vectors[text] for text in texts], dtype=np.float32)
+
+
+def _chunks(*texts):
+    return [SimpleNamespace(text=text) for text in texts]
+
+
+def test_search_ranks_by_cosine_similarity(tmp_path):
+    store = VectorStore(tmp_path, embedder=ScaledEmbedder()).build(_chunks("short", "long"))
+    results = store.search("query", k=2)
+    assert [chunk.text for chunk, _ in results] == ["short", "long"]
+    assert all(score <= 1.0 + 1e-6 for _, score in results)
+    assert results[0][1] == pytest.approx(1 / np.sqrt(1.01), rel=1e-5)
+
+
+def test_unnormalized_index_is_rebuilt(tmp_path):
+    store = VectorStore(tmp_path, embedder=ScaledEmbedder()).build(_chunks("short", "long"))
+    manifest = store._read_manifest()
+    manifest.pop("normalized")
+    store._atomic_write(store._manifest_path, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+    rebuilt = VectorStore(tmp_path, embedder=ScaledEmbedder()).build(_chunks("short", "long"))
+    assert rebuilt.stats == {"embedded": 2, "reused": 0}
+    assert np.allclose(np.linalg.norm(rebuilt.vectors, axis=1), 1.0)